@@ -0,0 +1,264 @@
+"""
+Offline end-to-end latency benchmark of the agent graph.
+
+The graph of `create_graph()` runs on a synthetic vault with a scripted chat
+model and deterministic fake embeddings, so no request leaves the machine.
+Recorded conversations are replayed turn by turn; the scripted model emits
+the recorded tool calls and answers. Reported per turn are the wall time of
+every node, the size of the serialized thread state and the time spent
+writing checkpoints, at p50/p95/p99.
+
+Usage:
+    python benchmarks/bench_agent.py [--notes 1000] [--replays 20]
+        [--conversations benchmarks/conversations.json]
+        [--checkpoint-type memory] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+# Nothing may leave the machine, including traces
+os.environ["LANGCHAIN_TRACING_V2"] = "false"
+os.environ["LANGSMITH_TRACING"] = "false"
+os.environ["MODEL_NAME"] = "scripted"
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from obsidian_agent.core.environment import set_library
+from obsidian_agent.core.graph import create_graph
+from obsidian_agent.core.nodes.history import SUMMARY_INSTRUCTION
+from obsidian_agent.core.routing import register_model
+from obsidian_agent.utils.obsidian import ObsidianLibrary
+from vault_generator import VaultSpec, generate_vault
+
+CONVERSATIONS_PATH = Path(__file__).parent / "conversations.json"
+SUMMARY_PREFIX = SUMMARY_INSTRUCTION.split("\n")[0]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model replaying recorded turns.
+
+    A turn is looked up by the last user message. The model answers with the
+    recorded tool calls, one per call, and then with the recorded answer.
+    Summary requests of the history compaction get a fixed summary.
+    """
+
+    turns: dict[str, dict]
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        if isinstance(messages[0], SystemMessage) and str(
+            messages[0].content
+        ).startswith(SUMMARY_PREFIX):
+            return AIMessage(content="The user asked about several notes.")
+
+        last_user = max(
+            i for i, m in enumerate(messages) if isinstance(m, HumanMessage)
+        )
+        turn = self.turns[str(messages[last_user].content)]
+        step = sum(isinstance(m, AIMessage) for m in messages[last_user + 1 :])
+        if step < len(turn["tool_calls"]):
+            call = turn["tool_calls"][step]
+            return AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": call["name"],
+                        "args": call["args"],
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                    }
+                ],
+            )
+        return AIMessage(content=turn["answer"])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time of every graph node run."""
+
+    def __init__(self):
+        self.started: dict[uuid.UUID, tuple[str, float]] = {}
+        self.samples: defaultdict[str, list[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        if metadata and name and name == metadata.get("langgraph_node"):
+            with self._lock:
+                self.started[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def _finish(self, run_id: uuid.UUID):
+        with self._lock:
+            started = self.started.pop(run_id, None)
+            if started is not None:
+                name, start = started
+                self.samples[name].append(time.perf_counter() - start)
+
+
+class CheckpointTimer:
+    """Time spent in the checkpointer's put and put_writes."""
+
+    def __init__(self, checkpointer):
+        self.samples: defaultdict[str, list[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+        for method in ("put", "put_writes"):
+            setattr(
+                checkpointer, method, self._timed(method, getattr(checkpointer, method))
+            )
+
+    def _timed(self, name: str, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.samples[name].append(time.perf_counter() - start)
+
+        return timed
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(sum(samples) for samples in self.samples.values())
+
+
+def percentiles(samples: list[float], scale: float = 1.0) -> dict[str, float]:
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return scale * ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+    return {"p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "runs": len(ordered)}
+
+
+def run_benchmark(
+    vault: str,
+    notes: int,
+    conversations: list[dict],
+    replays: int,
+    checkpoint_type: str,
+) -> dict[str, Any]:
+    generate_vault(vault, VaultSpec(notes=notes))
+    set_library(ObsidianLibrary(vault, embeddings=DeterministicFakeEmbedding(size=64)))
+    turns = {t["user"]: t for c in conversations for t in c["turns"]}
+    register_model("scripted", ScriptedChatModel(turns=turns))
+
+    graph = create_graph(
+        {
+            "configurable": {
+                "checkpoint_type": checkpoint_type,
+                "checkpoint_path": str(Path(vault, ".bench-checkpoints.sqlite")),
+                "store_type": "memory",
+            }
+        }
+    )
+    node_timer = NodeTimer()
+    checkpoint_timer = CheckpointTimer(graph.checkpointer)
+    serde = JsonPlusSerializer()
+
+    turn_times, state_sizes, checkpoint_times = [], [], []
+    for replay in range(replays):
+        for conversation in conversations:
+            config = {
+                "configurable": {
+                    "thread_id": f"{conversation['name']}-{replay}",
+                    "user_id": "bench",
+                },
+                "callbacks": [node_timer],
+            }
+            for turn in conversation["turns"]:
+                checkpoint_before = checkpoint_timer.total()
+                start = time.perf_counter()
+                graph.invoke({"messages": [HumanMessage(turn["user"])]}, config)
+                turn_times.append(time.perf_counter() - start)
+                checkpoint_times.append(checkpoint_timer.total() - checkpoint_before)
+                values = graph.get_state(config).values
+                state_sizes.append(len(serde.dumps_typed(values)[1]))
+
+    return {
+        "turn_ms": percentiles(turn_times, 1000),
+        "nodes_ms": {
+            name: percentiles(samples, 1000)
+            for name, samples in sorted(node_timer.samples.items())
+        },
+        "checkpoint_ms_per_turn": percentiles(checkpoint_times, 1000),
+        "checkpoint_calls_ms": {
+            name: percentiles(samples, 1000)
+            for name, samples in sorted(checkpoint_timer.samples.items())
+        },
+        "state_bytes": percentiles(state_sizes),
+    }
+
+
+def _print_row(name: str, stats: dict[str, float], unit: str):
+    digits = 3 if unit == "ms" else 0
+    p50, p95, p99 = (f"{stats[q]:.{digits}f}{unit}" for q in ("p50", "p95", "p99"))
+    print(f"{name:<36} p50={p50} p95={p95} p99={p99} runs={stats['runs']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--replays", type=int, default=20)
+    parser.add_argument("--conversations", type=str, default=str(CONVERSATIONS_PATH))
+    parser.add_argument(
+        "--checkpoint-type", choices=["memory", "sqlite"], default="memory"
+    )
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    conversations = json.loads(Path(args.conversations).read_text())
+    with tempfile.TemporaryDirectory() as vault:
+        results = run_benchmark(
+            vault, args.notes, conversations, args.replays, args.checkpoint_type
+        )
+
+    _print_row("turn", results["turn_ms"], "ms")
+    for name, stats in results["nodes_ms"].items():
+        _print_row(f"node/{name}", stats, "ms")
+    _print_row("checkpoint/turn", results["checkpoint_ms_per_turn"], "ms")
+    for name, stats in results["checkpoint_calls_ms"].items():
+        _print_row(f"checkpoint/{name}", stats, "ms")
+    _print_row("state_bytes", results["state_bytes"], "B")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
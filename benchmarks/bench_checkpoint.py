@@ -0,0 +1,116 @@
+"""
+Checkpoint bytes per thread with and without the deduplicating serializer.
+
+Each simulated turn adds a user message, a ReadNote style tool output of
+`--note-size` characters and an assistant reply, the shape that makes the
+checkpoint history grow quadratically.
+
+Usage:
+    python benchmarks/bench_checkpoint.py [--turns 20] [--threads 5] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.graph import START, StateGraph
+
+from obsidian_agent.core.models import GraphState
+from obsidian_agent.core.store import checkpoint_factory
+
+
+def memory_saver_bytes(saver) -> int:
+    """Bytes of serialized data held by a MemorySaver, including its blob store."""
+    total = 0
+    for namespaces in saver.storage.values():
+        for checkpoints in namespaces.values():
+            for checkpoint, metadata, _ in checkpoints.values():
+                total += len(checkpoint[1]) + len(metadata[1])
+    for writes in saver.writes.values():
+        total += sum(len(write[2][1]) for write in writes.values())
+    total += sum(len(blob[1]) for blob in getattr(saver, "blobs", {}).values())
+    blob_store = getattr(saver.serde, "blob_store", None)
+    total += getattr(blob_store, "size_bytes", 0)
+    return total
+
+
+def sqlite_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(p) for p in Path(path).parent.glob(Path(path).name + "*")
+    )
+
+
+def build_graph(checkpointer, note_size: int):
+    def tool(state: GraphState):
+        note = f"NOTE {uuid.uuid4()}\n" + "lorem ipsum " * (note_size // 12)
+        return {
+            "messages": [
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": "ReadNote", "args": {}, "id": "c"}],
+                ),
+                ToolMessage(content=note, tool_call_id="c"),
+            ]
+        }
+
+    def reply(state: GraphState):
+        return {"messages": [AIMessage(content="Here is a summary of the note.")]}
+
+    builder = StateGraph(GraphState)
+    builder.add_node("tool", tool)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "tool")
+    builder.add_edge("tool", "reply")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def run(checkpoint_type: str, dedup: bool, args, tmp: str) -> dict:
+    path = str(Path(tmp, f"{checkpoint_type}-{dedup}.sqlite"))
+    saver = checkpoint_factory(checkpoint_type, path, dedup=dedup)
+    graph = build_graph(saver, args.note_size)
+
+    start = time.perf_counter()
+    for thread in range(args.threads):
+        config = {"configurable": {"thread_id": f"thread-{thread}"}}
+        for turn in range(args.turns):
+            graph.invoke({"messages": [("user", f"turn {turn}")]}, config)
+    elapsed = time.perf_counter() - start
+
+    total = (
+        memory_saver_bytes(saver) if checkpoint_type == "memory" else sqlite_bytes(path)
+    )
+    return {
+        "bytes_per_thread": total // args.threads,
+        "ms_per_turn": 1000 * elapsed / (args.threads * args.turns),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=5)
+    parser.add_argument("--note-size", type=int, default=7500)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for checkpoint_type in ["memory", "sqlite"]:
+            for dedup in [False, True]:
+                name = f"{checkpoint_type}/{'dedup' if dedup else 'plain'}"
+                results[name] = run(checkpoint_type, dedup, args, tmp)
+                print(
+                    f"{name:<14} bytes/thread={results[name]['bytes_per_thread']:>12,}"
+                    f"  ms/turn={results[name]['ms_per_turn']:.2f}"
+                )
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+ObsidianLibrary micro-benchmarks on synthetic vaults.
+
+For every vault size the library is initialized and the note operations are
+timed on randomly picked notes: get_note_content, get_note_with_context at
+depths 0-3, get_all_note_links, put_note and section extraction. Results are
+compared to a saved baseline and the run fails when an operation got slower
+than the baseline by more than the tolerance.
+
+Usage:
+    python benchmarks/bench_library.py [--sizes 1000,10000,100000]
+        [--output results.json] [--save-baseline] [--tolerance 0.5]
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from obsidian_agent.utils.obsidian import ObsidianLibrary, find_and_extract_section
+from vault_generator import VaultSpec, generate_vault
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "obsidian_library.json"
+
+# Differences below this are timer noise and never count as regressions
+MIN_REGRESSION_MS = 0.5
+
+
+def time_calls(fn: Callable[[int], object], repeat: int) -> dict[str, float]:
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "median_ms": 1000 * statistics.median(samples),
+        "p95_ms": 1000 * samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+        "runs": repeat,
+    }
+
+
+def bench_vault(path: str, notes: int, repeat: int) -> dict[str, dict]:
+    names = generate_vault(path, VaultSpec(notes=notes))
+    rng = random.Random(0)
+    picks = [rng.choice(names) for _ in range(repeat)]
+    # The vector store is not benchmarked, a tiny offline one stands in
+    vector_store = FAISS.from_texts(["."], DeterministicFakeEmbedding(size=8))
+
+    results = {}
+    results["init"] = time_calls(
+        lambda i: ObsidianLibrary(path, vector_store=vector_store), max(3, repeat // 10)
+    )
+    library = ObsidianLibrary(path, vector_store=vector_store)
+
+    results["get_note_content"] = time_calls(
+        lambda i: library.get_note_content(picks[i]), repeat
+    )
+    for depth in range(4):
+        results[f"get_note_with_context/depth={depth}"] = time_calls(
+            lambda i: library.get_note_with_context(picks[i], depth), repeat
+        )
+    results["get_all_note_links"] = time_calls(
+        lambda i: library.get_all_note_links([picks[i]]), max(3, repeat // 10)
+    )
+    results["get_note_content/section"] = time_calls(
+        lambda i: library.get_note_content(f"{picks[i]}#Section 1"), repeat
+    )
+    texts = [library.get_note_content(name) for name in picks]
+    results["find_and_extract_section"] = time_calls(
+        lambda i: find_and_extract_section(texts[i], "Section 1"), repeat
+    )
+    results["put_note"] = time_calls(
+        lambda i: library.put_note(f"Bench note {i}", texts[i]), repeat
+    )
+    return results
+
+
+def find_regressions(
+    results: dict, baseline: dict, tolerance: float
+) -> list[tuple[str, float, float]]:
+    """Operations whose median is more than `tolerance` slower than the baseline."""
+    regressions = []
+    for size, operations in results.items():
+        for name, stats in operations.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            current, previous = stats["median_ms"], base["median_ms"]
+            if current > previous * (1 + tolerance) + MIN_REGRESSION_MS:
+                regressions.append((f"{size}/{name}", previous, current))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=str, default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--baseline", type=str, default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            results[str(size)] = bench_vault(tmp, size, args.repeat)
+        for name, stats in results[str(size)].items():
+            print(
+                f"{size:>7} {name:<36} median={stats['median_ms']:.3f}ms "
+                f"p95={stats['p95_ms']:.3f}ms"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline = {"machine": platform.platform(), "results": results}
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline saved to {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}, run with --save-baseline")
+        return
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for name, previous, current in regressions:
+        print(f"REGRESSION {name}: {previous:.3f}ms -> {current:.3f}ms")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Per-turn latency of the memory store and checkpointer backends.
+
+A "turn" for the store is what the assistant does per user message: a search
+of the profile and instructions namespaces followed by a memory update. A
+turn for the checkpointer is one invocation of a two-node graph appending to
+the message history of a thread.
+
+Usage:
+    python benchmarks/bench_store.py [--turns 200] [--output results.json]
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import START, StateGraph
+
+from obsidian_agent.core.models import GraphState
+from obsidian_agent.core.store import checkpoint_factory, store_factory
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "p50_ms": 1000 * samples[len(samples) // 2],
+        "p95_ms": 1000 * samples[int(len(samples) * 0.95)],
+        "mean_ms": 1000 * statistics.fmean(samples),
+    }
+
+
+def bench_store(store_type: str, path: str, turns: int) -> dict:
+    store = store_factory(store_type, path)
+    reads, writes = [], []
+    for i in range(turns):
+        user_id = f"user-{i % 10}"
+        start = time.perf_counter()
+        store.search(("profile", user_id))
+        store.search(("instructions", user_id))
+        reads.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        store.put(("profile", user_id), "profile", {"name": user_id, "turn": i})
+        writes.append(time.perf_counter() - start)
+    return {"read": percentiles(reads), "write": percentiles(writes)}
+
+
+def bench_checkpointer(checkpoint_type: str, path: str, turns: int) -> dict:
+    def reply(state: GraphState):
+        return {"messages": [AIMessage(content="x" * 2000)]}
+
+    builder = StateGraph(GraphState)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    graph = builder.compile(checkpointer=checkpoint_factory(checkpoint_type, path))
+
+    samples = []
+    for i in range(turns):
+        config = {"configurable": {"thread_id": f"thread-{i % 10}"}}
+        start = time.perf_counter()
+        graph.invoke({"messages": [("user", f"message {i}")]}, config)
+        samples.append(time.perf_counter() - start)
+    return {"turn": percentiles(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for store_type in ["memory", "sqlite"]:
+            path = str(Path(tmp, f"{store_type}-store.sqlite"))
+            results[f"store/{store_type}"] = bench_store(store_type, path, args.turns)
+        for checkpoint_type in ["memory", "sqlite"]:
+            path = str(Path(tmp, f"{checkpoint_type}-checkpoints.sqlite"))
+            results[f"checkpoint/{checkpoint_type}"] = bench_checkpointer(
+                checkpoint_type, path, args.turns
+            )
+
+    for name, result in results.items():
+        for phase, stats in result.items():
+            print(
+                f"{name:<22} {phase:<6} "
+                + "  ".join(f"{k}={v:.3f}" for k, v in stats.items())
+            )
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
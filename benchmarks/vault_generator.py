@@ -0,0 +1,161 @@
+"""
+Generator of synthetic Obsidian vaults for benchmarks.
+
+Notes are spread over nested folders, have a lognormal size distribution, a
+configurable number of `##` sections and `[[links]]` to other notes. Links
+point to notes of the same cluster, like topic folders in a real vault,
+and optionally to notes anywhere in the vault.
+
+Usage:
+    python benchmarks/vault_generator.py PATH [--notes 1000] [--seed 0]
+"""
+
+import argparse
+import math
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+WORDS = (
+    "note idea project meeting summary research paper book chapter quote "
+    "thought question answer draft review plan goal habit journal daily "
+    "weekly reference concept theory method result analysis design system "
+    "memory knowledge graph link topic area resource archive inbox task"
+).split()
+
+
+@dataclass
+class VaultSpec:
+    """
+    Shape of a synthetic vault.
+
+    Attributes:
+        notes: Number of notes.
+        mean_size: Mean note size in characters, sizes are lognormal.
+        size_sigma: Sigma of the lognormal size distribution.
+        links_per_note: Mean number of links per note.
+        cross_link_ratio: Share of links to notes outside the note's cluster.
+        cluster_size: Notes per cluster (topic folder).
+        max_depth: Maximum folder nesting depth.
+        sections_per_note: Mean number of `##` sections per note.
+        seed: Random seed, the same spec always gives the same vault.
+    """
+
+    notes: int = 1000
+    mean_size: int = 2000
+    size_sigma: float = 0.8
+    links_per_note: float = 3.0
+    cross_link_ratio: float = 0.0
+    cluster_size: int = 50
+    max_depth: int = 3
+    sections_per_note: float = 3.0
+    seed: int = 0
+
+
+def note_name(i: int) -> str:
+    return f"Note {i:06d}"
+
+
+def _folder(cluster: int, max_depth: int) -> Path:
+    """Clusters live at nesting depths from 0 (vault root) to `max_depth`."""
+    depth = cluster % (max_depth + 1)
+    parts = [f"area-{cluster % 7}", f"topic-{cluster}"]
+    parts += [f"part-{level}" for level in range(3, max_depth + 1)]
+    return Path(*parts[:depth])
+
+
+def _paragraph(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).capitalize() + "."
+
+
+def _links(rng: random.Random, i: int, spec: VaultSpec) -> list[str]:
+    if not spec.links_per_note:
+        return []
+    count = round(rng.expovariate(1 / spec.links_per_note))
+    cluster_start = (i // spec.cluster_size) * spec.cluster_size
+    cluster_end = min(cluster_start + spec.cluster_size, spec.notes)
+    links = []
+    for _ in range(count):
+        if rng.random() < spec.cross_link_ratio:
+            target = rng.randrange(spec.notes)
+        else:
+            target = rng.randrange(cluster_start, cluster_end)
+        links.append(note_name(target))
+    return links
+
+
+def render_note(rng: random.Random, i: int, spec: VaultSpec) -> str:
+    size = int(rng.lognormvariate(math.log(spec.mean_size), spec.size_sigma))
+    sections = max(1, round(rng.expovariate(1 / spec.sections_per_note)))
+    links = _links(rng, i, spec)
+    per_section = max(40, size // sections)
+
+    parts = [f"# {note_name(i)}\n"]
+    for s in range(sections):
+        parts.append(f"## Section {s + 1}\n")
+        body = _paragraph(rng, per_section)
+        section_links = links[s::sections]
+        if section_links:
+            body += " See " + ", ".join(f"[[{link}]]" for link in section_links) + "."
+        parts.append(body + "\n")
+    return "\n".join(parts)
+
+
+def generate_vault(root: str, spec: VaultSpec) -> list[str]:
+    """
+    Write a synthetic vault.
+
+    Args:
+        root (str): The vault directory, created if missing.
+        spec (VaultSpec): The shape of the vault.
+
+    Returns:
+        list[str]: The note names, without the .md suffix.
+    """
+    rng = random.Random(spec.seed)
+    names = []
+    created = set()
+    for i in range(spec.notes):
+        folder = Path(root, _folder(i // spec.cluster_size, spec.max_depth))
+        if folder not in created:
+            folder.mkdir(parents=True, exist_ok=True)
+            created.add(folder)
+        name = note_name(i)
+        (folder / f"{name}.md").write_text(render_note(rng, i, spec), encoding="utf-8")
+        names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--mean-size", type=int, default=2000)
+    parser.add_argument("--links-per-note", type=float, default=3.0)
+    parser.add_argument("--cross-link-ratio", type=float, default=0.0)
+    parser.add_argument("--max-depth", type=int, default=3)
+    parser.add_argument("--sections-per-note", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    spec = VaultSpec(
+        notes=args.notes,
+        mean_size=args.mean_size,
+        links_per_note=args.links_per_note,
+        cross_link_ratio=args.cross_link_ratio,
+        max_depth=args.max_depth,
+        sections_per_note=args.sections_per_note,
+        seed=args.seed,
+    )
+    generate_vault(args.path, spec)
+    print(f"Generated {spec.notes} notes in {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,56 @@
+import logging
+
 import gradio as gr
 from gradio import ChatMessage
-from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.messages import HumanMessage
 from langgraph_sdk import get_client
 
+from obsidian_agent.apps.sessions import SessionThreads
+from obsidian_agent.apps.streaming import stream_assistant
+
+logging.basicConfig(level=logging.INFO)
+
 API_URL = "http://127.0.0.1:2024"
 
 client = get_client(url=API_URL)
 assistant_id = "obsidian_assistant"
+threads = SessionThreads(client)
+
+
+async def get_response(message, history, request: gr.Request):
+    session_id = request.session_hash
+    if not history:
+        # A cleared chat starts a new conversation
+        threads.reset(session_id)
+    thread_id = await threads.get(session_id)
+
+    # The thread holds the conversation, only the new message is sent
+    input = {"messages": [HumanMessage(content=message)]}
 
+    # Token streaming, tool calls are shown as collapsible progress messages.
+    # Each model call, before and after tool calls, is its own message.
+    response = []
+    tool_messages = {}
+    answer, answer_id = None, None
+    async for event in stream_assistant(client, thread_id, assistant_id, input):
+        if event.kind == "tool_call":
+            tool_messages[event.tool_call_id] = ChatMessage(
+                role="assistant",
+                content=event.text,
+                metadata={"title": f"🔧 Using {event.tool_name}", "status": "pending"},
+            )
+            response.append(tool_messages[event.tool_call_id])
+            answer = None
+        elif event.kind == "tool_result" and event.tool_call_id in tool_messages:
+            tool_messages[event.tool_call_id].metadata["status"] = "done"
+        elif event.kind == "token":
+            if answer is None or answer_id != event.message_id:
+                answer = ChatMessage(role="assistant", content="")
+                answer_id = event.message_id
+                response.append(answer)
+            answer.content += event.text
 
-async def get_response(message, history):
-    thread = await client.threads.create()
-
-    input = {"messages": history}
-
-    # Stream
-    print("-------------------------------------------------------------------------")
-    print("History:", history)
-
-    history_langchain_format = []
-    for msg in history:
-        if msg["role"] == "user":
-            history_langchain_format.append(HumanMessage(content=msg["content"]))
-        elif msg["role"] == "assistant":
-            history_langchain_format.append(AIMessage(content=msg["content"]))
-    history_langchain_format.append(HumanMessage(content=message))
-
-    input = {"messages": history_langchain_format}
-
-    # TODO: Message streaming
-
-    # Updates streaming
-    async for chunk in client.runs.stream(
-        thread["thread_id"],
-        assistant_id=assistant_id,
-        input=input,
-        stream_mode="updates",
-    ):
-        print("Chunk:", chunk)
-        if chunk.data and chunk.event != "metadata":
-            for key in chunk.data.keys():
-                if key == assistant_id:
-                    if chunk.data[assistant_id]["messages"][-1]["type"] == "ai":
-                        yield ChatMessage(
-                            role="assistant",
-                            content=chunk.data[assistant_id]["messages"][-1]["content"],
-                        )
+        yield list(response)
 
 
 # Create the UI In Gradio
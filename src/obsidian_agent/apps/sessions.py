@@ -0,0 +1,37 @@
+from typing import Any
+
+
+class SessionThreads:
+    """
+    Maps UI sessions to langgraph threads.
+
+    Each session keeps one thread for its whole conversation, so only the new
+    user message has to be sent and the checkpointed history, including tool
+    results, is reused by the server.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.threads: dict[str, str] = {}
+
+    async def get(self, session_id: str) -> str:
+        """
+        Get the thread of a session, creating it on first use.
+
+        Args:
+            session_id (str): The UI session identifier.
+
+        Returns:
+            str: The thread id.
+        """
+        thread_id = self.threads.get(session_id)
+        if thread_id is None:
+            thread = await self.client.threads.create(
+                metadata={"session_id": session_id}
+            )
+            thread_id = self.threads[session_id] = thread["thread_id"]
+        return thread_id
+
+    def reset(self, session_id: str):
+        """Start a new thread on the next message of the session."""
+        self.threads.pop(session_id, None)
@@ -0,0 +1,124 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+ASSISTANT_NODE = "obsidian_assistant"
+TOOLS_NODE = "tools"
+
+
+@dataclass
+class StreamEvent:
+    """A UI-level event produced while the assistant is running."""
+
+    kind: Literal["token", "tool_call", "tool_result"]
+    text: str = ""
+    tool_call_id: Optional[str] = None
+    tool_name: Optional[str] = None
+    # Id of the streamed message, tokens of each model call share one
+    message_id: Optional[str] = None
+
+
+@dataclass
+class StreamTimings:
+    """Timings of a single streamed request, in seconds."""
+
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token: Optional[float] = None
+    total: Optional[float] = None
+
+
+def message_text(content: Any) -> str:
+    """Text of a message content, which is either a string or content blocks."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    return ""
+
+
+def describe_tool_call(tool_call: dict) -> str:
+    args = ", ".join(f"{k}={v!r}" for k, v in tool_call.get("args", {}).items())
+    return f"{tool_call['name']}({args})"
+
+
+async def stream_assistant(
+    client: Any,
+    thread_id: str,
+    assistant_id: str,
+    input: dict,
+    timings: Optional[StreamTimings] = None,
+) -> AsyncIterator[StreamEvent]:
+    """
+    Stream a run of the assistant as tokens and tool progress events.
+
+    Tokens come from the `messages-tuple` stream of the assistant node, tool
+    progress from the `updates` stream. The time to first token is logged.
+
+    Args:
+        client: The langgraph SDK client.
+        thread_id (str): The thread to run on.
+        assistant_id (str): The graph to run.
+        input (dict): The run input.
+        timings (Optional[StreamTimings]): Filled in with the request timings.
+
+    Yields:
+        StreamEvent: Tokens of the answer and tool call/result events.
+    """
+    timings = timings or StreamTimings()
+    tool_names: dict[str, str] = {}
+
+    async for chunk in client.runs.stream(
+        thread_id,
+        assistant_id=assistant_id,
+        input=input,
+        stream_mode=["messages-tuple", "updates"],
+    ):
+        if chunk.event == "error":
+            raise RuntimeError(f"Assistant run failed: {chunk.data}")
+
+        if chunk.event == "messages":
+            message, metadata = chunk.data
+            if metadata.get("langgraph_node") != ASSISTANT_NODE:
+                continue
+            text = message_text(message.get("content"))
+            if not text:
+                continue
+            if timings.first_token is None:
+                timings.first_token = time.perf_counter() - timings.started_at
+                logger.info("Time to first token: %.3fs", timings.first_token)
+            yield StreamEvent(kind="token", text=text, message_id=message.get("id"))
+
+        elif chunk.event == "updates":
+            for node, update in (chunk.data or {}).items():
+                messages = (update or {}).get("messages") or []
+                if node == ASSISTANT_NODE and messages:
+                    for tool_call in messages[-1].get("tool_calls") or []:
+                        tool_names[tool_call["id"]] = tool_call["name"]
+                        yield StreamEvent(
+                            kind="tool_call",
+                            text=describe_tool_call(tool_call),
+                            tool_call_id=tool_call["id"],
+                            tool_name=tool_call["name"],
+                        )
+                elif node == TOOLS_NODE:
+                    for message in messages:
+                        tool_call_id = message.get("tool_call_id")
+                        yield StreamEvent(
+                            kind="tool_result",
+                            text=message_text(message.get("content")),
+                            tool_call_id=tool_call_id,
+                            tool_name=tool_names.get(tool_call_id),
+                        )
+
+    timings.total = time.perf_counter() - timings.started_at
+    logger.info(
+        "Request finished in %.3fs, time to first token: %s",
+        timings.total,
+        f"{timings.first_token:.3f}s" if timings.first_token is not None else "n/a",
+    )
@@ -1,82 +1,91 @@
 import asyncio
-from pprint import pprint
+import logging
+import threading
 
 import streamlit as st
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import HumanMessage
 from langgraph_sdk import get_client
 
+from obsidian_agent.apps.streaming import stream_assistant
+
+logging.basicConfig(level=logging.INFO)
+
 API_URL = "http://127.0.0.1:2024"
 
-client = get_client(url=API_URL)
 assistant_id = "obsidian_assistant"
 
 
-async def get_response(message, history):
-    thread = await client.threads.create()
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """One event loop, running in a background thread, shared by all reruns."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
 
-    input = {"messages": history}
+@st.cache_resource
+def get_langgraph_client():
+    # The client's connection pool lives on the shared event loop
+    return get_client(url=API_URL)
 
-    print("-------------------------------------------------------------------------")
-    print("History:", history)
 
-    history_langchain_format = []
-    for msg in history:
-        if msg["role"] == "user":
-            history_langchain_format.append(HumanMessage(content=msg["content"]))
-        elif msg["role"] == "assistant":
-            history_langchain_format.append(AIMessage(content=msg["content"]))
-    history_langchain_format.append(HumanMessage(content=message))
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
 
-    input = {"messages": history_langchain_format}
 
+def iterate_async(agen):
+    """Iterate an async generator on the shared loop from the script thread."""
     try:
-        async for chunk in client.runs.stream(
-            thread["thread_id"],
-            assistant_id=assistant_id,
-            input=input,
-            stream_mode="updates",
-        ):
-            print("Chunk:", chunk)
-            if chunk.data and chunk.event != "metadata":
-                for key in chunk.data.keys():
-                    if key == assistant_id:
-                        if chunk.data[assistant_id]["messages"][-1]["type"] == "ai":
-                            yield (
-                                chunk.data[assistant_id]["messages"][-1]["content"],
-                                history,
-                            )
-    except GeneratorExit:
-        # Clean up if needed
-        print("Generator closed")
+        while True:
+            yield run_async(agen.__anext__())
+    except StopAsyncIteration:
         return
-    except Exception as e:
-        print(f"Error in generator: {e}")
-        raise
 
 
-async def run_conversation(message, history):
+def get_thread_id() -> str:
+    # One thread per browser session, the server keeps the conversation
+    if "thread_id" not in st.session_state:
+        thread = run_async(get_langgraph_client().threads.create())
+        st.session_state.thread_id = thread["thread_id"]
+    return st.session_state.thread_id
+
+
+def run_conversation(message, message_placeholder, status):
+    # Only the new message is sent, the history is in the thread checkpoint
+    input = {"messages": [HumanMessage(content=message)]}
+    events = stream_assistant(
+        get_langgraph_client(), get_thread_id(), assistant_id, input
+    )
+
     full_response = ""
-    async for response, new_history in get_response(message, history):
-        full_response = response
-        history = new_history
-    return full_response, history
+    message_id = None
+    for event in iterate_async(events):
+        if event.kind == "token":
+            # Model calls before and after tool calls are separate paragraphs
+            if full_response and event.message_id != message_id:
+                full_response += "\n\n"
+            message_id = event.message_id
+            full_response += event.text
+            message_placeholder.markdown(full_response + "▌")
+        elif event.kind == "tool_call":
+            status.update(label=f"Using {event.tool_name}...")
+            status.write(f"🔧 {event.text}")
+        elif event.kind == "tool_result":
+            status.write(f"✅ {event.tool_name} finished")
+    message_placeholder.markdown(full_response)
+    return full_response
 
 
 # Streamlit App Layout
 st.title("Welcome to Obsidian Assistant")
 input_text = st.text_input("Ask assistant-related questions here:")
 
-if "history" not in st.session_state:
-    st.session_state.history = []
-
 if input_text:
+    status = st.status("Processing...")
     message_placeholder = st.empty()
-    with st.spinner("Processing..."):
-        try:
-            output, history = asyncio.run(
-                run_conversation(input_text, st.session_state.history)
-            )
-            st.session_state.history = history
-            message_placeholder.write(output)
-        except Exception as e:
-            st.error(f"Error: {e}")
+    try:
+        run_conversation(input_text, message_placeholder, status)
+        status.update(label="Done", state="complete")
+    except Exception as e:
+        status.update(label="Failed", state="error")
+        st.error(f"Error: {e}")
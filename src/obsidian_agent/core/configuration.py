@@ -4,6 +4,15 @@ from typing import Any, Optional
 
 from langchain_core.runnables import RunnableConfig
 
+# Fields whose non-empty run value wins over the environment
+REQUEST_FIRST_FIELDS = (
+    "assistant_model",
+    "profile_model",
+    "instructions_model",
+    "summary_model",
+    "ingest_model",
+)
+
 
 @dataclass(kw_only=True)
 class Configuration:
@@ -16,7 +25,44 @@ class Configuration:
     You are designed to be a companion to a user, helping them by answering their messages utilizing their personal note library.
     """
     recursion_limit: int = 10
-    
+    history_token_budget: int = 12000
+    history_keep_turns: int = 1
+    history_dedup_notes: bool = True
+    read_note_page_chars: int = 24000
+    memory_update_mode: str = "background"
+    memory_update_debounce: float = 5.0
+    store_type: str = "memory"
+    store_path: Optional[str] = None
+    checkpoint_type: str = "memory"
+    checkpoint_path: Optional[str] = None
+    checkpoint_dedup: bool = True
+    checkpoint_keep_last: int = 10
+    checkpoint_ttl: float = 24 * 60 * 60
+    checkpoint_max_bytes: int = 256 * 1024 * 1024
+    fetch_cache_dir: Optional[str] = "~/.cache/obsidian_agent/fetch"
+    fetch_cache_ttl: float = 24 * 60 * 60
+    fetch_timeout: float = 20.0
+    ingest_max_fetches: int = 8
+    ingest_max_per_host: int = 2
+    ingest_max_llm_calls: int = 4
+    assistant_model: Optional[str] = None
+    profile_model: Optional[str] = None
+    instructions_model: Optional[str] = None
+    summary_model: Optional[str] = None
+    ingest_model: Optional[str] = None
+    llm_cache_path: Optional[str] = None
+    llm_cache_sites: str = "profile,instructions,summary"
+    llm_cache_max_entries: int = 10000
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    vault_id: Optional[str] = None
+    vaults_path: Optional[str] = None
+    vector_stores_path: Optional[str] = None
+    library_cache_bytes: int = 1024 * 1024 * 1024
+    metrics_enabled: bool = False
+    metrics_port: Optional[int] = None
+    metrics_path: Optional[str] = None
+    metrics_interval: float = 15.0
+
     @classmethod
     def from_runnable_config(
         cls, config: Optional[RunnableConfig] = None
@@ -30,4 +76,16 @@ class Configuration:
             for f in fields(cls)
             if f.init
         }
-        return cls(**{k: v for k, v in values.items() if v})
+        # The environment sets the default model of a role, a model chosen
+        # for the run wins over it
+        for name in REQUEST_FIRST_FIELDS:
+            if configurable.get(name) not in (None, ""):
+                values[name] = configurable[name]
+        # Environment variables are strings, convert them to the field type
+        types = {f.name: f.type for f in fields(cls)}
+        for k, v in values.items():
+            if isinstance(v, str) and types[k] in (int, float):
+                values[k] = types[k](v)
+            elif isinstance(v, str) and types[k] is bool:
+                values[k] = v.lower() not in ("0", "false", "no", "")
+        return cls(**{k: v for k, v in values.items() if v is not None and v != ""})
@@ -1,12 +1,17 @@
 import os
+import threading
+from typing import Optional
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableConfig
 
+import obsidian_agent.core.configuration as configuration
+from obsidian_agent.core.library_registry import get_registry
+from obsidian_agent.core.routing import ModelSpec, default_model_spec, model_for_spec
 from obsidian_agent.utils.obsidian import ObsidianLibrary
 
 
-def initialize_environment():
+def initialize_environment(embeddings: Optional[Embeddings] = None):
     """Initialize environment variables and library"""
     OBSIDIAN_VAULT_PATH = os.getenv("OBSIDIAN_VAULT_PATH")
     VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH")
@@ -17,17 +22,60 @@ def initialize_environment():
         raise ValueError("Please set the VECTOR_STORE_PATH environment variable.")
 
     return ObsidianLibrary(
-        path=OBSIDIAN_VAULT_PATH, vector_store_path=VECTOR_STORE_PATH
+        path=OBSIDIAN_VAULT_PATH,
+        vector_store_path=VECTOR_STORE_PATH,
+        embeddings=embeddings,
     )
 
 
-LIBRARY = initialize_environment()
-model_name = os.getenv("MODEL_NAME")
-if model_name is None:
-    raise ValueError("Please set the MODEL_NAME environment variable.")
-elif model_name == "gpt-4o-mini":
-    model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-elif model_name == "gemini-2.0-flash":
-    model = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0)
-else:
-    raise ValueError(f"Unknown model name: {model_name}")
+_LIBRARY: Optional[ObsidianLibrary] = None
+_LIBRARY_LOCK = threading.Lock()
+
+
+def get_library(config: Optional[RunnableConfig] = None) -> ObsidianLibrary:
+    """
+    Get the library of the vault of a run, loaded on first use.
+
+    Runs with a `vault_id` use the vault `<vaults_path>/<vault_id>` from the
+    shared registry, the others the vault of OBSIDIAN_VAULT_PATH.
+
+    Args:
+        config (Optional[RunnableConfig]): The run configuration.
+
+    Returns:
+        ObsidianLibrary: The library of the vault.
+    """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    if configurable.vault_id:
+        if not configurable.vaults_path:
+            raise ValueError("Please set vaults_path to use vault ids.")
+        registry = get_registry(
+            configurable.vaults_path,
+            configurable.vector_stores_path,
+            configurable.library_cache_bytes,
+        )
+        return registry.get(configurable.vault_id)
+
+    global _LIBRARY
+    with _LIBRARY_LOCK:
+        if _LIBRARY is None:
+            _LIBRARY = initialize_environment()
+        return _LIBRARY
+
+
+def set_library(library: Optional[ObsidianLibrary]):
+    """Use the given library instead of the one of OBSIDIAN_VAULT_PATH."""
+    global _LIBRARY
+    with _LIBRARY_LOCK:
+        _LIBRARY = library
+
+
+def __getattr__(name: str):
+    # LIBRARY and model are created lazily so that importing the graph does
+    # not require a vault or a model, e.g. in offline benchmarks
+    if name == "LIBRARY":
+        return get_library()
+    if name == "model":
+        # Default model, roles can be routed to other models with core.routing
+        return model_for_spec(ModelSpec.parse(default_model_spec()))
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,35 +1,172 @@
 # obsidian_agent/core/graph.py
+import asyncio
+import weakref
+from typing import Callable, Optional
+
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import START, StateGraph
+from langgraph.store.base import BaseStore
 
 import obsidian_agent.core.configuration as configuration
+from obsidian_agent.core.instrumentation import instrument_node, setup_metrics
 from obsidian_agent.core.models import GraphState
 from obsidian_agent.core.nodes.assistant import obsidian_assistant_node
+from obsidian_agent.core.nodes.history import compact_history_node
 from obsidian_agent.core.nodes.router import route_message
-from obsidian_agent.core.nodes.tools import tools_node
-from obsidian_agent.core.store import checkpoint_factory, store_factory
+from obsidian_agent.core.nodes.tools import atools_node, tools_node
+from obsidian_agent.core.retention import RetentionPolicy
+from obsidian_agent.core.store import (
+    acheckpoint_factory,
+    checkpoint_factory,
+    store_factory,
+)
+
+
+def _retention(configurable: configuration.Configuration) -> RetentionPolicy:
+    return RetentionPolicy(
+        keep_last=configurable.checkpoint_keep_last,
+        ttl_seconds=configurable.checkpoint_ttl,
+        max_bytes=configurable.checkpoint_max_bytes,
+    )
 
 
-def create_graph():
+def build_graph(configurable: configuration.Configuration) -> StateGraph:
     # Create the graph + all nodes
     builder = StateGraph(GraphState, config_schema=configuration.Configuration)
 
-    # Add nodes
-    builder.add_node("obsidian_assistant", obsidian_assistant_node)
-    builder.add_node("tools", tools_node)
+    # Add nodes, timed when metrics are enabled
+    instrumented = setup_metrics(configurable)
+
+    def timed(name: str, node: Callable) -> Callable:
+        return instrument_node(name, node) if instrumented else node
+
+    nodes = {
+        "compact_history": compact_history_node,
+        "obsidian_assistant": obsidian_assistant_node,
+    }
+    for name, node in nodes.items():
+        builder.add_node(name, timed(name, node))
+    # Async runs await async tools on their own event loop
+    builder.add_node(
+        "tools",
+        RunnableLambda(
+            timed("tools", tools_node), afunc=timed("tools", atools_node), name="tools"
+        ),
+    )
 
     # Add edges
-    builder.add_edge(START, "obsidian_assistant")
+    builder.add_edge(START, "compact_history")
+    builder.add_edge("compact_history", "obsidian_assistant")
     builder.add_conditional_edges("obsidian_assistant", route_message)
     builder.add_edge("tools", "obsidian_assistant")
+    return builder
+
 
-    # Configure memory
-    across_thread_memory = store_factory("memory")
-    within_thread_memory = checkpoint_factory("memory")
+def create_graph(config: Optional[RunnableConfig] = None):
+    configurable = configuration.Configuration.from_runnable_config(config)
+    builder = build_graph(configurable)
+
+    # Configure memory, an async_sqlite checkpointer needs an event loop so
+    # the sync graph uses the same database through the sync saver
+    checkpoint_type = configurable.checkpoint_type
+    if checkpoint_type == "async_sqlite":
+        checkpoint_type = "sqlite"
+    across_thread_memory = store_factory(
+        configurable.store_type, configurable.store_path
+    )
+    within_thread_memory = checkpoint_factory(
+        checkpoint_type,
+        configurable.checkpoint_path,
+        dedup=configurable.checkpoint_dedup,
+        retention=_retention(configurable),
+    )
 
     return builder.compile(
         checkpointer=within_thread_memory, store=across_thread_memory
     )
 
 
+# Checkpointers and stores of acreate_graph by event loop, created once per
+# configuration, as tasks so that concurrent first runs share them
+_ASYNC_MEMORY: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _create_memory(
+    configurable: configuration.Configuration,
+) -> tuple[BaseCheckpointSaver, BaseStore]:
+    within_thread_memory = await acheckpoint_factory(
+        configurable.checkpoint_type,
+        configurable.checkpoint_path,
+        dedup=configurable.checkpoint_dedup,
+        retention=_retention(configurable),
+    )
+    across_thread_memory = store_factory(
+        configurable.store_type, configurable.store_path
+    )
+    return within_thread_memory, across_thread_memory
+
+
+async def _async_memory(
+    configurable: configuration.Configuration,
+) -> tuple[BaseCheckpointSaver, BaseStore]:
+    key = (
+        configurable.checkpoint_type,
+        configurable.checkpoint_path,
+        configurable.checkpoint_dedup,
+        configurable.checkpoint_keep_last,
+        configurable.checkpoint_ttl,
+        configurable.checkpoint_max_bytes,
+        configurable.store_type,
+        configurable.store_path,
+    )
+    memory = _ASYNC_MEMORY.setdefault(asyncio.get_running_loop(), {})
+    if key not in memory:
+        memory[key] = asyncio.ensure_future(_create_memory(configurable))
+    try:
+        # A cancelled run does not cancel the shared creation
+        return await asyncio.shield(memory[key])
+    except Exception:
+        # Failed creations are retried by the next run
+        if memory[key].done():
+            del memory[key]
+        raise
+
+
+async def acreate_graph(config: Optional[RunnableConfig] = None):
+    """
+    Create the graph on the running event loop, with async checkpointers.
+
+    The server calls this factory for every run, the checkpointer and store
+    are created on the first call and shared by the following ones, until
+    `aclose_graphs`.
+    """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    builder = build_graph(configurable)
+    within_thread_memory, across_thread_memory = await _async_memory(configurable)
+
+    return builder.compile(
+        checkpointer=within_thread_memory, store=across_thread_memory
+    )
+
+
+async def aclose_graphs():
+    """Close the checkpointers and stores created by `acreate_graph` on this loop."""
+    memory = _ASYNC_MEMORY.pop(asyncio.get_running_loop(), {})
+    for task in memory.values():
+        try:
+            checkpointer, store = await task
+        except Exception:
+            continue
+        conn = getattr(checkpointer, "conn", None)
+        if conn is not None and asyncio.iscoroutinefunction(conn.close):
+            await conn.close()
+        close = getattr(store, "close", None)
+        if close is not None:
+            close()
+
+
 # Create the graph instance
 graph = create_graph()
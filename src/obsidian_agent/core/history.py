@@ -0,0 +1,191 @@
+# obsidian_agent/core/history.py
+import hashlib
+import json
+from typing import Optional, Sequence
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    ToolMessage,
+)
+
+EVICTED_TOOL_OUTPUT = (
+    "[Output of {tool_call} was removed from the conversation history to save "
+    "context ({length} characters). Call the tool again if you need it.]"
+)
+EVICTED_MARKER = "[Output of "
+SENT_NOTE_REFERENCE = (
+    "[{name} is unchanged since it was provided in the output of {tool_call} "
+    "above, it is not repeated here.]"
+)
+
+
+def estimate_tokens(messages: Sequence[AnyMessage]) -> int:
+    """
+    Roughly estimate the number of prompt tokens used by a list of messages.
+
+    Uses the common approximation of four characters per token, which is
+    good enough for budgeting and avoids a tokenizer dependency.
+
+    Args:
+        messages (Sequence[AnyMessage]): The messages to estimate.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    chars = 0
+    for message in messages:
+        content = message.content
+        chars += len(content) if isinstance(content, str) else len(str(content))
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            chars += len(tool_call["name"]) + len(json.dumps(tool_call["args"]))
+    return chars // 4 + 4 * len(messages)
+
+
+def turn_starts(messages: Sequence[AnyMessage]) -> list[int]:
+    """Return the indices of messages that start a new user turn."""
+    return [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+
+
+def describe_tool_call(messages: Sequence[AnyMessage], tool_call_id: str) -> str:
+    """Describe the tool call that produced a tool message, e.g. `ReadNote(...)`."""
+    for message in messages:
+        if not isinstance(message, AIMessage):
+            continue
+        for tool_call in message.tool_calls:
+            if tool_call["id"] == tool_call_id:
+                args = ", ".join(f"{k}={v!r}" for k, v in tool_call["args"].items())
+                return f"{tool_call['name']}({args})"
+    return "a tool call"
+
+
+def evict_tool_outputs(
+    messages: Sequence[AnyMessage], end: int, min_length: int = 500
+) -> list[ToolMessage]:
+    """
+    Replace large tool outputs before `end` with short references.
+
+    Args:
+        messages (Sequence[AnyMessage]): The conversation history.
+        end (int): Index of the first message that must be kept verbatim.
+        min_length (int): Tool outputs shorter than this are kept as they are.
+
+    Returns:
+        list[ToolMessage]: Replacement messages carrying the ids of the
+            originals, suitable for the `add_messages` reducer.
+    """
+    replacements = []
+    for message in messages[:end]:
+        if not isinstance(message, ToolMessage):
+            continue
+        content = message.content
+        if not isinstance(content, str):
+            content = str(content)
+        if len(content) < min_length or content.startswith(EVICTED_MARKER):
+            continue
+        replacements.append(
+            ToolMessage(
+                content=EVICTED_TOOL_OUTPUT.format(
+                    tool_call=describe_tool_call(messages, message.tool_call_id),
+                    length=len(content),
+                ),
+                tool_call_id=message.tool_call_id,
+                name=message.name,
+                id=message.id,
+            )
+        )
+    return replacements
+
+
+def apply_replacements(
+    messages: Sequence[AnyMessage], replacements: Sequence[AnyMessage]
+) -> list[AnyMessage]:
+    """Return `messages` with the replacements swapped in by message id."""
+    by_id = {m.id: m for m in replacements}
+    return [by_id.get(m.id, m) for m in messages]
+
+
+def find_summary_cut(
+    messages: Sequence[AnyMessage], token_budget: int, keep_turns: int = 1
+) -> Optional[int]:
+    """
+    Find how many leading messages to fold into the summary.
+
+    The cut always lands on a user turn boundary so that tool calls and their
+    results are never separated, and the last `keep_turns` completed turns
+    plus the current one are always kept.
+
+    Args:
+        messages (Sequence[AnyMessage]): The conversation history.
+        token_budget (int): The target number of tokens for the history.
+        keep_turns (int): Number of completed turns to keep verbatim.
+
+    Returns:
+        Optional[int]: The number of messages to summarize, or None if the
+            history cannot or need not be shortened.
+    """
+    starts = turn_starts(messages)
+    candidates = starts[1 : max(len(starts) - keep_turns, 0)]
+    if not candidates:
+        return None
+    for cut in candidates:
+        if estimate_tokens(messages[cut:]) <= token_budget:
+            return cut
+    return candidates[-1]
+
+
+def live_tool_outputs(messages: Sequence[AnyMessage]) -> set[str]:
+    """Return the tool call ids whose outputs are still in the history verbatim."""
+    return {
+        m.tool_call_id
+        for m in messages
+        if isinstance(m, ToolMessage)
+        and not (isinstance(m.content, str) and m.content.startswith(EVICTED_MARKER))
+    }
+
+
+def dedupe_notes(
+    messages: Sequence[AnyMessage],
+    sent_notes: dict[str, str],
+    notes: Sequence[tuple[str, str]],
+    tool_call_id: str,
+    min_length: int = 200,
+) -> tuple[list[str], dict[str, str]]:
+    """
+    Replace notes the model already received unchanged with short references.
+
+    Notes are keyed by a hash of their text, so an edited note is sent again.
+    A note only counts as sent while the tool output that carried it is
+    still in the history, not evicted or summarized.
+
+    Args:
+        messages (Sequence[AnyMessage]): The conversation history.
+        sent_notes (dict[str, str]): Tool call ids of the outputs holding
+            each sent note, by text hash.
+        notes (Sequence[tuple[str, str]]): Names and texts of the notes to send.
+        tool_call_id (str): The id of the tool call the notes are sent for.
+        min_length (int): Notes shorter than this are always sent in full.
+
+    Returns:
+        tuple[list[str], dict[str, str]]: The texts to send, and the updated
+            sent notes.
+    """
+    live = live_tool_outputs(messages)
+    sent = {key: call_id for key, call_id in sent_notes.items() if call_id in live}
+    texts = []
+    for name, text in notes:
+        if len(text) < min_length:
+            texts.append(text)
+            continue
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if key in sent:
+            texts.append(
+                SENT_NOTE_REFERENCE.format(
+                    name=name, tool_call=describe_tool_call(messages, sent[key])
+                )
+            )
+        else:
+            sent[key] = tool_call_id
+            texts.append(text)
+    return texts, sent
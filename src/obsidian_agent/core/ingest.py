@@ -0,0 +1,187 @@
+# obsidian_agent/core/ingest.py
+import argparse
+import asyncio
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+from urllib.parse import urlparse
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from obsidian_agent.core.prompts import INGEST_INSTRUCTION
+from obsidian_agent.utils.fetch import Fetcher
+
+# Characters Obsidian does not allow in note names
+_INVALID_NAME_CHARS = re.compile(r'[\[\]#^|\\/:*?"<>]')
+
+
+@dataclass
+class IngestResult:
+    url: str
+    note_name: Optional[str] = None
+    error: Optional[str] = None
+
+
+def note_name_for(note_text: str, page: str, url: str) -> str:
+    """
+    Pick a note name: the heading of the note, the page title or the URL.
+
+    Args:
+        note_text (str): The generated note.
+        page (str): The fetched page content.
+        url (str): The page URL.
+
+    Returns:
+        str: A note name valid in Obsidian.
+    """
+    for text, pattern in ((note_text, r"^#\s+(.+)$"), (page, r"^Title:\s*(.+)$")):
+        match = re.search(pattern, text, re.MULTILINE)
+        if match:
+            name = _INVALID_NAME_CHARS.sub(" ", match.group(1))
+            name = re.sub(r"\s+", " ", name).strip()[:100]
+            if name:
+                return name
+    parsed = urlparse(url)
+    return _INVALID_NAME_CHARS.sub(" ", parsed.netloc + parsed.path).strip()[:100]
+
+
+def _unique_name(library: Any, name: str, taken: Iterable[str]) -> str:
+    candidate, i = name, 2
+    while library.has_note(candidate) or candidate in taken:
+        candidate = f"{name} ({i})"
+        i += 1
+    return candidate
+
+
+async def ingest_urls(
+    urls: Iterable[str],
+    library: Any,
+    model: BaseChatModel,
+    fetcher: Fetcher,
+    max_fetches: int = 8,
+    max_per_host: int = 2,
+    max_llm_calls: int = 4,
+    max_page_chars: int = 40000,
+) -> list[IngestResult]:
+    """
+    Turn web pages into notes of the vault.
+
+    Pages are fetched concurrently, at most `max_fetches` at a time and
+    `max_per_host` per host, and summarized with at most `max_llm_calls`
+    concurrent model calls. The notes are written and added to the vector
+    store in a single `put_notes` batch.
+
+    Args:
+        urls (Iterable[str]): The URLs to ingest, duplicates are ignored.
+        library (ObsidianLibrary): The library to write the notes to.
+        model (BaseChatModel): The model writing the notes.
+        fetcher (Fetcher): The fetcher used to get the pages.
+        max_fetches (int): Limit of concurrent page fetches.
+        max_per_host (int): Limit of concurrent page fetches per host.
+        max_llm_calls (int): Limit of concurrent model calls.
+        max_page_chars (int): Pages are truncated to this many characters.
+
+    Returns:
+        list[IngestResult]: The created note or the error for every URL.
+    """
+    fetch_limit = asyncio.Semaphore(max_fetches)
+    host_limits: defaultdict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(max_per_host)
+    )
+    llm_limit = asyncio.Semaphore(max_llm_calls)
+
+    async def summarize(url: str) -> tuple[str, str, str]:
+        # Waiting for its host holds no global slot, other hosts go on
+        async with host_limits[urlparse(url).netloc], fetch_limit:
+            # Fetcher is blocking, its pooled session is shared by the threads
+            page = await asyncio.to_thread(fetcher.fetch, url)
+        async with llm_limit:
+            response = await model.ainvoke(
+                [
+                    SystemMessage(content=INGEST_INSTRUCTION),
+                    HumanMessage(content=f"URL: {url}\n\n{page[:max_page_chars]}"),
+                ]
+            )
+        return url, page, str(response.content)
+
+    urls = list(dict.fromkeys(urls))
+    outcomes = await asyncio.gather(
+        *(summarize(url) for url in urls), return_exceptions=True
+    )
+
+    results = []
+    notes: dict[str, str] = {}
+    for url, outcome in zip(urls, outcomes):
+        if isinstance(outcome, BaseException):
+            results.append(IngestResult(url, error=str(outcome)))
+            continue
+        _, page, note_text = outcome
+        note_name = _unique_name(library, note_name_for(note_text, page, url), notes)
+        notes[note_name] = f"{note_text.strip()}\n\nSource: {url}\n"
+        results.append(IngestResult(url, note_name=note_name))
+
+    if notes:
+        try:
+            # Writing and indexing block, keep them off the event loop
+            await asyncio.to_thread(library.put_notes, notes)
+        except OSError as e:
+            results = [
+                IngestResult(r.url, error=str(e)) if r.error is None else r
+                for r in results
+            ]
+    return results
+
+
+def format_results(results: list[IngestResult]) -> str:
+    return "\n".join(
+        f"Created note '{r.note_name}' from {r.url}"
+        if r.error is None
+        else f"Failed to ingest {r.url}: {r.error}"
+        for r in results
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize web pages into notes of the Obsidian vault."
+    )
+    parser.add_argument("urls", nargs="*", help="URLs to ingest")
+    parser.add_argument("-f", "--file", help="File with one URL per line")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            urls += [line.strip() for line in f if line.strip()]
+    if not urls:
+        parser.error("No URLs given")
+
+    import obsidian_agent.core.configuration as configuration
+    from obsidian_agent.core.environment import get_library
+    from obsidian_agent.core.routing import get_model
+    from obsidian_agent.utils.fetch import get_fetcher
+
+    configurable = configuration.Configuration.from_runnable_config()
+    fetcher = get_fetcher(
+        configurable.fetch_cache_dir,
+        configurable.fetch_cache_ttl,
+        configurable.fetch_timeout,
+    )
+    results = asyncio.run(
+        ingest_urls(
+            urls,
+            get_library(),
+            get_model("ingest"),
+            fetcher,
+            max_fetches=configurable.ingest_max_fetches,
+            max_per_host=configurable.ingest_max_per_host,
+            max_llm_calls=configurable.ingest_max_llm_calls,
+        )
+    )
+    print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
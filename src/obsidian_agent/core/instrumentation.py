@@ -0,0 +1,152 @@
+# obsidian_agent/core/instrumentation.py
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.outputs import LLMResult
+
+import obsidian_agent.core.configuration as configuration
+from obsidian_agent.utils.metrics import (
+    LLM_SECONDS,
+    LLM_TOKENS,
+    METRICS,
+    NODE_ERRORS,
+    NODE_SECONDS,
+    enable_metrics,
+)
+
+
+def setup_metrics(configurable: configuration.Configuration) -> bool:
+    """
+    Enable the metrics and their exporters when `metrics_enabled` is set.
+
+    Returns:
+        bool: Whether the metrics are enabled.
+    """
+    if configurable.metrics_enabled:
+        enable_metrics(
+            port=int(configurable.metrics_port) if configurable.metrics_port else None,
+            path=configurable.metrics_path,
+            interval=configurable.metrics_interval,
+        )
+    return METRICS.enabled
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """
+    Record the wall time and errors of a graph node.
+
+    The wrapper keeps the node's signature, which LangGraph inspects to pass
+    the config and the store, and an async node stays async.
+    """
+    if inspect.iscoroutinefunction(node):
+
+        @functools.wraps(node)
+        async def ainstrumented(*args: Any, **kwargs: Any):
+            start = time.perf_counter()
+            try:
+                return await node(*args, **kwargs)
+            except BaseException:
+                METRICS.inc(NODE_ERRORS, node=name)
+                raise
+            finally:
+                METRICS.observe(NODE_SECONDS, time.perf_counter() - start, node=name)
+
+        return ainstrumented
+
+    @functools.wraps(node)
+    def instrumented(*args: Any, **kwargs: Any):
+        start = time.perf_counter()
+        try:
+            return node(*args, **kwargs)
+        except BaseException:
+            METRICS.inc(NODE_ERRORS, node=name)
+            raise
+        finally:
+            METRICS.observe(NODE_SECONDS, time.perf_counter() - start, node=name)
+
+    return instrumented
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Record the latency and token usage of the model calls of a role."""
+
+    def __init__(self, role: str):
+        self.role = role
+        self._started: dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        self._finish(run_id)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if not usage:
+                    continue
+                cached = usage.get("input_token_details", {}).get("cache_read", 0)
+                METRICS.inc(
+                    LLM_TOKENS, usage["input_tokens"], role=self.role, type="prompt"
+                )
+                METRICS.inc(
+                    LLM_TOKENS,
+                    usage["output_tokens"],
+                    role=self.role,
+                    type="completion",
+                )
+                if cached:
+                    METRICS.inc(
+                        LLM_TOKENS, cached, role=self.role, type="cached_prompt"
+                    )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def _finish(self, run_id: UUID):
+        with self._lock:
+            start = self._started.pop(run_id, None)
+        if start is not None:
+            METRICS.observe(LLM_SECONDS, time.perf_counter() - start, role=self.role)
+
+
+_INSTRUMENTED_MODELS: dict[tuple[int, str], tuple[BaseChatModel, BaseChatModel]] = {}
+_INSTRUMENTED_MODELS_LOCK = threading.Lock()
+
+
+def with_metrics(model: BaseChatModel, role: str) -> BaseChatModel:
+    """
+    Record the model calls of a role, if the metrics are enabled.
+
+    Args:
+        model (BaseChatModel): The model used for the role.
+        role (str): The role, used as the `role` label.
+
+    Returns:
+        BaseChatModel: A copy of the model with a metrics callback, or the model.
+    """
+    if not METRICS.enabled:
+        return model
+    # Reuse the copy so that per-model memoization (bound tools) keeps working
+    key = (id(model), role)
+    cached = _INSTRUMENTED_MODELS.get(key)
+    if cached is not None and cached[0] is model:
+        return cached[1]
+    callbacks = list(model.callbacks or []) + [MetricsCallbackHandler(role)]  # type: ignore[arg-type]
+    instrumented = model.model_copy(update={"callbacks": callbacks})
+    with _INSTRUMENTED_MODELS_LOCK:
+        _INSTRUMENTED_MODELS[key] = (model, instrumented)
+    return instrumented
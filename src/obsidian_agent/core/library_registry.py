@@ -0,0 +1,209 @@
+# obsidian_agent/core/library_registry.py
+import functools
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from obsidian_agent.utils.obsidian import ObsidianLibrary
+
+# Vault ids are used as directory names below the vaults path
+_VAULT_ID = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}$")
+
+
+def validate_vault_id(vault_id: str) -> str:
+    if not _VAULT_ID.match(vault_id):
+        raise ValueError(f"Invalid vault id: {vault_id!r}")
+    return vault_id
+
+
+def vault_path(vaults_path: str, vault_id: str) -> str:
+    """
+    The resolved directory of a vault, `<vaults_path>/<vault_id>`.
+
+    Vault ids naming the same directory, e.g. through a symlink or on a case
+    insensitive file system, resolve to the same path.
+    """
+    path = os.path.join(os.path.expanduser(vaults_path), validate_vault_id(vault_id))
+    return os.path.normcase(os.path.realpath(path))
+
+
+def load_vault(
+    vaults_path: str,
+    vector_stores_path: Optional[str],
+    vault_id: str,
+    embeddings: Optional[Embeddings] = None,
+) -> ObsidianLibrary:
+    """
+    Load the library of a vault, `<vaults_path>/<vault_id>`.
+
+    The vector store is loaded from `<vector_stores_path>/<vault_id>`, or
+    built and saved there when it does not exist yet. Without a vector
+    stores path it is built in memory.
+
+    Args:
+        vaults_path (str): Directory holding one directory per vault.
+        vector_stores_path (Optional[str]): Directory holding one vector store per vault.
+        vault_id (str): The vault.
+        embeddings (Optional[Embeddings]): The embedding model, OpenAI embeddings by default.
+
+    Returns:
+        ObsidianLibrary: The library of the vault.
+    """
+    path = vault_path(vaults_path, vault_id)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"Vault '{vault_id}' not found")
+    if vector_stores_path is None:
+        return ObsidianLibrary(path, embeddings=embeddings)
+
+    store_path = os.path.join(os.path.expanduser(vector_stores_path), vault_id)
+    if os.path.exists(store_path):
+        return ObsidianLibrary(
+            path, vector_store_path=store_path, embeddings=embeddings
+        )
+
+    from obsidian_agent.utils.rag import create_vector_store
+
+    store = create_vector_store(path, store_path=store_path, embeddings=embeddings)
+    return ObsidianLibrary(path, vector_store_path=store_path, vector_store=store)
+
+
+class LibraryRegistry:
+    """
+    Libraries of several vaults, loaded on first use.
+
+    When the estimated memory of the loaded libraries exceeds `max_bytes`,
+    the least recently used ones are dropped and loaded again when needed.
+    The most recently used library is always kept. Libraries are keyed by
+    `key(vault_id)`, so vault ids naming the same vault share one library.
+    Libraries keep their memory estimate up to date, measuring them is cheap.
+
+    Dropped libraries save their pending changes first. A request still
+    using a dropped library keeps it alive, and the next request for the
+    vault gets it back instead of loading a second copy.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], ObsidianLibrary],
+        max_bytes: int,
+        key: Optional[Callable[[str], str]] = None,
+    ):
+        self.load = load
+        self.max_bytes = max_bytes
+        self.key = key
+        self._libraries: OrderedDict[str, ObsidianLibrary] = OrderedDict()
+        # Dropped libraries, until their last user lets go of them
+        self._dropped: weakref.WeakValueDictionary[str, ObsidianLibrary] = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+
+    def _key(self, vault_id: str) -> str:
+        validate_vault_id(vault_id)
+        return self.key(vault_id) if self.key is not None else vault_id
+
+    def get(self, vault_id: str) -> ObsidianLibrary:
+        """
+        Get the library of a vault, loading it if needed.
+
+        Args:
+            vault_id (str): The vault.
+
+        Returns:
+            ObsidianLibrary: The library of the vault.
+        """
+        key = self._key(vault_id)
+        with self._lock:
+            library, dropped = self._lookup(key)
+            if library is None:
+                load_lock = self._load_locks.setdefault(key, threading.Lock())
+        if library is not None:
+            _flush(dropped)
+            return library
+
+        # Vaults load in parallel, a vault requested twice is loaded once
+        with load_lock:
+            with self._lock:
+                library, dropped = self._lookup(key)
+            if library is None:
+                library = self.load(vault_id)
+                # Measure the new library before taking the registry lock
+                library.memory_usage()
+                with self._lock:
+                    self._libraries[key] = library
+                    dropped = self._evict()
+            with self._lock:
+                self._load_locks.pop(key, None)
+        _flush(dropped)
+        return library
+
+    def _lookup(
+        self, key: str
+    ) -> tuple[Optional[ObsidianLibrary], list[ObsidianLibrary]]:
+        """The loaded library of a key and the libraries dropped to keep it."""
+        library = self._libraries.get(key)
+        if library is not None:
+            self._libraries.move_to_end(key)
+            return library, []
+        library = self._dropped.pop(key, None)
+        if library is None:
+            return None, []
+        self._libraries[key] = library
+        return library, self._evict()
+
+    def _evict(self) -> list[ObsidianLibrary]:
+        """Drop least recently used libraries until the budget is met."""
+        sizes = {key: lib.memory_usage() for key, lib in self._libraries.items()}
+        total = sum(sizes.values())
+        dropped = []
+        while total > self.max_bytes and len(self._libraries) > 1:
+            key, library = self._libraries.popitem(last=False)
+            self._dropped[key] = library
+            dropped.append(library)
+            total -= sizes[key]
+        return dropped
+
+    def evict(self, vault_id: str):
+        key = self._key(vault_id)
+        with self._lock:
+            library = self._libraries.pop(key, None)
+            if library is not None:
+                self._dropped[key] = library
+        _flush([library] if library is not None else [])
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(lib.memory_usage() for lib in self._libraries.values())
+
+    def __contains__(self, vault_id: str) -> bool:
+        key = self._key(vault_id)
+        with self._lock:
+            return key in self._libraries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._libraries)
+
+
+def _flush(libraries: list[ObsidianLibrary]):
+    """Save the pending changes of dropped libraries, outside the registry lock."""
+    for library in libraries:
+        library.flush()
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry(
+    vaults_path: str, vector_stores_path: Optional[str], max_bytes: int
+) -> LibraryRegistry:
+    """Shared registry of the vaults below a path."""
+    return LibraryRegistry(
+        functools.partial(load_vault, vaults_path, vector_stores_path),
+        max_bytes=max_bytes,
+        key=functools.partial(vault_path, vaults_path),
+    )
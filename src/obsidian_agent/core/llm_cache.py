@@ -0,0 +1,197 @@
+# obsidian_agent/core/llm_cache.py
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.runnables import RunnableConfig
+
+import obsidian_agent.core.configuration as configuration
+from obsidian_agent.core.sqlite_store import configure_connection
+from obsidian_agent.utils.metrics import CACHE_REQUESTS, METRICS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_last_used_idx ON llm_cache (last_used);
+"""
+
+
+class SqliteLLMCache(BaseCache):
+    """
+    Persistent LLM response cache stored in SQLite.
+
+    Entries are keyed by the serialized model and call parameters, which
+    include bound tools, and the prompt messages. When the cache holds more
+    than `max_entries` entries or `max_bytes` bytes, the least recently used
+    entries are evicted.
+
+    The entry count and size are kept as running totals, so inserts do not
+    scan the table. They are recounted from the database when they exceed
+    a limit, which also catches up with entries added by other processes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._totals_lock = threading.Lock()
+        with self._conn as conn:
+            conn.executescript(SCHEMA)
+            self._entries, self._bytes = self._count(conn)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = configure_connection(
+                sqlite3.connect(self.path, check_same_thread=False)
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x1f{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        row = self._conn.execute(
+            "SELECT value FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            METRICS.inc(CACHE_REQUESTS, cache="llm", result="miss")
+            return None
+        self.hits += 1
+        METRICS.inc(CACHE_REQUESTS, cache="llm", result="hit")
+        with self._conn as conn:
+            conn.execute(
+                "UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        return loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        key = self._key(prompt, llm_string)
+        value = zlib.compress(dumps(list(return_val)).encode("utf-8"), 3)
+        with self._conn as conn:
+            replaced = conn.execute(
+                "SELECT size FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            with self._totals_lock:
+                if replaced is None:
+                    self._entries += 1
+                self._bytes += len(value) - (replaced[0] if replaced else 0)
+                over = self._entries > self.max_entries or self._bytes > self.max_bytes
+            if over:
+                self._evict(conn)
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection) -> tuple[int, int]:
+        return conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+
+    def _evict(self, conn: sqlite3.Connection):
+        entries, size = self._count(conn)
+        if entries <= self.max_entries and size <= self.max_bytes:
+            with self._totals_lock:
+                self._entries, self._bytes = entries, size
+            return
+        evicted = []
+        for key, entry_size in conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY last_used"
+        ).fetchall():
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            evicted.append((key,))
+            entries -= 1
+            size -= entry_size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+        with self._totals_lock:
+            self._entries, self._bytes = entries, size
+
+    def clear(self, **kwargs: Any):
+        with self._conn as conn:
+            conn.execute("DELETE FROM llm_cache")
+            with self._totals_lock:
+                self._entries, self._bytes = 0, 0
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm_cache(path: str, max_entries: int, max_bytes: int) -> SqliteLLMCache:
+    """Shared cache for a database path and limits."""
+    return SqliteLLMCache(path, max_entries=max_entries, max_bytes=max_bytes)
+
+
+_CACHED_MODELS: dict[tuple[int, int], tuple[BaseChatModel, BaseChatModel]] = {}
+_CACHED_MODELS_LOCK = threading.Lock()
+
+
+def with_llm_cache(
+    model: BaseChatModel,
+    site: str,
+    config: Optional[RunnableConfig] = None,
+) -> BaseChatModel:
+    """
+    Use the LLM cache for the calls of a call site, if enabled.
+
+    The cache is used when `llm_cache_path` is set, `site` is listed in
+    `llm_cache_sites` and the model runs at temperature 0, so that a cached
+    answer is the one the model would give.
+
+    Args:
+        model (BaseChatModel): The model used by the call site.
+        site (str): The call site, e.g. `profile`, `instructions` or `summary`.
+        config (Optional[RunnableConfig]): The run configuration.
+
+    Returns:
+        BaseChatModel: A copy of the model using the cache, or the model itself.
+    """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    sites = {s.strip() for s in configurable.llm_cache_sites.split(",")}
+    if not configurable.llm_cache_path or site not in sites:
+        return model
+    if getattr(model, "temperature", None) != 0:
+        return model
+
+    cache = get_llm_cache(
+        configurable.llm_cache_path,
+        configurable.llm_cache_max_entries,
+        configurable.llm_cache_max_bytes,
+    )
+    # Reuse the copy so that per-model memoization (bound tools) keeps working
+    key = (id(model), id(cache))
+    cached = _CACHED_MODELS.get(key)
+    if cached is not None and cached[0] is model:
+        return cached[1]
+    cached_model = model.model_copy(update={"cache": cache})
+    with _CACHED_MODELS_LOCK:
+        _CACHED_MODELS[key] = (model, cached_model)
+    return cached_model
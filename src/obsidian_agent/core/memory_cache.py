@@ -0,0 +1,124 @@
+# obsidian_agent/core/memory_cache.py
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from langgraph.store.base import BaseStore, Item
+
+from obsidian_agent.utils.metrics import CACHE_REQUESTS, METRICS
+
+
+@dataclass
+class _CacheEntry:
+    items: list[Item]
+    version: int
+    fetched_at: float
+
+
+class _StoreCache:
+    """Entries and invalidations of the namespaces of one store."""
+
+    def __init__(self):
+        self.entries: OrderedDict[tuple[str, ...], _CacheEntry] = OrderedDict()
+        # Counter value of the last invalidation of each namespace
+        self.versions: OrderedDict[tuple[str, ...], int] = OrderedDict()
+        # Stands in for the versions dropped from `versions`
+        self.floor = 0
+
+    def version(self, namespace: tuple[str, ...]) -> int:
+        return self.versions.get(namespace, self.floor)
+
+
+class MemoryCache:
+    """
+    Read-through cache for the small per-user memory namespaces.
+
+    Entries are kept per store, which is referenced weakly so a collected
+    store takes its entries with it, and per namespace, e.g. ("profile",
+    user_id). Each entry is stamped with the namespace version at the time
+    of the read. Writers call `invalidate`, which bumps the version so that
+    neither the cached entry nor a read that was in flight during the write
+    is served again. Entries expire after `ttl_seconds` to pick up writes
+    made by other processes, and the least recently used ones are dropped
+    beyond `max_entries` per store.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = 300.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stores: weakref.WeakKeyDictionary[BaseStore, _StoreCache] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def search(self, store: BaseStore, namespace: tuple[str, ...]) -> list[Item]:
+        """Return `store.search(namespace)`, served from the cache when fresh."""
+        with self._lock:
+            cache = self._store_cache(store)
+            version = cache.version(namespace)
+            entry = cache.entries.get(namespace)
+            if entry is not None and entry.version == version and self._fresh(entry):
+                cache.entries.move_to_end(namespace)
+                self.hits += 1
+                METRICS.inc(CACHE_REQUESTS, cache="memory", result="hit")
+                return entry.items
+            self.misses += 1
+        METRICS.inc(CACHE_REQUESTS, cache="memory", result="miss")
+
+        items = store.search(namespace)
+
+        with self._lock:
+            cache = self._store_cache(store)
+            if cache.version(namespace) == version:
+                cache.entries[namespace] = _CacheEntry(items, version, time.monotonic())
+                cache.entries.move_to_end(namespace)
+                while len(cache.entries) > self.max_entries:
+                    cache.entries.popitem(last=False)
+        return items
+
+    def invalidate(self, store: BaseStore, namespace: tuple[str, ...]):
+        """Drop the cached entry for a namespace after it was written to."""
+        with self._lock:
+            cache = self._store_cache(store)
+            self._counter += 1
+            cache.versions[namespace] = self._counter
+            cache.versions.move_to_end(namespace)
+            cache.entries.pop(namespace, None)
+            while len(cache.versions) > self.max_entries:
+                # Reads that started before a dropped invalidation see a
+                # newer floor and are not cached, which is safe
+                _, dropped = cache.versions.popitem(last=False)
+                cache.floor = max(cache.floor, dropped)
+
+    def clear(self):
+        with self._lock:
+            self._stores = weakref.WeakKeyDictionary()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(cache.entries) for cache in self._stores.values())
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _store_cache(self, store: BaseStore) -> _StoreCache:
+        cache = self._stores.get(store)
+        if cache is None:
+            cache = self._stores[store] = _StoreCache()
+        return cache
+
+    def _fresh(self, entry: _CacheEntry) -> bool:
+        if self.ttl_seconds is None:
+            return True
+        return time.monotonic() - entry.fetched_at < self.ttl_seconds
+
+
+MEMORY_CACHE = MemoryCache()
@@ -0,0 +1,164 @@
+# obsidian_agent/core/memory_worker.py
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Hashable, Optional, Sequence
+
+from langchain_core.messages import AnyMessage
+
+logger = logging.getLogger(__name__)
+
+UpdateFn = Callable[[list[AnyMessage]], None]
+
+
+def merge_message_lists(
+    older: Sequence[AnyMessage], newer: Sequence[AnyMessage]
+) -> list[AnyMessage]:
+    """Union of two message lists by id, keeping order and the newer versions."""
+    newer_by_id = {m.id: m for m in newer}
+    merged = [newer_by_id.pop(m.id, m) for m in older]
+    return merged + [m for m in newer if m.id in newer_by_id]
+
+
+def messages_since(
+    messages: Sequence[AnyMessage], last_message_id: Optional[str]
+) -> list[AnyMessage]:
+    """
+    Return the messages that come after the message with `last_message_id`.
+
+    If the id is unknown (e.g. it belongs to another thread or was compacted
+    away) all messages are returned.
+    """
+    if last_message_id is not None:
+        for i, message in enumerate(messages):
+            if message.id == last_message_id:
+                return list(messages[i + 1 :])
+    return list(messages)
+
+
+@dataclass
+class _PendingUpdate:
+    messages: list[AnyMessage]
+    update_fn: UpdateFn
+    due: float
+    merged: int = field(default=0)
+
+
+class MemoryUpdateWorker:
+    """
+    Runs memory updates on a background thread.
+
+    Requests submitted under the same key within the debounce window are
+    merged into a single update that sees the union of their messages.
+    """
+
+    def __init__(self, debounce_seconds: float = 5.0):
+        self.debounce_seconds = debounce_seconds
+        self._pending: dict[Hashable, _PendingUpdate] = {}
+        self._running = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        key: Hashable,
+        messages: Sequence[AnyMessage],
+        update_fn: UpdateFn,
+        debounce_seconds: Optional[float] = None,
+    ) -> bool:
+        """
+        Schedule an update, merging it into a pending one for the same key.
+
+        Args:
+            key (Hashable): Identifies updates that can be merged, e.g.
+                ("profile", user_id, thread_id).
+            messages (Sequence[AnyMessage]): The messages to reflect on.
+            update_fn (UpdateFn): Called with the merged messages.
+            debounce_seconds (Optional[float]): Overrides the worker default.
+
+        Returns:
+            bool: True if the request was merged into a pending update.
+        """
+        delay = self.debounce_seconds if debounce_seconds is None else debounce_seconds
+        with self._cond:
+            self._ensure_thread()
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.messages = merge_message_lists(pending.messages, messages)
+                pending.update_fn = update_fn
+                pending.merged += 1
+                return True
+            self._pending[key] = _PendingUpdate(
+                messages=list(messages),
+                update_fn=update_fn,
+                due=time.monotonic() + delay,
+            )
+            self._cond.notify_all()
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Run all pending updates now and wait for them to finish.
+
+        Returns:
+            bool: False if the timeout expired before the queue drained.
+        """
+        with self._cond:
+            for pending in self._pending.values():
+                pending.due = 0.0
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._running, timeout
+            )
+
+    @property
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="memory-update-worker", daemon=True
+            )
+            self._thread.start()
+
+    def _next_due(self) -> Optional[tuple[Hashable, _PendingUpdate]]:
+        now = time.monotonic()
+        for key, pending in self._pending.items():
+            if pending.due <= now:
+                return key, pending
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                due = self._next_due()
+                while due is None:
+                    timeout = (
+                        min(p.due for p in self._pending.values()) - time.monotonic()
+                        if self._pending
+                        else None
+                    )
+                    self._cond.wait(timeout)
+                    due = self._next_due()
+                key, pending = due
+                del self._pending[key]
+                self._running += 1
+
+            try:
+                pending.update_fn(pending.messages)
+                if pending.merged:
+                    logger.info(
+                        "Memory update %s merged %d requests", key, pending.merged + 1
+                    )
+            except Exception:
+                logger.exception("Memory update %s failed", key)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+
+MEMORY_WORKER = MemoryUpdateWorker()
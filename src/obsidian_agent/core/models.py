@@ -4,11 +4,14 @@ from typing import Annotated, Literal, Optional
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 from pydantic import BaseModel, Field
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 
 class GraphState(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
+    summary: NotRequired[str]
+    # Tool call ids of the outputs that carried each note, by note text hash
+    sent_notes: NotRequired[dict[str, str]]
 
 
 @dataclass
@@ -36,6 +39,45 @@ class ReadNote(BaseModel):
 
     note_name: str = Field(description="The name of the note to read")
     depth: int = Field(default=0, description="The depth of linked notes to read")
+    cursor: Optional[str] = Field(
+        default=None,
+        description="The cursor given at the end of a previous ReadNote output, "
+        "to read its next page",
+    )
+
+
+class EditNote(BaseModel):
+    """Edit an existing note of the library."""
+
+    note_name: str = Field(description="The name of the note to edit")
+    operation: Literal["append", "replace_section", "insert_under_heading", "patch"] = (
+        Field(
+            description="append: add text at the end of the note, "
+            "replace_section: replace the content of a section, "
+            "insert_under_heading: add text at the end of a section, "
+            "patch: replace an exact piece of the note"
+        )
+    )
+    text: str = Field(description="The text to add or the replacement text")
+    section: Optional[str] = Field(
+        default=None,
+        description="The heading of the section, for replace_section and insert_under_heading",
+    )
+    find: Optional[str] = Field(
+        default=None,
+        description="For patch, the exact text to replace, it must occur once in the note",
+    )
+
+
+class GrepNotes(BaseModel):
+    """Find the lines of notes containing an exact phrase or matching a regex."""
+
+    pattern: str = Field(description="The exact text or the regex to search for")
+    regex: bool = Field(
+        default=False, description="Whether the pattern is a Python regex"
+    )
+    ignore_case: bool = Field(default=False, description="Whether to ignore case")
+    page: int = Field(default=1, description="The page of results to return")
 
 
 class UpdateMemory(BaseModel):
@@ -52,6 +94,12 @@ class GetURLContent(BaseModel):
     url: str = Field(description="The URL to get content from")
 
 
+class IngestURLs(BaseModel):
+    """Summarize web pages into new notes of the library."""
+
+    urls: list[str] = Field(description="The URLs of the pages to save as notes")
+
+
 class Profile(BaseModel):
     """This is the profile of the user you are chatting with"""
 
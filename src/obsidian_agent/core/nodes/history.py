@@ -0,0 +1,62 @@
+# obsidian_agent/core/nodes/history.py
+from langchain_core.messages import HumanMessage, RemoveMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.store.base import BaseStore
+
+import obsidian_agent.core.configuration as configuration
+from obsidian_agent.core.history import (
+    apply_replacements,
+    estimate_tokens,
+    evict_tool_outputs,
+    find_summary_cut,
+    turn_starts,
+)
+from obsidian_agent.core.models import GraphState
+from obsidian_agent.core.routing import get_model
+
+SUMMARY_INSTRUCTION = """You are maintaining a running summary of a conversation between a user and their note assistant.
+
+Here is the summary of the conversation so far (may be empty):
+<summary>
+{summary}
+</summary>
+
+Extend the summary with the messages below. Keep facts the user shared, decisions made, notes that were read or created and any open requests. Be concise."""
+
+
+def compact_history_node(state: GraphState, config: RunnableConfig, store: BaseStore):
+    """Keep the conversation history within the configured token budget."""
+    configurable = configuration.Configuration.from_runnable_config(config)
+    token_budget = configurable.history_token_budget
+    keep_turns = configurable.history_keep_turns
+
+    messages = state["messages"]
+    if estimate_tokens(messages) <= token_budget:
+        return {}
+
+    # Replace tool outputs from before the most recent exchange with references
+    starts = turn_starts(messages)
+    keep_from = starts[-(keep_turns + 1)] if len(starts) > keep_turns else 0
+    replacements = evict_tool_outputs(messages, keep_from)
+    messages = apply_replacements(messages, replacements)
+
+    cut = None
+    if estimate_tokens(messages) > token_budget:
+        cut = find_summary_cut(messages, token_budget, keep_turns)
+    if cut is None:
+        return {"messages": replacements}
+
+    # Fold the oldest turns into the running summary
+    summary_msg = SUMMARY_INSTRUCTION.format(summary=state.get("summary", ""))
+    summary = get_model("summary", config).invoke(
+        [SystemMessage(content=summary_msg)]
+        + messages[:cut]
+        + [HumanMessage(content="Please return the updated summary.")]
+    )
+
+    removed_ids = {m.id for m in messages[:cut]}
+    return {
+        "summary": summary.content,
+        "messages": [RemoveMessage(id=m_id) for m_id in removed_ids]  # type: ignore
+        + [m for m in replacements if m.id not in removed_ids],
+    }
@@ -1,9 +1,52 @@
 # obsidian_agent/core/nodes/notes.py
+import asyncio
+from typing import Optional
+
 from langchain_core.runnables import RunnableConfig
 from langgraph.store.base import BaseStore
 
-from obsidian_agent.core.environment import LIBRARY
+import obsidian_agent.core.configuration as configuration
+from obsidian_agent.core.environment import get_library
+from obsidian_agent.core.history import dedupe_notes
+from obsidian_agent.core.ingest import format_results, ingest_urls
 from obsidian_agent.core.models import GraphState, Note, SearchNotes
+from obsidian_agent.core.pagination import (
+    READ_CURSORS,
+    NotePiece,
+    outline,
+    split_note,
+    take_page,
+)
+from obsidian_agent.core.routing import get_model
+from obsidian_agent.utils.fetch import get_fetcher
+from obsidian_agent.utils.obsidian import ObsidianLibrary
+
+
+def send_notes(
+    state: GraphState,
+    config: RunnableConfig,
+    notes: list[tuple[str, str]],
+    tool_call_id: str,
+) -> tuple[list[str], dict]:
+    """
+    Texts of notes for a tool output, without the ones the model already has.
+
+    Args:
+        state (GraphState): The graph state.
+        config (RunnableConfig): The run configuration.
+        notes (list[tuple[str, str]]): Names and texts of the notes.
+        tool_call_id (str): The id of the tool call.
+
+    Returns:
+        tuple[list[str], dict]: The texts to send, and the state update.
+    """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    if not configurable.history_dedup_notes:
+        return [text for _, text in notes], {}
+    texts, sent_notes = dedupe_notes(
+        state["messages"], state.get("sent_notes", {}), notes, tool_call_id
+    )
+    return texts, {"sent_notes": sent_notes}
 
 
 def search_notes_node(state: GraphState, config: RunnableConfig, store: BaseStore):
@@ -11,14 +54,18 @@ def search_notes_node(state: GraphState, config: RunnableConfig, store: BaseStor
     keywords = tool_call["args"]["keywords"]
     k = tool_call["args"].get("k", SearchNotes.model_fields["k"].default)
     k = int(k)
-    results = LIBRARY.search_notes(keywords, k)
+    results = get_library(config).search_notes(keywords, k)
     content = [
         Note(name=doc.metadata["path"].name, text=doc.page_content) for doc in results
     ]
 
-    str_content = "\n---------------\n".join(
-        [f"NOTENAME: {note.name}\n {note.text}" for note in content]
+    texts, update = send_notes(
+        state,
+        config,
+        [(note.name, f"NOTENAME: {note.name}\n {note.text}") for note in content],
+        tool_call["id"],
     )
+    str_content = "\n---------------\n".join(texts)
 
     return {
         "messages": [
@@ -27,6 +74,49 @@ def search_notes_node(state: GraphState, config: RunnableConfig, store: BaseStor
                 "content": str_content,
                 "tool_call_id": tool_call["id"],
             }
+        ],
+        **update,
+    }
+
+
+GREP_PAGE_SIZE = 50
+GREP_MAX_LINE = 300
+
+
+def grep_notes_node(state: GraphState, config: RunnableConfig, store: BaseStore):
+    tool_call = state["messages"][-1].tool_calls[0]  # type: ignore
+    args = tool_call["args"]
+    pattern = args["pattern"]
+    page = max(int(args.get("page", 1)), 1)
+
+    try:
+        matches, more = get_library(config).grep_notes(
+            pattern,
+            regex=bool(args.get("regex", False)),
+            ignore_case=bool(args.get("ignore_case", False)),
+            offset=(page - 1) * GREP_PAGE_SIZE,
+            limit=GREP_PAGE_SIZE,
+        )
+    except ValueError as e:
+        content = str(e)
+    else:
+        lines = [
+            f"{match.note_name}:{match.line_number}: {match.line[:GREP_MAX_LINE]}"
+            for match in matches
+        ]
+        if not lines:
+            lines = [f"No lines matching '{pattern}' on page {page}."]
+        if more:
+            lines.append(f"More matches on page {page + 1}.")
+        content = "\n".join(lines)
+
+    return {
+        "messages": [
+            {
+                "role": "tool",
+                "content": content,
+                "tool_call_id": tool_call["id"],
+            }
         ]
     }
 
@@ -39,7 +129,7 @@ def create_note_node(state: GraphState, config: RunnableConfig, store: BaseStore
     note_text = tool_call["args"]["note_text"]
 
     try:
-        LIBRARY.put_note(note_name, note_text)
+        get_library(config).put_notes({note_name: note_text})
         content = f"Note: {note_name} has been created."
     except FileExistsError as e:
         content = str(e)
@@ -55,18 +145,196 @@ def create_note_node(state: GraphState, config: RunnableConfig, store: BaseStore
     }
 
 
-def read_notes_node(state: GraphState, config: RunnableConfig, store: BaseStore):
+def edit_note_node(state: GraphState, config: RunnableConfig, store: BaseStore):
     tool_call = state["messages"][-1].tool_calls[0]  # type: ignore
-    note_name = tool_call["args"]["note_name"]
-    depth = tool_call["args"].get("depth", 0)
+    args = tool_call["args"]
+    note_name = args["note_name"]
 
+    library = get_library(config)
     try:
-        content = LIBRARY.get_note_with_context(note_name, depth)
-    except (ValueError, FileNotFoundError) as e:
+        library.edit_note(
+            note_name,
+            args["operation"],
+            args.get("text", ""),
+            section=args.get("section"),
+            find=args.get("find"),
+        )
+        content = f"Note: {note_name} has been edited."
+    except FileNotFoundError:
+        # Edits never go to a guessed note, the model has to confirm it
+        resolved, content = resolve_note_name(library, note_name)
+        if resolved is not None:
+            content = f"Note '{note_name}' not found. Did you mean '{resolved}'?"
+    except ValueError as e:
         content = str(e)
 
+    return {
+        "messages": [
+            {
+                "role": "tool",
+                "content": content,
+                "tool_call_id": tool_call["id"],
+            }
+        ]
+    }
+
+
+def resolve_note_name(
+    library: ObsidianLibrary, note_name: str
+) -> tuple[Optional[str], str]:
+    """
+    Resolve a note name matching no note, keeping a `#section` suffix.
+
+    Args:
+        library (ObsidianLibrary): The library.
+        note_name (str): The requested note name.
+
+    Returns:
+        tuple[Optional[str], str]: The resolved note name or None, and a
+            message for the model naming the note used or the closest notes.
+    """
+    name, separator, section = note_name.removesuffix(".md").partition("#")
+    resolved, matches = library.resolve_note_name(name)
+    if resolved is not None:
+        return (
+            resolved + separator + section,
+            f"Note '{name}' not found, reading '{resolved}' instead.",
+        )
+    if not matches:
+        return None, f"Note '{name}' not found."
+    closest = ", ".join(
+        f"'{m.note_name}'" + (f" (alias '{m.alias}')" if m.alias else "")
+        for m in matches
+    )
+    return None, f"Note '{name}' not found. Did you mean one of {closest}?"
+
+
+def _read_notes(
+    library: ObsidianLibrary, note_name: str, depth: int
+) -> tuple[str, list[tuple[str, str]]]:
+    """Read a note with its linked notes, resolving a misspelled name."""
+    message, notes = "", []
+    try:
+        notes = library.get_notes_with_context(note_name, depth)
+    except FileNotFoundError:
+        resolved, message = resolve_note_name(library, note_name)
+        if resolved is not None:
+            try:
+                notes = library.get_notes_with_context(resolved, depth)
+            except (ValueError, FileNotFoundError) as e:
+                message = str(e)
+    except ValueError as e:
+        message = str(e)
+    return message, notes
+
+
+def _join_pieces(pieces: list[NotePiece], texts: list[str]) -> str:
+    """Join the texts of pieces, separating notes by a blank line."""
+    content = ""
+    for i, (piece, text) in enumerate(zip(pieces, texts)):
+        if i and piece.note_name != pieces[i - 1].note_name:
+            content += "\n\n"
+        elif i and not content.endswith("\n"):
+            content += "\n"
+        content += text
+    return content
+
+
+def read_notes_node(state: GraphState, config: RunnableConfig, store: BaseStore):
+    tool_call = state["messages"][-1].tool_calls[0]  # type: ignore
+    args = tool_call["args"]
+    cursor = args.get("cursor")
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    page_chars = configurable.read_note_page_chars
+    # Cursors belong to a thread, runs without one get no cursors
+    thread_id = (config.get("configurable") or {}).get("thread_id")
+    thread_id = str(thread_id) if thread_id else None
+
+    if cursor:
+        message = ""
+        stored = READ_CURSORS.get(thread_id, cursor) if thread_id else None
+        if stored is None:
+            message = (
+                f"Cursor '{cursor}' is unknown or expired, "
+                "call ReadNote with the note name instead."
+            )
+            pieces, start = (), 0
+        else:
+            pieces, start = stored
+    else:
+        message, notes = _read_notes(
+            get_library(config), args["note_name"], args.get("depth", 0)
+        )
+        # Split once, following pages are served from the cursor
+        pieces = tuple(
+            piece
+            for name, text in notes
+            for piece in split_note(name, text, page_chars)
+        )
+        start = 0
+
+    update: dict = {}
+    page_content = ""
+    if pieces:
+        page, end = take_page(pieces, start, page_chars)
+        texts, update = send_notes(
+            state,
+            config,
+            [(piece.note_name, piece.text) for piece in page],
+            tool_call["id"],
+        )
+        page_content = _join_pieces(page, texts)
+        if end < len(pieces):
+            if thread_id:
+                next_cursor = READ_CURSORS.create(thread_id, pieces, end)
+                hint = (
+                    f"Call ReadNote with cursor '{next_cursor}' to read the next page."
+                )
+            else:
+                hint = "Call ReadNote with 'note name#section' to read a section."
+            page_content += (
+                "\n\n[The output continues, not read yet:\n"
+                f"{outline(pieces[end:])}\n{hint}]"
+            )
+    content = "\n".join(part for part in (message, page_content) if part)
+
     return {
         "messages": [
             {"role": "tool", "content": content, "tool_call_id": tool_call["id"]}
+        ],
+        **update,
+    }
+
+
+async def ingest_urls_node(state: GraphState, config: RunnableConfig, store: BaseStore):
+    tool_call = state["messages"][-1].tool_calls[0]  # type: ignore
+    urls = tool_call["args"]["urls"]
+
+    configurable = configuration.Configuration.from_runnable_config(config)
+    fetcher = get_fetcher(
+        configurable.fetch_cache_dir,
+        configurable.fetch_cache_ttl,
+        configurable.fetch_timeout,
+    )
+    # Loading a vault blocks, keep it off the event loop
+    library = await asyncio.to_thread(get_library, config)
+    results = await ingest_urls(
+        urls,
+        library,
+        get_model("ingest", config),
+        fetcher,
+        max_fetches=configurable.ingest_max_fetches,
+        max_per_host=configurable.ingest_max_per_host,
+        max_llm_calls=configurable.ingest_max_llm_calls,
+    )
+
+    return {
+        "messages": [
+            {
+                "role": "tool",
+                "content": format_results(results),
+                "tool_call_id": tool_call["id"],
+            }
         ]
     }
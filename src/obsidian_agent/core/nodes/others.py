@@ -1,14 +1,27 @@
+import requests
 from langchain_core.runnables import RunnableConfig
 from langgraph.store.base import BaseStore
 
+import obsidian_agent.core.configuration as configuration
 from obsidian_agent.core.models import GraphState
-from obsidian_agent.core.tools import scrape_page_jina
+from obsidian_agent.utils.fetch import get_fetcher
 
 
 def get_url_content_node(state: GraphState, config: RunnableConfig, store: BaseStore):
     tool_call = state["messages"][-1].tool_calls[0] # type: ignore
     url = tool_call["args"]["url"]
-    content = scrape_page_jina(url)
+
+    # Pages fetched before are served from the disk cache
+    configurable = configuration.Configuration.from_runnable_config(config)
+    fetcher = get_fetcher(
+        configurable.fetch_cache_dir,
+        configurable.fetch_cache_ttl,
+        configurable.fetch_timeout,
+    )
+    try:
+        content = fetcher.fetch(url)
+    except (requests.RequestException, ValueError) as e:
+        content = f"Failed to get the content of {url}: {e}"
 
     return {
         "messages": [
@@ -2,15 +2,23 @@
 import ast
 import uuid
 from datetime import datetime
+from typing import Callable, Optional
 
-from langchain_core.messages import HumanMessage, SystemMessage, merge_message_runs
+from langchain_core.messages import (
+    AnyMessage,
+    HumanMessage,
+    SystemMessage,
+    merge_message_runs,
+)
 from langchain_core.runnables import RunnableConfig
 from langgraph.store.base import BaseStore
 from trustcall import create_extractor
 
 import obsidian_agent.core.configuration as configuration
-from obsidian_agent.core.environment import model
+from obsidian_agent.core.memory_cache import MEMORY_CACHE
+from obsidian_agent.core.memory_worker import MEMORY_WORKER, messages_since
 from obsidian_agent.core.models import GraphState, Profile
+from obsidian_agent.core.routing import get_model
 
 TRUSTCALL_INSTRUCTION = """Reflect on following interaction.
 
@@ -32,18 +40,76 @@ Your current instructions are:
 {current_instructions}
 </current_instructions>"""
 
-# Create the Trustcall extractor for updating the user profile
-profile_extractor = create_extractor(
-    model,
-    tools=[Profile],
-    tool_choice="Profile",
-)
+# Create the Trustcall extractors for updating the user profile
+_PROFILE_EXTRACTORS: dict = {}
 
 
-def update_profile_node(state: GraphState, config: RunnableConfig, store: BaseStore):
-    """Reflect on the chat history and update the memory collection."""
-    configurable = configuration.Configuration.from_runnable_config(config)
-    user_id = configurable.user_id
+def _profile_extractor_for(llm):
+    """Trustcall extractor for a model, built once per model."""
+    cached = _PROFILE_EXTRACTORS.get(id(llm))
+    if cached is None or cached[0] is not llm:
+        cached = (llm, create_extractor(llm, tools=[Profile], tool_choice="Profile"))
+        _PROFILE_EXTRACTORS[id(llm)] = cached
+    return cached[1]
+
+
+def __getattr__(name: str):
+    # Trustcall extractor of the default profile model, created on first use
+    if name == "profile_extractor":
+        return _profile_extractor_for(get_model("profile"))
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+MEMORY_CURSOR_NAMESPACE = "memory_cursor"
+
+
+def _thread_id(config: Optional[RunnableConfig]) -> Optional[str]:
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    return str(thread_id) if thread_id else None
+
+
+def _unprocessed_messages(
+    store: BaseStore,
+    user_id: str,
+    thread_id: Optional[str],
+    update_type: str,
+    messages: list[AnyMessage],
+) -> list[AnyMessage]:
+    """Messages of a thread added since its last update of the given type."""
+    # Cursors belong to a thread, runs without one process all their messages
+    if not thread_id:
+        return list(messages)
+    cursor = store.get((MEMORY_CURSOR_NAMESPACE, user_id, thread_id), update_type)
+    last_message_id = cursor.value["last_message_id"] if cursor else None
+    return messages_since(messages, last_message_id)
+
+
+def _save_cursor(
+    store: BaseStore,
+    user_id: str,
+    thread_id: Optional[str],
+    update_type: str,
+    messages: list[AnyMessage],
+):
+    if messages and thread_id:
+        store.put(
+            (MEMORY_CURSOR_NAMESPACE, user_id, thread_id),
+            update_type,
+            {"last_message_id": messages[-1].id},
+        )
+
+
+def extract_profile(
+    messages: list[AnyMessage],
+    user_id: str,
+    store: BaseStore,
+    config: Optional[RunnableConfig] = None,
+):
+    """Reflect on the new messages and update the user profile in the store."""
+    thread_id = _thread_id(config)
+    messages = _unprocessed_messages(store, user_id, thread_id, "profile", messages)
+    if not messages:
+        return
 
     # Define the namespace for the memories
     namespace = ("profile", user_id)
@@ -62,19 +128,20 @@ def update_profile_node(state: GraphState, config: RunnableConfig, store: BaseSt
         else None
     )
 
-    # Merge the chat history and the instruction
+    # Merge the chat history and the instruction, the time is given with day
+    # precision so that replayed extractions produce an identical prompt
     TRUSTCALL_INSTRUCTION_FORMATTED = TRUSTCALL_INSTRUCTION.format(
-        time=datetime.now().isoformat()
+        time=datetime.now().date().isoformat()
     )
     updated_messages = list(
         merge_message_runs(
-            messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)]
-            + state["messages"][:-1]
+            messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + messages
         )
     )
 
     # Invoke the extractor
-    result = profile_extractor.invoke(
+    extractor = _profile_extractor_for(get_model("profile", config))
+    result = extractor.invoke(
         {"messages": updated_messages, "existing": existing_memories}
     )
 
@@ -85,24 +152,23 @@ def update_profile_node(state: GraphState, config: RunnableConfig, store: BaseSt
             rmeta.get("json_doc_id", str(uuid.uuid4())),
             r.model_dump(mode="json"),
         )
-    tool_calls = state["messages"][-1].tool_calls  # type: ignore
-    return {
-        "messages": [
-            {
-                "role": "tool",
-                "content": "updated profile",
-                "tool_call_id": tool_calls[0]["id"],
-            }
-        ]
-    }
+    MEMORY_CACHE.invalidate(store, namespace)
+    _save_cursor(store, user_id, thread_id, "profile", messages)
 
 
-def update_instructions_node(
-    state: GraphState, config: RunnableConfig, store: BaseStore
+def rewrite_instructions(
+    messages: list[AnyMessage],
+    user_id: str,
+    store: BaseStore,
+    config: Optional[RunnableConfig] = None,
 ):
-    """Reflect on the chat history and update the memory collection."""
-    configurable = configuration.Configuration.from_runnable_config(config)
-    user_id = configurable.user_id
+    """Reflect on the new messages and rewrite the note creation instructions."""
+    thread_id = _thread_id(config)
+    messages = _unprocessed_messages(
+        store, user_id, thread_id, "instructions", messages
+    )
+    if not messages:
+        return
 
     namespace = ("instructions", user_id)
     existing_memory = store.get(namespace, "user_instructions")
@@ -111,9 +177,9 @@ def update_instructions_node(
     system_msg = CREATE_INSTRUCTIONS.format(
         current_instructions=existing_memory.value if existing_memory else None
     )
-    new_memory = model.invoke(
+    new_memory = get_model("instructions", config).invoke(
         [SystemMessage(content=system_msg)]
-        + state["messages"][:-1]
+        + messages
         + [
             HumanMessage(
                 content="Please update the instructions based on the conversation. Return just new instructions."
@@ -132,13 +198,67 @@ def update_instructions_node(
     if isinstance(new_memory_content, dict):
         new_memory_content = new_memory_content["memory"]
     store.put(namespace, key, {"memory": new_memory_content})
+    MEMORY_CACHE.invalidate(store, namespace)
+    _save_cursor(store, user_id, thread_id, "instructions", messages)
+
 
+def _schedule_memory_update(
+    update_type: str,
+    update_fn: Callable[
+        [list[AnyMessage], str, BaseStore, Optional[RunnableConfig]], None
+    ],
+    state: GraphState,
+    config: RunnableConfig,
+    store: BaseStore,
+) -> str:
+    """Run the update in the background, or inline if configured so."""
+    configurable = configuration.Configuration.from_runnable_config(config)
+    user_id = configurable.user_id
+    # The last message is the assistant's tool call
+    messages = state["messages"][:-1]
+
+    if configurable.memory_update_mode == "sync":
+        update_fn(messages, user_id, store, config)
+        return f"updated {update_type}"
+
+    # Messages of different threads are never merged into one update
+    MEMORY_WORKER.submit(
+        (update_type, user_id, _thread_id(config)),
+        messages,
+        lambda merged: update_fn(merged, user_id, store, config),
+        debounce_seconds=configurable.memory_update_debounce,
+    )
+    return f"{update_type} update scheduled"
+
+
+def update_profile_node(state: GraphState, config: RunnableConfig, store: BaseStore):
+    """Schedule an update of the user profile based on the chat history."""
+    content = _schedule_memory_update("profile", extract_profile, state, config, store)
+    tool_calls = state["messages"][-1].tool_calls  # type: ignore
+    return {
+        "messages": [
+            {
+                "role": "tool",
+                "content": content,
+                "tool_call_id": tool_calls[0]["id"],
+            }
+        ]
+    }
+
+
+def update_instructions_node(
+    state: GraphState, config: RunnableConfig, store: BaseStore
+):
+    """Schedule an update of the note creation instructions."""
+    content = _schedule_memory_update(
+        "instructions", rewrite_instructions, state, config, store
+    )
     tool_calls = state["messages"][-1].tool_calls  # type: ignore
     return {
         "messages": [
             {
                 "role": "tool",
-                "content": "updated instructions",
+                "content": content,
                 "tool_call_id": tool_calls[0]["id"],
             }
         ]
@@ -1,21 +1,43 @@
+import asyncio
+import inspect
+from typing import Callable
+
 from langchain_core.runnables import RunnableConfig
-from langgraph.store.base import BaseStore
+from langchain_core.runnables.config import run_in_executor
+from langgraph.config import get_store
 
 from obsidian_agent.core.models import GraphState
 from obsidian_agent.core.nodes.notes import (
     create_note_node,
+    edit_note_node,
+    grep_notes_node,
+    ingest_urls_node,
     read_notes_node,
     search_notes_node,
 )
+from obsidian_agent.core.nodes.others import get_url_content_node
 from obsidian_agent.core.nodes.profile import (
     update_instructions_node,
     update_profile_node,
 )
+from obsidian_agent.utils.metrics import METRICS, TOOL_SECONDS
+from obsidian_agent.utils.profiling import profiled
+
+TOOL_NODES: dict[str, Callable] = {
+    "SearchNotes": search_notes_node,
+    "GrepNotes": grep_notes_node,
+    "ReadNote": read_notes_node,
+    "CreateNote": create_note_node,
+    "EditNote": edit_note_node,
+    "UpdateProfile": update_profile_node,
+    "UpdateInstructions": update_instructions_node,
+    "GetURLContent": get_url_content_node,
+    "IngestURLs": ingest_urls_node,
+}
 
-from obsidian_agent.core.nodes.others import get_url_content_node
 
-def tools_node(state: GraphState, config: RunnableConfig, store: BaseStore):
-    tool_call = state["messages"][-1].tool_calls[0] # type: ignore
+def _select_tool(state: GraphState) -> tuple[str, Callable]:
+    tool_call = state["messages"][-1].tool_calls[0]  # type: ignore
     tool_name = tool_call["name"]
 
     # If UpdateMemory tool is called, we need to determine which tool to call
@@ -25,16 +47,37 @@ def tools_node(state: GraphState, config: RunnableConfig, store: BaseStore):
         elif tool_call["args"]["update_type"] == "instructions":
             tool_name = "UpdateInstructions"
 
-    tool_map = {
-        "SearchNotes": lambda: search_notes_node(state, config, store),
-        "ReadNote": lambda: read_notes_node(state, config, store),
-        "CreateNote": lambda: create_note_node(state, config, store),
-        "UpdateProfile": lambda: update_profile_node(state, config, store),
-        "UpdateInstructions": lambda: update_instructions_node(state, config, store),
-        "GetURLContent": lambda: get_url_content_node(state, config, store),
-    }
-
-    if tool_name not in tool_map:
+    if tool_name not in TOOL_NODES:
         raise ValueError(f"Unknown tool: {tool_name}")
-        
-    return tool_map[tool_name]()
\ No newline at end of file
+    return tool_name, TOOL_NODES[tool_name]
+
+
+def _run_sync(tool_name: str, node: Callable, *args):
+    with profiled("tools", tool_name):
+        return node(*args)
+
+
+def tools_node(state: GraphState, config: RunnableConfig):
+    """Run the tool called by the last message, for sync runs of the graph."""
+    tool_name, node = _select_tool(state)
+    args = (state, config, get_store())
+
+    with METRICS.time(TOOL_SECONDS, tool=tool_name):
+        if inspect.iscoroutinefunction(node):
+            # A sync run has no event loop to await the tool on
+            with profiled("tools", tool_name):
+                return asyncio.run(node(*args))
+        return _run_sync(tool_name, node, *args)
+
+
+async def atools_node(state: GraphState, config: RunnableConfig):
+    """Run the tool called by the last message, for async runs of the graph."""
+    tool_name, node = _select_tool(state)
+    args = (state, config, get_store())
+
+    with METRICS.time(TOOL_SECONDS, tool=tool_name):
+        if inspect.iscoroutinefunction(node):
+            with profiled("tools", tool_name):
+                return await node(*args)
+        # Sync tools block, they run in the executor like sync nodes
+        return await run_in_executor(config, _run_sync, tool_name, node, *args)
@@ -0,0 +1,204 @@
+# obsidian_agent/core/pagination.py
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from obsidian_agent.utils.obsidian import HEADING
+
+
+@dataclass(frozen=True)
+class NotePiece:
+    """A part of a note small enough for one page."""
+
+    note_name: str
+    text: str
+    headings: tuple[str, ...]
+
+
+def _hard_split(text: str, max_chars: int) -> list[str]:
+    """Split text into parts of at most `max_chars`, at line ends when possible."""
+    parts = []
+    while len(text) > max_chars:
+        cut = text.rfind("\n", 0, max_chars) + 1 or max_chars
+        parts.append(text[:cut])
+        text = text[cut:]
+    if text:
+        parts.append(text)
+    return parts
+
+
+def split_note(note_name: str, text: str, max_chars: int) -> list[NotePiece]:
+    """
+    Split a note into pieces of at most `max_chars`, at section boundaries.
+
+    Consecutive sections are packed together while they fit, a section
+    longer than `max_chars` is split at line ends.
+
+    Args:
+        note_name (str): The name of the note.
+        text (str): The note content.
+        max_chars (int): The maximum length of a piece.
+
+    Returns:
+        list[NotePiece]: The pieces, in order.
+    """
+    if len(text) <= max_chars:
+        headings = tuple(m.group(2) for m in HEADING.finditer(text))
+        return [NotePiece(note_name, text, headings)]
+
+    starts = [0] + [m.start() for m in HEADING.finditer(text) if m.start() > 0]
+    sections = [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)])]
+
+    pieces: list[NotePiece] = []
+    current = ""
+    for section in sections:
+        for part in _hard_split(section, max_chars):
+            if current and len(current) + len(part) > max_chars:
+                pieces.append(_piece(note_name, current))
+                current = ""
+            current += part
+    if current:
+        pieces.append(_piece(note_name, current))
+    return pieces
+
+
+def _piece(note_name: str, text: str) -> NotePiece:
+    headings = tuple(m.group(2) for m in HEADING.finditer(text))
+    return NotePiece(note_name, text, headings)
+
+
+def take_page(
+    pieces: Sequence[NotePiece], start: int, max_chars: int
+) -> tuple[list[NotePiece], int]:
+    """
+    Take the pieces of a page, always at least one.
+
+    Args:
+        pieces (Sequence[NotePiece]): All pieces of the read.
+        start (int): Index of the first piece of the page.
+        max_chars (int): The maximum length of the page.
+
+    Returns:
+        tuple[list[NotePiece], int]: The pieces of the page and the index of
+            the first piece of the next page.
+    """
+    end = start + 1
+    size = len(pieces[start].text)
+    while end < len(pieces) and size + len(pieces[end].text) <= max_chars:
+        size += len(pieces[end].text)
+        end += 1
+    return list(pieces[start:end]), end
+
+
+def outline(pieces: Sequence[NotePiece]) -> str:
+    """
+    Outline of pieces, one line per note with its size and sections.
+
+    Args:
+        pieces (Sequence[NotePiece]): The pieces not read yet.
+
+    Returns:
+        str: The outline.
+    """
+    notes: dict[str, tuple[int, list[str]]] = {}
+    for piece in pieces:
+        size, headings = notes.get(piece.note_name, (0, []))
+        notes[piece.note_name] = (
+            size + len(piece.text),
+            headings + list(piece.headings),
+        )
+    lines = []
+    for note_name, (size, headings) in notes.items():
+        line = f"- {note_name} ({size} characters)"
+        if headings:
+            line += ": " + ", ".join(headings)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@dataclass
+class _Cursor:
+    thread_id: str
+    pieces: tuple[NotePiece, ...]
+    start: int
+    created_at: float
+
+
+class ReadCursors:
+    """
+    Server-side state of paginated reads, addressed by opaque cursors.
+
+    A cursor holds the pieces of a read computed once, and the position of
+    its next page. Each page gets a new cursor, so repeating a call returns
+    the same page. Cursors belong to the thread that created them, expire
+    after `ttl_seconds` and the least recently used ones are dropped beyond
+    `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._cursors: OrderedDict[str, _Cursor] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, thread_id: str, pieces: Sequence[NotePiece], start: int) -> str:
+        """
+        Store the rest of a read and return its cursor.
+
+        Args:
+            thread_id (str): The thread reading the notes.
+            pieces (Sequence[NotePiece]): All pieces of the read.
+            start (int): Index of the first piece of the next page.
+
+        Returns:
+            str: The cursor.
+        """
+        cursor = secrets.token_urlsafe(8)
+        entry = _Cursor(thread_id, tuple(pieces), start, time.monotonic())
+        with self._lock:
+            self._cursors[cursor] = entry
+            while len(self._cursors) > self.max_entries:
+                self._cursors.popitem(last=False)
+        return cursor
+
+    def get(
+        self, thread_id: str, cursor: str
+    ) -> Optional[tuple[tuple[NotePiece, ...], int]]:
+        """
+        The pieces and next page position of a cursor.
+
+        Args:
+            thread_id (str): The thread continuing the read.
+            cursor (str): The cursor.
+
+        Returns:
+            Optional[tuple[tuple[NotePiece, ...], int]]: The pieces and the
+                index of the next page, or None for an unknown, expired or
+                foreign cursor.
+        """
+        with self._lock:
+            entry = self._cursors.get(cursor)
+            if entry is None or entry.thread_id != thread_id:
+                return None
+            if (
+                self.ttl_seconds is not None
+                and time.monotonic() - entry.created_at >= self.ttl_seconds
+            ):
+                del self._cursors[cursor]
+                return None
+            self._cursors.move_to_end(cursor)
+            return entry.pieces, entry.start
+
+    def clear(self):
+        with self._lock:
+            self._cursors.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cursors)
+
+
+READ_CURSORS = ReadCursors()
@@ -0,0 +1,191 @@
+# obsidian_agent/core/prompts.py
+import logging
+import threading
+from typing import Any, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.runnables import Runnable
+
+logger = logging.getLogger(__name__)
+
+# Static part of the system prompt. It must not contain any per-user or
+# per-turn data so that providers can cache it as a prompt prefix.
+MODEL_SYSTEM_PREFIX = """{assistant_role}
+
+Your main task is to help the user with whatever he needs possibly using notes from their Obsidian Library.
+
+Obsidian notes follow Markdown syntax but introduce a few additional features. Each note can be linked to other notes, forming a network of knowledge.
+Links are created by wrapping the note's name in double brackets, like this: [[note name]].
+
+You have a long term memory which keeps track of three things:
+1. The user's profile (general information about them)
+2. The user's personal note library
+3. General instructions for creating new notes
+
+The current user profile and note creation preferences are given at the end of this message.
+
+Here are your instructions for reasoning about the user's messages:
+
+1. You are a helpful user's assistant. You have access to user's notes, which are fully in their ownership, therefore they can ask you to utilize them in whatever form they want. For example to create a report for them using multiple notes etc.. You can also utilize your own knowledge if the user asks for it. For example if there is a name mentioned in the notes and user asks for details, use your own knowledge to provide the information. Reason carefully about the user's messages as presented below.
+
+2. Available tools:
+2a. Decide whether any of the your long-term memory should be updated:
+    - If personal information was provided about the user, update the user's profile by calling UpdateMemory tool with type `user`
+2b. Decide if the new note should be created as demanded by the user
+    - If user asks you to create new note, create it by using CreateNote tool with type `new_note`
+    - If the user has specified preferences for how to create new notes, update the instructions by calling UpdateMemory tool with type `instructions`
+2c. Decide if the user wants to read a note or search through notes
+    - If the user asks you to read a note, read it by calling ReadNote tool with the note name (from the user) and the depth of how many linked notes to read (usually from 0-3, default 0). Misspelled note names are resolved, or the closest notes are listed so you can pick one. Long outputs are split into pages, ending with an outline of the rest and a cursor: call ReadNote with that cursor only if you need the rest
+    - If the user asks you to search notes, search it by calling SearchNotes tool with the keywords and the number of notes to return (default 5)
+    - If the user asks for notes containing an exact phrase, word or pattern (e.g. a tag, a TODO marker or a code symbol), find the matching lines by calling GrepNotes tool with the text, or with a regex and `regex` set. Ask for the next page only if the user needs more matches
+    - If the user asks you to change an existing note, edit it by calling EditNote tool: `append` adds text at the end, `replace_section` replaces the content of the section with the given heading, `insert_under_heading` adds text at the end of that section and `patch` replaces an exact piece of text (`find`) that occurs once in the note. Read the note first if you need its current content.
+2d. User can ask you to summarize the content of a URL. If the user asks you to do so:
+   - First use the GetURLContent tool with the URL provided by the user
+   - Summarize the content that is returned
+   - Ask the user if they would like to create a note with this summary
+   - Only proceed with note creation using CreateNote tool after receiving explicit confirmation from the user
+   - If creating a note, suggest a meaningful title related to the content
+   - If the user asks to save several URLs as notes at once, call the IngestURLs tool once with all of them instead
+
+IMPORTANT: Call only one tool at a time. Wait for the tool's response before making another tool call.
+
+3. Tell the user that you have updated your memory, if appropriate:
+- Do not tell the user you have updated the user's profile
+- Tell the user them when you have created a new note
+- Tell the user that you have updated instructions
+
+4. Respond naturally to user user after a tool call was made to save memories, or if no tool call was made."""
+
+# Volatile part of the system prompt, appended after the static prefix.
+MODEL_SYSTEM_MEMORY = """
+
+Here is the current User Profile (may be empty if no information has been collected yet):
+<user_profile>
+{user_profile}
+</user_profile>
+
+
+Here are the current user-specified preferences for creating new notes (may be empty if no preferences have been specified yet):
+<instructions>
+{instructions}
+</instructions>"""
+
+MODEL_SYSTEM_SUMMARY = """
+
+Here is a summary of the earlier part of this conversation, which is no longer shown in full:
+<conversation_summary>
+{summary}
+</conversation_summary>"""
+
+
+# Used when web pages are ingested into the vault in bulk
+INGEST_INSTRUCTION = """You turn web pages into notes for an Obsidian vault.
+
+Write a concise Markdown note about the page given by the user. Start with a single `#` heading with a meaningful title, then summarize the key points and ideas. Do not add anything that is not in the page."""
+
+
+def build_system_message(
+    assistant_role: str,
+    user_profile: Any,
+    instructions: Any,
+    summary: Optional[str] = None,
+) -> SystemMessage:
+    """
+    Assemble the assistant system message.
+
+    The static prefix (role and tool instructions) comes first and is
+    byte-identical across turns and users with the same role, the volatile
+    memory section comes last.
+
+    Args:
+        assistant_role (str): The configured assistant role.
+        user_profile (Any): The stored user profile, or None.
+        instructions (Any): The stored note creation instructions.
+        summary (Optional[str]): Summary of compacted conversation turns.
+
+    Returns:
+        SystemMessage: The assembled system message.
+    """
+    prefix = MODEL_SYSTEM_PREFIX.format(assistant_role=assistant_role)
+    memory = MODEL_SYSTEM_MEMORY.format(
+        user_profile=user_profile, instructions=instructions
+    )
+    if summary:
+        memory += MODEL_SYSTEM_SUMMARY.format(summary=summary)
+    return SystemMessage(content=prefix + memory)
+
+
+_BOUND_MODELS: dict[tuple, tuple[BaseChatModel, Runnable]] = {}
+_BOUND_MODELS_LOCK = threading.Lock()
+
+
+def _tool_key(tool: Any) -> str:
+    return getattr(tool, "__name__", None) or getattr(tool, "name", None) or repr(tool)
+
+
+def bind_tools_cached(
+    model: BaseChatModel, tools: Sequence[Any], tool_choice: Optional[str] = "auto"
+) -> Runnable:
+    """
+    Bind tools to a model once per (model, tool set) and reuse the result.
+
+    Reusing the bound runnable keeps the serialized tool schemas identical
+    between turns and avoids rebuilding them on every call.
+
+    Args:
+        model (BaseChatModel): The chat model to bind the tools to.
+        tools (Sequence[Any]): Tool schemas, in the order they are sent.
+        tool_choice (Optional[str]): The tool choice passed to the provider.
+
+    Returns:
+        Runnable: The model with the tools bound.
+    """
+    key = (id(model), tuple(_tool_key(t) for t in tools), tool_choice)
+    cached = _BOUND_MODELS.get(key)
+    if cached is not None and cached[0] is model:
+        return cached[1]
+
+    bind_tools_kwargs: dict[str, Any] = {"tools": list(tools)}
+    if tool_choice is not None:
+        bind_tools_kwargs["tool_choice"] = tool_choice
+    if "OpenAI" in str(type(model)):
+        bind_tools_kwargs["parallel_tool_calls"] = False
+
+    bound = model.bind_tools(**bind_tools_kwargs)
+    with _BOUND_MODELS_LOCK:
+        _BOUND_MODELS[key] = (model, bound)
+    return bound
+
+
+def prompt_cache_usage(response: AIMessage) -> dict[str, int]:
+    """
+    Extract cached and uncached prompt token counts from a model response.
+
+    Args:
+        response (AIMessage): The response returned by the model.
+
+    Returns:
+        dict[str, int]: Counts under `prompt`, `cached` and `uncached`.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens", 0)
+    details = usage.get("input_token_details") or {}
+    cached_tokens = details.get("cache_read", 0) or 0
+    return {
+        "prompt": prompt_tokens,
+        "cached": cached_tokens,
+        "uncached": max(prompt_tokens - cached_tokens, 0),
+    }
+
+
+def log_prompt_cache_usage(response: AIMessage, node: str) -> dict[str, int]:
+    """Log the prompt cache usage of a response and return the counts."""
+    usage = prompt_cache_usage(response)
+    logger.info(
+        "%s prompt tokens: %d cached, %d uncached",
+        node,
+        usage["cached"],
+        usage["uncached"],
+    )
+    return usage
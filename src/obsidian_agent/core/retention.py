@@ -0,0 +1,279 @@
+# obsidian_agent/core/retention.py
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.memory import MemorySaver
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Limits for checkpoints kept in memory, a value of 0 disables the limit.
+
+    Attributes:
+        keep_last: Checkpoints kept per thread and namespace.
+        ttl_seconds: Threads idle for longer than this are dropped.
+        max_bytes: Cap on serialized checkpoint data, least recently used
+            threads are dropped first.
+    """
+
+    keep_last: int = 10
+    ttl_seconds: float = 24 * 60 * 60
+    max_bytes: int = 256 * 1024 * 1024
+
+
+@dataclass
+class _Owned:
+    payload: tuple[str, bytes]
+    size: int
+    digests: set[str]
+    thread_id: str
+
+
+class RetentionMemorySaver(MemorySaver):
+    """
+    MemorySaver that enforces a RetentionPolicy.
+
+    The policy is applied after every write. Reads and writes mark a thread as
+    recently used. `stats()` exposes counters for live threads, bytes held and
+    the number of evictions.
+
+    Sizes, channel versions and message body references of the stored
+    payloads are tracked as they are written, so applying the policy never
+    deserializes or scans the history. Unreferenced message bodies are
+    collected once per write, after pruning and eviction.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetentionPolicy] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.policy = policy or RetentionPolicy()
+        self.clock = clock
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        self._thread_bytes: dict[str, int] = {}
+        self._lock = threading.RLock()
+        # Payloads by owner key, with their size and referenced message bodies
+        self._owned: dict[tuple, _Owned] = {}
+        self._thread_owners: dict[str, set[tuple]] = {}
+        # Channel versions of each checkpoint, and how many checkpoints use them
+        self._checkpoint_versions: dict[tuple, set[tuple[str, Any]]] = {}
+        self._version_refs: Counter[tuple] = Counter()
+        # Message bodies referenced by live payloads, and their sizes
+        self._digest_refs: Counter[str] = Counter()
+        self._digest_bytes: dict[str, int] = {}
+        self._live_blob_bytes = 0
+        self._garbage = False
+        self.pruned_checkpoints = 0
+        self.expired_threads = 0
+        self.evicted_threads = 0
+
+    def get_tuple(self, config: RunnableConfig):
+        with self._lock:
+            self._touch(config["configurable"]["thread_id"])
+            return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ):
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"]["checkpoint_ns"]
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel, version)
+                self._track(("blob", *key), thread_id, [self.blobs[key]])
+            key = (thread_id, checkpoint_ns, checkpoint["id"])
+            self._track(
+                ("checkpoint", *key),
+                thread_id,
+                self.storage[thread_id][checkpoint_ns][key[2]][:2],
+            )
+            versions = {
+                (thread_id, checkpoint_ns, channel, version)
+                for channel, version in checkpoint["channel_versions"].items()
+            }
+            self._release_versions(key)
+            self._checkpoint_versions[key] = versions
+            self._version_refs.update(versions)
+            self._after_write(thread_id)
+        return next_config
+
+    def put_writes(self, config: RunnableConfig, *args: Any, **kwargs: Any):
+        with self._lock:
+            super().put_writes(config, *args, **kwargs)
+            configurable = config["configurable"]
+            thread_id = configurable["thread_id"]
+            key = (
+                thread_id,
+                configurable.get("checkpoint_ns", ""),
+                configurable["checkpoint_id"],
+            )
+            for inner_key, write in self.writes.get(key, {}).items():
+                owner = ("write", *key, *inner_key)
+                owned = self._owned.get(owner)
+                if owned is None or owned.payload is not write[2]:
+                    self._track(owner, thread_id, [write[2]])
+            self._after_write(thread_id)
+
+    def stats(self) -> dict[str, int]:
+        """Counters describing what the saver currently holds."""
+        with self._lock:
+            return {
+                "live_threads": len(self.storage),
+                "bytes_held": self.bytes_held,
+                "pruned_checkpoints": self.pruned_checkpoints,
+                "expired_threads": self.expired_threads,
+                "evicted_threads": self.evicted_threads,
+            }
+
+    @property
+    def bytes_held(self) -> int:
+        return sum(self._thread_bytes.values()) + self._live_blob_bytes
+
+    def drop_thread(self, thread_id: str):
+        """Remove all checkpoints, writes and channel values of a thread."""
+        with self._lock:
+            self.storage.pop(thread_id, None)
+            for key in [k for k in self.writes if k[0] == thread_id]:
+                del self.writes[key]
+            for key in [k for k in self.blobs if k[0] == thread_id]:
+                del self.blobs[key]
+            owners = self._thread_owners.pop(thread_id, set())
+            for owner in owners:
+                if owner[0] == "checkpoint":
+                    self._release_versions(owner[1:])
+            for owner in owners:
+                self._release(owner)
+            self._last_used.pop(thread_id, None)
+            self._thread_bytes.pop(thread_id, None)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete a thread, its tracked sizes and unreferenced message bodies."""
+        with self._lock:
+            self.drop_thread(thread_id)
+            if self._garbage:
+                self._collect_blobs()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
+
+    def _touch(self, thread_id: str):
+        with self._lock:
+            self._last_used[thread_id] = self.clock()
+            self._last_used.move_to_end(thread_id)
+
+    def _track(
+        self, owner: tuple, thread_id: str, payloads: Sequence[tuple[str, bytes]]
+    ):
+        """Record the size and message body references of an owner's payloads."""
+        if owner in self._owned:
+            self._release(owner)
+        referenced_digests = getattr(self.serde, "referenced_digests", None)
+        digests: set[str] = set()
+        if referenced_digests is not None:
+            for payload in payloads:
+                digests |= referenced_digests(payload)
+        size = sum(len(payload[1]) for payload in payloads)
+        self._owned[owner] = _Owned(payloads[0], size, digests, thread_id)
+        self._thread_owners.setdefault(thread_id, set()).add(owner)
+        self._thread_bytes[thread_id] = self._thread_bytes.get(thread_id, 0) + size
+        for digest in digests:
+            if not self._digest_refs[digest]:
+                self._digest_bytes[digest] = self._blob_size(digest)
+                self._live_blob_bytes += self._digest_bytes[digest]
+            self._digest_refs[digest] += 1
+
+    def _release(self, owner: tuple):
+        owned = self._owned.pop(owner, None)
+        if owned is None:
+            return
+        owners = self._thread_owners.get(owned.thread_id)
+        if owners is not None:
+            owners.discard(owner)
+        if owned.thread_id in self._thread_bytes:
+            self._thread_bytes[owned.thread_id] -= owned.size
+        for digest in owned.digests:
+            self._digest_refs[digest] -= 1
+            if not self._digest_refs[digest]:
+                del self._digest_refs[digest]
+                self._live_blob_bytes -= self._digest_bytes.pop(digest, 0)
+                self._garbage = True
+
+    def _release_versions(self, checkpoint_key: tuple):
+        """Drop the channel versions of a checkpoint, and the values no longer used."""
+        for key in self._checkpoint_versions.pop(checkpoint_key, ()):
+            self._version_refs[key] -= 1
+            if self._version_refs[key] <= 0:
+                del self._version_refs[key]
+                self.blobs.pop(key, None)
+                self._release(("blob", *key))
+
+    def _blob_size(self, digest: str) -> int:
+        blob_store = getattr(self.serde, "blob_store", None)
+        if blob_store is None or not hasattr(blob_store, "retain"):
+            return 0
+        return len(blob_store.get(digest) or b"")
+
+    def _after_write(self, thread_id: str):
+        self._touch(thread_id)
+        if self.policy.keep_last:
+            self._prune(thread_id)
+
+        if self.policy.ttl_seconds:
+            deadline = self.clock() - self.policy.ttl_seconds
+            expired = [
+                tid
+                for tid, last_used in self._last_used.items()
+                if last_used < deadline and tid != thread_id
+            ]
+            for tid in expired:
+                self.drop_thread(tid)
+                self.expired_threads += 1
+
+        if self.policy.max_bytes and self.bytes_held > self.policy.max_bytes:
+            # Sizes are tracked as payloads are released, so eviction stops
+            # as soon as the live data fits, before anything is collected
+            for tid in list(self._last_used):
+                if self.bytes_held <= self.policy.max_bytes or tid == thread_id:
+                    break
+                self.drop_thread(tid)
+                self.evicted_threads += 1
+
+        if self._garbage:
+            self._collect_blobs()
+
+    def _prune(self, thread_id: str):
+        for checkpoint_ns, checkpoints in self.storage.get(thread_id, {}).items():
+            if len(checkpoints) <= self.policy.keep_last:
+                continue
+            ordered = sorted(checkpoints)
+            for checkpoint_id in ordered[: -self.policy.keep_last]:
+                del checkpoints[checkpoint_id]
+                key = (thread_id, checkpoint_ns, checkpoint_id)
+                for inner_key in self.writes.pop(key, {}):
+                    self._release(("write", *key, *inner_key))
+                self._release(("checkpoint", *key))
+                self._release_versions(key)
+                self.pruned_checkpoints += 1
+
+    def _collect_blobs(self) -> bool:
+        """Free DedupSerializer message bodies no longer referenced by any thread."""
+        self._garbage = False
+        retain = getattr(self.serde, "retain", None)
+        if retain is None:
+            return False
+        return retain(set(self._digest_refs)) > 0
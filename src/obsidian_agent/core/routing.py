@@ -0,0 +1,160 @@
+# obsidian_agent/core/routing.py
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig
+
+import obsidian_agent.core.configuration as configuration
+from obsidian_agent.core.instrumentation import with_metrics
+from obsidian_agent.core.llm_cache import with_llm_cache
+
+# Roles a model can be routed to, each has a `<role>_model` configuration field
+ROLES = ("assistant", "profile", "instructions", "summary", "ingest")
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """
+    A model and its call settings.
+
+    Written as `name` or `name?timeout=30&max_retries=1&max_tokens=1024`.
+    """
+
+    name: str
+    timeout: Optional[float] = 60.0
+    max_retries: int = 2
+    max_tokens: Optional[int] = None
+    temperature: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "ModelSpec":
+        name, _, query = spec.strip().partition("?")
+        settings = dict(parse_qsl(query))
+        unknown = set(settings) - {
+            "timeout",
+            "max_retries",
+            "max_tokens",
+            "temperature",
+        }
+        if unknown:
+            raise ValueError(f"Unknown model settings {sorted(unknown)} in '{spec}'")
+        return cls(
+            name=name,
+            timeout=float(settings.get("timeout", cls.timeout)),
+            max_retries=int(settings.get("max_retries", cls.max_retries)),
+            max_tokens=int(settings["max_tokens"])
+            if "max_tokens" in settings
+            else None,
+            temperature=float(settings.get("temperature", cls.temperature)),
+        )
+
+
+def build_model(spec: ModelSpec) -> BaseChatModel:
+    """
+    Create the chat model of a spec, the provider is picked from the name.
+
+    Args:
+        spec (ModelSpec): The model and its settings.
+
+    Returns:
+        BaseChatModel: The chat model.
+    """
+    if spec.name.startswith(("gpt-", "o1", "o3", "o4")):
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=spec.name,
+            temperature=spec.temperature,
+            timeout=spec.timeout,
+            max_retries=spec.max_retries,
+            max_tokens=spec.max_tokens,
+        )
+    elif spec.name.startswith("gemini-"):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(
+            model=spec.name,
+            temperature=spec.temperature,
+            timeout=spec.timeout,
+            max_retries=spec.max_retries,
+            max_output_tokens=spec.max_tokens,
+        )
+    elif spec.name.startswith("claude-"):
+        from langchain_anthropic import ChatAnthropic
+
+        return ChatAnthropic(
+            model=spec.name,
+            temperature=spec.temperature,
+            timeout=spec.timeout,
+            max_retries=spec.max_retries,
+            max_tokens=spec.max_tokens or 4096,
+        )
+    raise ValueError(f"Unknown model name: {spec.name}")
+
+
+_MODELS: dict[ModelSpec, BaseChatModel] = {}
+_REGISTERED_MODELS: dict[str, BaseChatModel] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def register_model(name: str, model: Optional[BaseChatModel]):
+    """
+    Make a model instance available under a name usable in model specs.
+
+    Registered models take precedence over the providers, e.g. to run the
+    graph with a scripted model. Registering None removes the name.
+
+    Args:
+        name (str): The model name.
+        model (Optional[BaseChatModel]): The model, or None.
+    """
+    with _MODELS_LOCK:
+        if model is None:
+            _REGISTERED_MODELS.pop(name, None)
+        else:
+            _REGISTERED_MODELS[name] = model
+
+
+def model_for_spec(spec: ModelSpec) -> BaseChatModel:
+    """The shared model instance of a spec."""
+    with _MODELS_LOCK:
+        if spec.name in _REGISTERED_MODELS:
+            return _REGISTERED_MODELS[spec.name]
+        if spec not in _MODELS:
+            _MODELS[spec] = build_model(spec)
+        return _MODELS[spec]
+
+
+def default_model_spec() -> str:
+    model_name = os.getenv("MODEL_NAME")
+    if model_name is None:
+        raise ValueError("Please set the MODEL_NAME environment variable.")
+    return model_name
+
+
+def get_model(role: str, config: Optional[RunnableConfig] = None) -> BaseChatModel:
+    """
+    Get the model routed to a role.
+
+    The `<role>_model` configuration field, e.g. `summary_model`, selects the
+    model of a role and can be set per request or with an environment
+    variable. Roles without one use MODEL_NAME. The LLM cache is applied for
+    roles listed in `llm_cache_sites`.
+
+    Args:
+        role (str): One of ROLES.
+        config (Optional[RunnableConfig]): The run configuration.
+
+    Returns:
+        BaseChatModel: The model for the role.
+    """
+    if role not in ROLES:
+        raise ValueError(f"Unknown model role: {role}")
+    configurable = configuration.Configuration.from_runnable_config(config)
+    spec = getattr(configurable, f"{role}_model") or default_model_spec()
+    model = with_llm_cache(model_for_spec(ModelSpec.parse(spec)), role, config)
+    return with_metrics(model, role)
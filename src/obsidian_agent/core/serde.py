@@ -0,0 +1,206 @@
+# obsidian_agent/core/serde.py
+import hashlib
+import re
+import sqlite3
+import threading
+import zlib
+from typing import Any, Iterable, Optional, Protocol
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from obsidian_agent.core.sqlite_store import configure_connection
+
+# Message contents are replaced by this prefix followed by their sha256 digest
+BLOB_REF_PREFIX = "\x00blob:sha256:"
+DEDUP_TYPE_PREFIX = "dedup:"
+COMPRESSED_TYPE_PREFIX = "dedupz:"
+_BLOB_REF_PATTERN = re.compile(re.escape(BLOB_REF_PREFIX.encode()) + rb"([0-9a-f]{64})")
+
+
+class BlobStore(Protocol):
+    def get(self, digest: str) -> Optional[bytes]: ...
+
+    def put(self, digest: str, data: bytes): ...
+
+
+class MemoryBlobStore:
+    """Content-addressed blobs kept in a dict."""
+
+    def __init__(self):
+        self.blobs: dict[str, bytes] = {}
+
+    def get(self, digest: str) -> Optional[bytes]:
+        return self.blobs.get(digest)
+
+    def put(self, digest: str, data: bytes):
+        self.blobs.setdefault(digest, data)
+
+    def retain(self, digests: set[str]) -> int:
+        """Drop all blobs not in `digests` and return how many were dropped."""
+        dropped = [digest for digest in self.blobs if digest not in digests]
+        for digest in dropped:
+            del self.blobs[digest]
+        return len(dropped)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(blob) for blob in self.blobs.values())
+
+
+class SqliteBlobStore:
+    """Content-addressed blobs kept in a table of a SQLite database."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, data BLOB)"
+        )
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = configure_connection(
+                sqlite3.connect(self.path, check_same_thread=False)
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, digest: str) -> Optional[bytes]:
+        row = self._conn.execute(
+            "SELECT data FROM blobs WHERE digest = ?", (digest,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, digest: str, data: bytes):
+        with self._conn as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)",
+                (digest, data),
+            )
+
+
+class DedupSerializer(SerializerProtocol):
+    """
+    Checkpoint serializer that stores large message bodies once.
+
+    Message contents of at least `min_blob_size` characters are moved to a
+    content-addressed blob store and replaced by a reference, so a tool
+    output repeated in every checkpoint of a thread is stored once. Payloads
+    of at least `compress_threshold` bytes are zlib compressed, as are the
+    blobs. Payloads written by the plain serializer can still be loaded.
+    """
+
+    def __init__(
+        self,
+        blob_store: BlobStore,
+        serde: Optional[SerializerProtocol] = None,
+        min_blob_size: int = 1024,
+        compress_threshold: int = 4096,
+    ):
+        self.blob_store = blob_store
+        self.serde = serde or JsonPlusSerializer()
+        self.min_blob_size = min_blob_size
+        self.compress_threshold = compress_threshold
+        self._known: set[str] = set()
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(self._extract(obj))
+        if len(data) >= self.compress_threshold:
+            return COMPRESSED_TYPE_PREFIX + type_, zlib.compress(data, 3)
+        return DEDUP_TYPE_PREFIX + type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(COMPRESSED_TYPE_PREFIX):
+            type_ = type_.removeprefix(COMPRESSED_TYPE_PREFIX)
+            payload = zlib.decompress(payload)
+        elif type_.startswith(DEDUP_TYPE_PREFIX):
+            type_ = type_.removeprefix(DEDUP_TYPE_PREFIX)
+        else:
+            return self.serde.loads_typed(data)
+        return self._restore(self.serde.loads_typed((type_, payload)))
+
+    def referenced_digests(self, data: tuple[str, bytes]) -> set[str]:
+        """Digests of the blobs referenced by a serialized payload."""
+        type_, payload = data
+        if type_.startswith(COMPRESSED_TYPE_PREFIX):
+            payload = zlib.decompress(payload)
+        elif not type_.startswith(DEDUP_TYPE_PREFIX):
+            return set()
+        return {m.decode() for m in _BLOB_REF_PATTERN.findall(payload)}
+
+    def collect_garbage(self, live_payloads: Iterable[tuple[str, bytes]]) -> int:
+        """
+        Drop blobs that none of `live_payloads` reference.
+
+        Only blob stores with a `retain` method are collected.
+
+        Returns:
+            int: The number of blobs dropped.
+        """
+        live: set[str] = set()
+        for data in live_payloads:
+            live |= self.referenced_digests(data)
+        return self.retain(live)
+
+    def retain(self, digests: set[str]) -> int:
+        """
+        Drop the blobs not in `digests`.
+
+        Only blob stores with a `retain` method are collected.
+
+        Returns:
+            int: The number of blobs dropped.
+        """
+        retain = getattr(self.blob_store, "retain", None)
+        if retain is None:
+            return 0
+        self._known &= digests
+        return retain(digests)
+
+    def _extract(self, obj: Any) -> Any:
+        if isinstance(obj, BaseMessage):
+            content = obj.content
+            if isinstance(content, str) and len(content) >= self.min_blob_size:
+                return obj.model_copy(update={"content": self._put_blob(content)})
+            return obj
+        if isinstance(obj, dict):
+            return {k: self._extract(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self._extract(v) for v in obj]
+        if isinstance(obj, tuple) and not hasattr(obj, "_fields"):
+            return tuple(self._extract(v) for v in obj)
+        return obj
+
+    def _restore(self, obj: Any) -> Any:
+        if isinstance(obj, BaseMessage):
+            content = obj.content
+            if isinstance(content, str) and content.startswith(BLOB_REF_PREFIX):
+                return obj.model_copy(update={"content": self._get_blob(content)})
+            return obj
+        if isinstance(obj, dict):
+            return {k: self._restore(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self._restore(v) for v in obj]
+        if isinstance(obj, tuple) and not hasattr(obj, "_fields"):
+            return tuple(self._restore(v) for v in obj)
+        return obj
+
+    def _put_blob(self, content: str) -> str:
+        raw = content.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest not in self._known:
+            self.blob_store.put(digest, zlib.compress(raw, 3))
+            self._known.add(digest)
+        return BLOB_REF_PREFIX + digest
+
+    def _get_blob(self, ref: str) -> str:
+        digest = ref.removeprefix(BLOB_REF_PREFIX)
+        blob = self.blob_store.get(digest)
+        if blob is None:
+            raise KeyError(f"Checkpoint references missing blob {digest}")
+        return zlib.decompress(blob).decode("utf-8")
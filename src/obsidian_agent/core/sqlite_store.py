@@ -0,0 +1,218 @@
+# obsidian_agent/core/sqlite_store.py
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+
+# Namespace labels are joined with the ASCII unit separator, which does not
+# appear in user ids or namespace names.
+NAMESPACE_SEPARATOR = "\x1f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    prefix TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (prefix, key)
+);
+CREATE INDEX IF NOT EXISTS store_prefix_idx ON store (prefix);
+"""
+
+
+def configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Apply the pragmas used for all SQLite connections (WAL, busy timeout)."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def _encode_namespace(namespace: tuple[str, ...]) -> str:
+    return NAMESPACE_SEPARATOR.join(namespace)
+
+
+def _decode_namespace(prefix: str) -> tuple[str, ...]:
+    return tuple(prefix.split(NAMESPACE_SEPARATOR)) if prefix else ()
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _matches(namespace: tuple[str, ...], op: ListNamespacesOp) -> bool:
+    for condition in op.match_conditions or ():
+        path = tuple(condition.path)
+        if len(path) > len(namespace):
+            return False
+        part = (
+            namespace[: len(path)]
+            if condition.match_type == "prefix"
+            else namespace[-len(path) :]
+        )
+        if any(p != "*" and p != n for p, n in zip(path, part)):
+            return False
+    return True
+
+
+class SqliteStore(BaseStore):
+    """
+    A persistent BaseStore backed by a single SQLite database.
+
+    Every thread gets its own connection, the database runs in WAL mode so
+    that readers do not block the writer, and all puts of a batch are written
+    in one transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = configure_connection(
+                sqlite3.connect(self.path, check_same_thread=False)
+            )
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        ops = list(ops)
+        results: list[Result] = [None] * len(ops)
+        # Ops run in order, runs of consecutive puts are written together
+        puts: list[PutOp] = []
+        for i, op in enumerate(ops):
+            if isinstance(op, PutOp):
+                puts.append(op)
+                continue
+            if puts:
+                self._apply_puts(puts)
+                puts = []
+            if isinstance(op, GetOp):
+                results[i] = self._get(op)
+            elif isinstance(op, SearchOp):
+                results[i] = self._search(op)
+            elif isinstance(op, ListNamespacesOp):
+                results[i] = self._list_namespaces(op)
+            else:
+                raise ValueError(f"Unknown operation type: {type(op)}")
+        if puts:
+            self._apply_puts(puts)
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.batch, list(ops)
+        )
+
+    def _apply_puts(self, puts: list[PutOp]):
+        now = datetime.now(timezone.utc).isoformat()
+        # The last put of a key wins
+        latest = {(_encode_namespace(op.namespace), op.key): op for op in puts}
+        upserts = []
+        deletes = []
+        for (prefix, key), op in latest.items():
+            if op.value is None:
+                deletes.append((prefix, key))
+            else:
+                upserts.append((prefix, key, json.dumps(op.value), now, now))
+
+        conn = self._conn
+        with conn:
+            if deletes:
+                conn.executemany(
+                    "DELETE FROM store WHERE prefix = ? AND key = ?", deletes
+                )
+            if upserts:
+                conn.executemany(
+                    """
+                    INSERT INTO store (prefix, key, value, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (prefix, key) DO UPDATE SET
+                        value = excluded.value, updated_at = excluded.updated_at
+                    """,
+                    upserts,
+                )
+
+    def _get(self, op: GetOp) -> Optional[Item]:
+        row = self._conn.execute(
+            "SELECT prefix, key, value, created_at, updated_at FROM store "
+            "WHERE prefix = ? AND key = ?",
+            (_encode_namespace(op.namespace), op.key),
+        ).fetchone()
+        return self._to_item(row, Item) if row else None
+
+    def _search(self, op: SearchOp) -> list[SearchItem]:
+        sql = "SELECT prefix, key, value, created_at, updated_at FROM store"
+        params: list[Any] = []
+        if op.namespace_prefix:
+            prefix = _encode_namespace(op.namespace_prefix)
+            sql += " WHERE prefix = ? OR prefix LIKE ? ESCAPE '\\'"
+            params += [prefix, _escape_like(prefix + NAMESPACE_SEPARATOR) + "%"]
+        sql += " ORDER BY updated_at DESC"
+        if not op.filter:
+            sql += " LIMIT ? OFFSET ?"
+            params += [op.limit, op.offset]
+
+        rows = self._conn.execute(sql, params)
+        items = [self._to_item(row, SearchItem) for row in rows]
+        if op.filter:
+            items = [
+                item
+                for item in items
+                if all(item.value.get(k) == v for k, v in op.filter.items())
+            ]
+            items = items[op.offset : op.offset + op.limit]
+        return items
+
+    def _list_namespaces(self, op: ListNamespacesOp) -> list[tuple[str, ...]]:
+        rows = self._conn.execute("SELECT DISTINCT prefix FROM store").fetchall()
+        namespaces = set()
+        for (prefix,) in rows:
+            namespace = _decode_namespace(prefix)
+            if not _matches(namespace, op):
+                continue
+            if op.max_depth is not None:
+                namespace = namespace[: op.max_depth]
+            namespaces.add(namespace)
+        return sorted(namespaces)[op.offset : op.offset + op.limit]
+
+    @staticmethod
+    def _to_item(row: tuple, item_cls: type) -> Any:
+        prefix, key, value, created_at, updated_at = row
+        return item_cls(
+            namespace=_decode_namespace(prefix),
+            key=key,
+            value=json.loads(value),
+            created_at=datetime.fromisoformat(created_at),
+            updated_at=datetime.fromisoformat(updated_at),
+        )
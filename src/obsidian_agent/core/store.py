@@ -6,33 +6,84 @@ from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 
+from obsidian_agent.core.retention import RetentionMemorySaver, RetentionPolicy
+from obsidian_agent.core.serde import DedupSerializer, MemoryBlobStore, SqliteBlobStore
+from obsidian_agent.core.sqlite_store import SqliteStore, configure_connection
+
 # from langgraph.store.postgres import PostgresStore
 
 
 def checkpoint_factory(
-    checkpoint_type: str, connection_string: Optional[str] = None
+    checkpoint_type: str,
+    connection_string: Optional[str] = None,
+    dedup: bool = True,
+    retention: Optional[RetentionPolicy] = None,
 ) -> BaseCheckpointSaver:
     if checkpoint_type == "sqlite":
         import sqlite3
 
         if connection_string is None:
             raise ValueError("Checkpoint path must be provided for sqlite saver")
-        conn = sqlite3.connect(connection_string)
-        return SqliteSaver(conn)
+        # SqliteSaver serializes access to the connection with its own lock
+        conn = configure_connection(
+            sqlite3.connect(connection_string, check_same_thread=False)
+        )
+        serde = DedupSerializer(SqliteBlobStore(connection_string)) if dedup else None
+        return SqliteSaver(conn, serde=serde)
+
+    elif checkpoint_type == "async_sqlite":
+        raise ValueError(
+            "The async_sqlite checkpointer must be created inside a running "
+            "event loop, use acheckpoint_factory instead"
+        )
 
     elif checkpoint_type == "memory":
-        return MemorySaver()
+        serde = DedupSerializer(MemoryBlobStore()) if dedup else None
+        if retention is not None:
+            return RetentionMemorySaver(retention, serde=serde)
+        return MemorySaver(serde=serde)
     elif checkpoint_type == "postgres":
         raise NotImplementedError("Postgres not implemented yet")
 
     raise ValueError(f"Unknown checkpoint type: {checkpoint_type}")
 
 
+async def acheckpoint_factory(
+    checkpoint_type: str,
+    connection_string: Optional[str] = None,
+    dedup: bool = True,
+    retention: Optional[RetentionPolicy] = None,
+) -> BaseCheckpointSaver:
+    """
+    Create a checkpointer on the running event loop.
+
+    The `async_sqlite` checkpointer binds itself to the loop it is created
+    on, so it is only available here. Other types are created as in
+    `checkpoint_factory`.
+    """
+    if checkpoint_type != "async_sqlite":
+        return checkpoint_factory(checkpoint_type, connection_string, dedup, retention)
+    if connection_string is None:
+        raise ValueError("Checkpoint path must be provided for sqlite saver")
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    conn = await aiosqlite.connect(connection_string)
+    serde = DedupSerializer(SqliteBlobStore(connection_string)) if dedup else None
+    saver = AsyncSqliteSaver(conn, serde=serde)
+    await saver.setup()
+    return saver
+
+
 def store_factory(
     store_type: str, connection_string: Optional[str] = None
 ) -> BaseStore:
     if store_type == "memory":
         return InMemoryStore()
+    elif store_type == "sqlite":
+        if connection_string is None:
+            raise ValueError("Store path must be provided for sqlite store")
+        return SqliteStore(connection_string)
     elif store_type == "postgres":
         raise NotImplementedError("Postgres not implemented yet")
 
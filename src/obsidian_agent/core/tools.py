@@ -1,9 +1,7 @@
-import os
 import uuid
 from datetime import datetime
 from typing import Literal
 
-import requests
 from langchain_core.messages import HumanMessage, SystemMessage, merge_message_runs
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
@@ -19,40 +17,6 @@ from obsidian_agent.core.nodes.profile import (
 )
 
 
-def scrape_page_jina(url: str) -> str:
-    """
-    Scrapes content of a webpage using JinaAI.
-
-    Args:
-        url (str): The URL of the webpage to scrape.
-
-    Returns:
-        str: The scraped markdown content of the webpage.
-    """
-    JINA_API_KEY = os.getenv("JINA_API_KEY")
-    if JINA_API_KEY is None:
-        raise ValueError("Please set the JINA_API_KEY environment variable.")
-
-    headers = {
-        "Authorization": "Bearer " + JINA_API_KEY,
-        "X-Timeout": "10",
-        "X-Engine": "browser",
-    }
-    response = requests.get(
-        "https://r.jina.ai/" + url,
-        headers=headers,
-    )
-
-    if response.status_code != 200:
-        raise Exception(
-            f"Failed to scrape page: {response.status_code} - {response.text}"
-        )
-
-    markdown_content = response.text
-
-    return markdown_content
-
-
 @tool
 def search_notes(keywords: str, k: int = 5) -> str:
     """
@@ -0,0 +1,348 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from obsidian_agent.utils.metrics import CACHE_REQUESTS, METRICS
+
+logger = logging.getLogger(__name__)
+
+JINA_ENDPOINT = "https://r.jina.ai/"
+USER_AGENT = "obsidian-agent/0.1"
+
+_SKIPPED_TAGS = {"script", "style", "noscript", "svg", "nav", "footer", "form"}
+_BLOCK_TAGS = {"p", "div", "section", "article", "main", "header", "table", "tr"}
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+
+class HTMLToMarkdown(HTMLParser):
+    """
+    Minimal HTML to Markdown converter.
+
+    Keeps headings, paragraphs, links, lists, emphasis and code blocks and
+    drops scripts, styles and page chrome such as navigation and footers.
+    """
+
+    def __init__(self, base_url: str = ""):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ""
+        self.parts: list[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+        self._in_pre = False
+        self._list_depth = 0
+        self._href: Optional[str] = None
+        self._link_text: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        if tag == "title":
+            self._in_title = True
+        if self._skip_depth:
+            return
+
+        attrs = dict(attrs)
+        if tag in _HEADINGS:
+            self._block("#" * _HEADINGS[tag] + " ")
+        elif tag in _BLOCK_TAGS:
+            self._block()
+        elif tag == "br":
+            self.parts.append("\n")
+        elif tag in ("ul", "ol"):
+            self._list_depth += 1
+        elif tag == "li":
+            self.parts.append("\n" + "  " * (self._list_depth - 1) + "- ")
+        elif tag == "pre":
+            self._in_pre = True
+            self._block("```\n")
+        elif tag == "code" and not self._in_pre:
+            self.parts.append("`")
+        elif tag in ("strong", "b"):
+            self.parts.append("**")
+        elif tag in ("em", "i"):
+            self.parts.append("*")
+        elif tag == "a" and attrs.get("href"):
+            self._href = urljoin(self.base_url, attrs["href"])
+            self._link_text = []
+        elif tag == "img" and attrs.get("alt"):
+            self.parts.append(f"![{attrs['alt']}]")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+
+        if tag in _HEADINGS or tag in _BLOCK_TAGS:
+            self._block()
+        elif tag in ("ul", "ol"):
+            self._list_depth = max(0, self._list_depth - 1)
+            self._block()
+        elif tag == "pre":
+            self._in_pre = False
+            self.parts.append("\n```")
+            self._block()
+        elif tag == "code" and not self._in_pre:
+            self.parts.append("`")
+        elif tag in ("strong", "b"):
+            self.parts.append("**")
+        elif tag in ("em", "i"):
+            self.parts.append("*")
+        elif tag == "a" and self._href is not None:
+            text = "".join(self._link_text).strip()
+            self.parts.append(f"[{text}]({self._href})" if text else "")
+            self._href = None
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data.strip()
+            return
+        if self._skip_depth:
+            return
+        if not self._in_pre:
+            data = re.sub(r"\s+", " ", data)
+        if self._href is not None:
+            self._link_text.append(data)
+        else:
+            self.parts.append(data)
+
+    def _block(self, prefix: str = ""):
+        self.parts.append("\n\n" + prefix)
+
+    def markdown(self) -> str:
+        text = "".join(self.parts)
+        text = re.sub(r"[ \t]+\n", "\n", text)
+        text = re.sub(r"\n[ \t]+(?=[^ \t-])", "\n", text)
+        return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def html_to_markdown(html: str, url: str = "") -> str:
+    """
+    Convert an HTML page to Markdown, in the same layout as the Jina reader.
+
+    Args:
+        html (str): The HTML of the page.
+        url (str): The page URL, used to resolve relative links.
+
+    Returns:
+        str: The page title, source and Markdown content.
+    """
+    parser = HTMLToMarkdown(url)
+    parser.feed(html)
+    parser.close()
+    return (
+        f"Title: {parser.title}\n\nURL Source: {url}\n\n"
+        f"Markdown Content:\n{parser.markdown()}"
+    )
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    content: str
+    fetched_at: float
+    source: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ResponseCache:
+    """Fetched pages stored as one JSON file per URL."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str) -> Path:
+        return self.cache_dir / (hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def put(self, entry: CacheEntry):
+        # Write to a temporary file first so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f)
+        os.replace(tmp_path, self._path(entry.url))
+
+
+class Fetcher:
+    """
+    Fetches web pages as Markdown.
+
+    Pages are read through JinaAI when an API key is available and converted
+    locally otherwise, or when Jina fails. All requests share a pooled session
+    with timeouts and retries. Responses are cached on disk: entries younger
+    than `ttl_seconds` are served without any request, older ones are
+    revalidated with their ETag/Last-Modified validators.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl_seconds: float = 24 * 60 * 60,
+        timeout: float = 20.0,
+        jina_api_key: Optional[str] = None,
+        jina_endpoint: str = JINA_ENDPOINT,
+        session: Optional[requests.Session] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.ttl_seconds = ttl_seconds
+        # (connect, read) timeouts
+        self.timeout = (min(5.0, timeout), timeout)
+        self.jina_api_key = jina_api_key
+        self.jina_endpoint = jina_endpoint
+        self.session = session or create_session()
+        self.clock = clock
+        self.requests_made = 0
+
+    def fetch(self, url: str) -> str:
+        """
+        Get the content of a web page as Markdown.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            str: The Markdown content of the page.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None and self.clock() - entry.fetched_at < self.ttl_seconds:
+            METRICS.inc(CACHE_REQUESTS, cache="fetch", result="hit")
+            return entry.content
+        METRICS.inc(CACHE_REQUESTS, cache="fetch", result="miss")
+
+        if self.jina_api_key:
+            try:
+                content = self._fetch_jina(url)
+                self._store(CacheEntry(url, content, self.clock(), "jina"))
+                return content
+            except requests.RequestException as e:
+                logger.warning("Jina failed for %s, using local extraction: %s", url, e)
+
+        revalidate = entry if entry is not None and entry.source == "local" else None
+        return self._fetch_local(url, revalidate)
+
+    def _fetch_jina(self, url: str) -> str:
+        headers = {
+            "Authorization": "Bearer " + self.jina_api_key,
+            "X-Timeout": str(int(self.timeout[1])),
+            "X-Engine": "browser",
+        }
+        self.requests_made += 1
+        response = self.session.get(
+            self.jina_endpoint + url, headers=headers, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.text
+
+    def _fetch_local(self, url: str, entry: Optional[CacheEntry]) -> str:
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        self.requests_made += 1
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry is not None:
+            entry.fetched_at = self.clock()
+            self._store(entry)
+            return entry.content
+        response.raise_for_status()
+
+        content_type = response.headers.get("Content-Type", "text/html").lower()
+        if "html" in content_type:
+            # requests falls back to ISO-8859-1 for text without a charset
+            if response.encoding is None or response.encoding.lower() == "iso-8859-1":
+                response.encoding = response.apparent_encoding
+            content = html_to_markdown(response.text, response.url)
+        elif content_type.startswith("text/") or "json" in content_type:
+            content = response.text
+        else:
+            raise ValueError(f"Unsupported content type {content_type} for {url}")
+
+        self._store(
+            CacheEntry(
+                url,
+                content,
+                self.clock(),
+                "local",
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        )
+        return content
+
+    def _store(self, entry: CacheEntry):
+        if self.cache is not None:
+            self.cache.put(entry)
+
+
+def create_session(pool_size: int = 10, retries: int = 2) -> requests.Session:
+    """A requests session with a connection pool and retries on transient errors."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+@functools.lru_cache(maxsize=None)
+def get_fetcher(
+    cache_dir: Optional[str] = None,
+    ttl_seconds: float = 24 * 60 * 60,
+    timeout: float = 20.0,
+) -> Fetcher:
+    """
+    Shared Fetcher for the given settings, so connections and the cache are reused.
+
+    Args:
+        cache_dir (Optional[str]): The cache directory, None disables caching.
+        ttl_seconds (float): How long cached pages are served without a request.
+        timeout (float): The read timeout of a request in seconds.
+
+    Returns:
+        Fetcher: The fetcher.
+    """
+    return Fetcher(
+        cache_dir=cache_dir,
+        ttl_seconds=ttl_seconds,
+        timeout=timeout,
+        jina_api_key=os.getenv("JINA_API_KEY"),
+    )
@@ -0,0 +1,296 @@
+# obsidian_agent/utils/metrics.py
+import bisect
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+# Histogram buckets in seconds, from a cached note read to a slow model call
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+NODE_SECONDS = "obsidian_agent_node_seconds"
+NODE_ERRORS = "obsidian_agent_node_errors_total"
+TOOL_SECONDS = "obsidian_agent_tool_seconds"
+LLM_SECONDS = "obsidian_agent_llm_seconds"
+LLM_TOKENS = "obsidian_agent_llm_tokens_total"
+VECTOR_SEARCH_SECONDS = "obsidian_agent_vector_search_seconds"
+EMBED_QUERY_SECONDS = "obsidian_agent_embed_query_seconds"
+NOTE_BYTES_READ = "obsidian_agent_note_bytes_read_total"
+CACHE_REQUESTS = "obsidian_agent_cache_requests_total"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class _Histogram:
+    buckets: list[int]
+    sum: float = 0.0
+    count: int = 0
+
+
+class Metrics:
+    """
+    Counters and histograms exported in the Prometheus text format.
+
+    Recording is a no-op while the registry is disabled, so instrumented
+    code only pays for an attribute check.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._descriptions: dict[str, tuple[str, str, tuple[float, ...]]] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], _Histogram] = {}
+
+    def describe(
+        self,
+        name: str,
+        kind: str,
+        help: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        """Register the type (`counter` or `histogram`) and help text of a metric."""
+        self._descriptions[name] = (kind, help, buckets)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        if not self.enabled:
+            return
+        buckets = self._descriptions.get(name, ("", "", DEFAULT_BUCKETS))[2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram([0] * len(buckets))
+            index = bisect.bisect_left(buckets, value)
+            if index < len(buckets):
+                histogram.buckets[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def time(self, name: str, **labels: str):
+        """Context manager observing the duration of its block, if enabled."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name, labels)
+
+    @contextmanager
+    def _timed(self, name: str, labels: dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def value(self, name: str, **labels: str) -> float:
+        """Current value of a counter, or the observation count of a histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key in self._histograms:
+                return self._histograms[key].count
+            return self._counters.get(key, 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, one sample per line.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, _Histogram(list(h.buckets), h.sum, h.count))
+                for key, h in self._histograms.items()
+            )
+
+        lines = []
+        described = set()
+
+        def header(name: str, kind: str):
+            if name in described:
+                return
+            described.add(name)
+            help = self._descriptions.get(name, (kind, "", ()))[1]
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        for (name, labels), histogram in histograms:
+            header(name, "histogram")
+            buckets = self._descriptions.get(name, ("", "", DEFAULT_BUCKETS))[2]
+            cumulative = 0
+            for bound, count in zip(buckets, histogram.buckets):
+                cumulative += count
+                bucket_labels = labels + (("le", _number(bound)),)
+                lines.append(f"{name}_bucket{_labels(bucket_labels)} {cumulative}")
+            inf_labels = labels + (("le", "+Inf"),)
+            lines.append(f"{name}_bucket{_labels(inf_labels)} {histogram.count}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+METRICS = Metrics()
+METRICS.describe(NODE_SECONDS, "histogram", "Wall time of graph node runs.")
+METRICS.describe(NODE_ERRORS, "counter", "Graph node runs that raised.")
+METRICS.describe(TOOL_SECONDS, "histogram", "Wall time of tool calls.")
+METRICS.describe(LLM_SECONDS, "histogram", "Wall time of model calls.")
+METRICS.describe(LLM_TOKENS, "counter", "Prompt and completion tokens of model calls.")
+METRICS.describe(
+    VECTOR_SEARCH_SECONDS, "histogram", "Wall time of vector store searches."
+)
+METRICS.describe(
+    EMBED_QUERY_SECONDS, "histogram", "Wall time of search query embeddings."
+)
+METRICS.describe(NOTE_BYTES_READ, "counter", "Bytes of note files read.")
+METRICS.describe(CACHE_REQUESTS, "counter", "Cache lookups by cache and result.")
+
+
+def write_metrics(path: str, metrics: Metrics = METRICS):
+    """Write the metrics to a file, atomically, e.g. for a node exporter."""
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(metrics.render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def start_file_export(
+    path: str, interval: float, metrics: Metrics = METRICS
+) -> threading.Event:
+    """
+    Write the metrics to a file every `interval` seconds in a daemon thread.
+
+    Returns:
+        threading.Event: Set it to stop the export.
+    """
+    stop = threading.Event()
+
+    def export():
+        while not stop.wait(interval):
+            write_metrics(path, metrics)
+
+    threading.Thread(target=export, name="metrics-export", daemon=True).start()
+    return stop
+
+
+def serve_metrics(
+    port: int, host: str = "127.0.0.1", metrics: Metrics = METRICS
+) -> ThreadingHTTPServer:
+    """
+    Serve the metrics at `http://host:port/metrics` from a daemon thread.
+
+    Args:
+        port (int): The port, 0 picks a free one.
+        host (str): The interface to listen on, local only by default.
+        metrics (Metrics): The registry to serve.
+
+    Returns:
+        ThreadingHTTPServer: The running server, `shutdown()` stops it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    return server
+
+
+_EXPORTERS_LOCK = threading.Lock()
+_EXPORTERS: dict[tuple, object] = {}
+
+
+def enable_metrics(
+    port: Optional[int] = None,
+    path: Optional[str] = None,
+    interval: float = 15.0,
+    metrics: Metrics = METRICS,
+):
+    """
+    Enable recording and start the exporters, each one at most once.
+
+    Args:
+        port (Optional[int]): Port of the local `/metrics` endpoint.
+        path (Optional[str]): File the metrics are written to periodically.
+        interval (float): Seconds between two file writes.
+        metrics (Metrics): The registry to enable.
+    """
+    metrics.enabled = True
+    with _EXPORTERS_LOCK:
+        if port is not None and ("port", port) not in _EXPORTERS:
+            _EXPORTERS[("port", port)] = serve_metrics(port, metrics=metrics)
+        if path is not None and ("path", path) not in _EXPORTERS:
+            _EXPORTERS[("path", path)] = start_file_export(path, interval, metrics)
@@ -0,0 +1,160 @@
+# obsidian_agent/utils/note_names.py
+import difflib
+import re
+from typing import NamedTuple, Optional
+
+import yaml
+
+# Words models add to note names, "my buddhism notes" means "Buddhism"
+_FILLER_WORDS = {"a", "an", "the", "my", "note", "notes", "on", "about"}
+_SEPARATORS = re.compile(r"[\s_\-.]+")
+_FRONTMATTER = re.compile(r"\A---[ \t]*\n(.*?\n)---[ \t]*(\n|\Z)", re.DOTALL)
+
+# Score above which a name resolves without asking
+RESOLVE_THRESHOLD = 0.85
+# Lead the best name needs over a different note to resolve
+RESOLVE_MARGIN = 0.05
+# Score below which a name is not worth suggesting
+SUGGEST_THRESHOLD = 0.4
+
+
+class NameMatch(NamedTuple):
+    note_name: str
+    score: float
+    alias: Optional[str] = None
+
+
+def normalize_name(name: str) -> str:
+    """Case folded name with `.md`, separators and filler words removed."""
+    name = name.strip().removesuffix(".md").casefold()
+    words = _SEPARATORS.sub(" ", name).split()
+    kept = [word for word in words if word not in _FILLER_WORDS]
+    return " ".join(kept or words)
+
+
+def _trigrams(name: str) -> set[str]:
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Similarity of two normalized names, from 0 to 1."""
+    if a.replace(" ", "") == b.replace(" ", ""):
+        return 1.0
+    grams_a, grams_b = _trigrams(a), _trigrams(b)
+    jaccard = len(grams_a & grams_b) / len(grams_a | grams_b)
+    return max(jaccard, difflib.SequenceMatcher(None, a, b).ratio())
+
+
+def frontmatter_aliases(text: str) -> list[str]:
+    """
+    Aliases listed in the YAML frontmatter of a note.
+
+    Args:
+        text (str): The note content.
+
+    Returns:
+        list[str]: The `aliases` (or `alias`) of the note, empty without any.
+    """
+    match = _FRONTMATTER.match(text)
+    if match is None:
+        return []
+    try:
+        frontmatter = yaml.safe_load(match.group(1))
+    except yaml.YAMLError:
+        return []
+    if not isinstance(frontmatter, dict):
+        return []
+    aliases = frontmatter.get("aliases", frontmatter.get("alias"))
+    if isinstance(aliases, str):
+        aliases = [aliases]
+    if not isinstance(aliases, list):
+        return []
+    return [str(alias) for alias in aliases if alias]
+
+
+class NoteNameIndex:
+    """
+    Note names and aliases, matched approximately.
+
+    Candidates sharing trigrams with the query are ranked by the better of
+    their trigram overlap and their edit similarity. The index is not
+    thread safe, its owner serializes access.
+    """
+
+    def __init__(self):
+        # Normalized names and aliases, with the notes they refer to
+        self._keys: dict[str, dict[str, Optional[str]]] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._note_keys: dict[str, set[str]] = {}
+
+    def add(self, note_name: str, aliases: Optional[list[str]] = None):
+        """Index a note by its name and aliases, replacing previous aliases."""
+        self.remove(note_name)
+        names = {normalize_name(note_name): None}
+        for alias in aliases or []:
+            names.setdefault(normalize_name(alias), alias)
+        for key, alias in names.items():
+            notes = self._keys.setdefault(key, {})
+            if not notes:
+                for gram in _trigrams(key):
+                    self._postings.setdefault(gram, set()).add(key)
+            notes[note_name] = alias
+        self._note_keys[note_name] = set(names)
+
+    def remove(self, note_name: str):
+        for key in self._note_keys.pop(note_name, ()):
+            notes = self._keys[key]
+            notes.pop(note_name, None)
+            if notes:
+                continue
+            del self._keys[key]
+            for gram in _trigrams(key):
+                self._postings[gram].discard(key)
+                if not self._postings[gram]:
+                    del self._postings[gram]
+
+    def match(self, query: str, limit: int = 5) -> list[NameMatch]:
+        """
+        Notes whose name or alias is close to the query, best first.
+
+        Args:
+            query (str): The requested note name.
+            limit (int): The maximum number of notes to return.
+
+        Returns:
+            list[NameMatch]: The closest notes, one match per note.
+        """
+        query = normalize_name(query)
+        keys = set().union(*(self._postings.get(g, ()) for g in _trigrams(query)))
+        best: dict[str, NameMatch] = {}
+        for key in keys:
+            score = name_similarity(query, key)
+            if score < SUGGEST_THRESHOLD:
+                continue
+            for note_name, alias in self._keys[key].items():
+                if note_name not in best or score > best[note_name].score:
+                    best[note_name] = NameMatch(note_name, score, alias)
+        ranked = sorted(best.values(), key=lambda m: (-m.score, m.note_name))
+        return ranked[:limit]
+
+    def resolve(self, query: str) -> tuple[Optional[str], list[NameMatch]]:
+        """
+        Resolve a note name, when one note matches it confidently.
+
+        Args:
+            query (str): The requested note name.
+
+        Returns:
+            tuple[Optional[str], list[NameMatch]]: The resolved note name or
+                None, and the closest notes.
+        """
+        matches = self.match(query)
+        if not matches or matches[0].score < RESOLVE_THRESHOLD:
+            return None, matches
+        if len(matches) > 1 and matches[0].score - matches[1].score < RESOLVE_MARGIN:
+            return None, matches
+        return matches[0].note_name, matches
+
+    def __len__(self) -> int:
+        return len(self._note_keys)
@@ -1,31 +1,123 @@
+import atexit
+import json
+import os
 import pathlib
+import re
+import tempfile
+import threading
+import weakref
+from dataclasses import dataclass
 from typing import List, Optional
 
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
+from obsidian_agent.utils.metrics import (
+    EMBED_QUERY_SECONDS,
+    METRICS,
+    NOTE_BYTES_READ,
+    VECTOR_SEARCH_SECONDS,
+)
+from obsidian_agent.utils.note_names import (
+    NameMatch,
+    NoteNameIndex,
+    frontmatter_aliases,
+)
+from obsidian_agent.utils.profiling import current_profile, profile_calls
+from obsidian_agent.utils.rwlock import ReadWriteLock
+from obsidian_agent.utils.trigram import (
+    TrigramIndex,
+    compile_pattern,
+    required_literals,
+)
+
+# Saved next to the vector store, the ids of the chunks of every note
+CHUNK_IDS_FILE = "chunk_ids.json"
+
+# Libraries with vector store changes not saved yet, saved at exit
+_UNSAVED: "weakref.WeakSet[ObsidianLibrary]" = weakref.WeakSet()
+
+
+@atexit.register
+def flush_libraries():
+    """Save the pending vector store changes of all libraries."""
+    for library in list(_UNSAVED):
+        library.flush()
+
+
+@dataclass
+class GrepMatch:
+    note_name: str
+    line_number: int
+    line: str
+
 
 class ObsidianLibrary:
-    def __init__(self, path: str, vector_store_path: Optional[str] = None):
+    """
+    Notes of an Obsidian vault and their vector store.
+
+    The library is shared by all worker threads. Reads and searches hold a
+    shared lock, so they run in parallel, while adding notes and updating
+    the vector store hold the exclusive lock. Slow work like reading files
+    and computing embeddings happens outside the lock.
+
+    Changes to the vector store are saved to `vector_store_path` once
+    `save_delay` seconds after the first of them, all changes made meanwhile
+    in the same save. `flush` saves them right away.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        vector_store_path: Optional[str] = None,
+        vector_store: Optional[FAISS] = None,
+        embeddings: Optional[Embeddings] = None,
+        save_delay: float = 5.0,
+    ):
         self.path = path
+        self.vector_store_path = vector_store_path
+        self.save_delay = save_delay
 
         file_paths = [*pathlib.Path(path).rglob("*.md")]
         self.file_paths = [str(path) for path in file_paths]
         self.file_names = [path.name for path in file_paths]
-
-        embedding_model = OpenAIEmbeddings()
-        if vector_store_path is None:
+        # Set index of the file names for duplicate checks
+        self._file_name_index = set(self.file_names)
+        self._lock = ReadWriteLock()
+        # Serializes saves of the vector store, which run alongside reads
+        self._save_lock = threading.Lock()
+        # Serializes note edits, from reading the note to reindexing it
+        self._edit_lock = threading.Lock()
+        # Indexes of the note contents and names, built on first use
+        self._trigrams: Optional[TrigramIndex] = None
+        self._note_names: Optional[NoteNameIndex] = None
+        self._index_lock = threading.Lock()
+        # Pending save of the vector store
+        self._save_timer: Optional[threading.Timer] = None
+        self._unsaved = False
+        self._timer_lock = threading.Lock()
+        # Estimated bytes of the vector store and paths, computed on first
+        # use and updated by the writes, which hold the write lock
+        self._store_bytes: Optional[int] = None
+
+        if vector_store is not None:
+            self.vector_store = vector_store
+        elif vector_store_path is None:
             from obsidian_agent.utils.rag import create_vector_store
 
-            self.vector_store = create_vector_store(self.path)
+            self.vector_store = create_vector_store(self.path, embeddings=embeddings)
         else:
             self.vector_store = FAISS.load_local(
                 vector_store_path,
-                embeddings=embedding_model,
+                embeddings=embeddings or OpenAIEmbeddings(),
                 allow_dangerous_deserialization=True,
             )
+        # Vector store ids of the chunks of every note, by note path
+        self._chunk_ids = self._load_chunk_ids()
 
+    @profile_calls("library")
     def get_note_content(self, note_name: str, link_exists: bool = False) -> str:
 
         section_name = None
@@ -35,19 +127,17 @@ class ObsidianLibrary:
         if "|" in note_name:
             note_name = note_name.split("|")[0]
 
-        ends_with_str = str(pathlib.Path("/", f"{note_name}.md"))
-        note_paths = [path for path in self.file_paths if path.endswith(ends_with_str)]
-        if (len(note_paths) == 0) and (link_exists is False):
+        note_path = self._find_note_path(note_name)
+        if (note_path is None) and (link_exists is False):
             raise FileNotFoundError(f"Note '{note_name}' not found")
-        elif (len(note_paths) == 0) and (link_exists is True):
+        elif (note_path is None) and (link_exists is True):
             return f"Note '{note_name}' is empty."
-        elif len(note_paths) > 1:
-            raise ValueError(f"Multiple notes found with name '{note_name}'")
-
-        note_path = note_paths[0].replace("\xa0", " ")
+        note_path = note_path.replace("\xa0", " ")
 
         with open(note_path, "r", encoding="utf-8") as f:
             text = f.read()
+            if METRICS.enabled:
+                METRICS.inc(NOTE_BYTES_READ, os.fstat(f.fileno()).st_size)
             text = "\nNOTE NAME: " + note_name + "\n\n" + text
 
         if section_name is not None:
@@ -68,12 +158,42 @@ class ObsidianLibrary:
                 )
         return text
 
-    def get_note_with_context(self, note_name: str, depth: int = 2) -> str:
+    def _find_note_path(self, note_name: str) -> Optional[str]:
+        """Path of a note by name, None if there is no such note."""
+        ends_with_str = str(pathlib.Path("/", f"{note_name}.md"))
+        with self._lock.read():
+            note_paths = [
+                path for path in self.file_paths if path.endswith(ends_with_str)
+            ]
+        if len(note_paths) > 1:
+            raise ValueError(f"Multiple notes found with name '{note_name}'")
+        return note_paths[0] if note_paths else None
 
+    @profile_calls("library")
+    def get_note_with_context(self, note_name: str, depth: int = 2) -> str:
+        notes = self.get_notes_with_context(note_name, depth)
+        return "\n\n".join(text for _, text in notes)
+
+    @profile_calls("library")
+    def get_notes_with_context(
+        self, note_name: str, depth: int = 2
+    ) -> List[tuple[str, str]]:
+        """
+        Read a note and the notes it links to, up to `depth` links away.
+
+        Args:
+            note_name (str): The name of the note.
+            depth (int): How many links away to follow, at most 3.
+
+        Returns:
+            List[tuple[str, str]]: The names and contents of the note and
+                then of the linked notes.
+        """
         note_name = note_name.removesuffix(".md")
         text = self.get_note_content(note_name, link_exists=False)
+        notes = [(note_name, text)]
         if depth == 0:
-            return text
+            return notes
 
         links = self.get_note_links(text)
 
@@ -93,9 +213,8 @@ class ObsidianLibrary:
 
         all_links = list(set(all_links))
         for link in all_links:
-            note_content = self.get_note_content(link, link_exists=True)
-            text = text + f"\n\n{note_content}"
-        return text
+            notes.append((link, self.get_note_content(link, link_exists=True)))
+        return notes
 
     def get_note_links(self, note: str) -> List[str]:
         results = []
@@ -116,6 +235,7 @@ class ObsidianLibrary:
 
         return results
 
+    @profile_calls("library")
     def get_all_note_links(
         self, links: list, visited_links: Optional[set] = None
     ) -> List[str]:
@@ -140,18 +260,446 @@ class ObsidianLibrary:
         links = links + new_links
         return list(dict.fromkeys(links))
 
+    def has_note(self, note_title: str) -> bool:
+        with self._lock.read():
+            return f"{note_title}.md" in self._file_name_index
+
+    @profile_calls("library")
     def put_note(self, note_title: str, content: str):
+        with self._lock.write():
+            if self.has_note(note_title):
+                raise FileExistsError(f"Note '{note_title}' already exists")
+            self._write_note(note_title, content)
+        self._update_indexes({f"{self.path}/{note_title}.md": content})
+
+    @profile_calls("library")
+    def put_notes(self, notes: dict[str, str], index: bool = True) -> list[str]:
+        """
+        Create several notes and add them to the vector store in one batch.
+
+        All names are checked before anything is written, so a duplicate
+        leaves the vault unchanged. Every file is written atomically.
+
+        Args:
+            notes (dict[str, str]): Note contents by note name.
+            index (bool): Whether to add the notes to the vector store.
+
+        Returns:
+            list[str]: The names of the created notes.
+        """
+        created = []
+        try:
+            with self._lock.write():
+                existing = [name for name in notes if self.has_note(name)]
+                if existing:
+                    raise FileExistsError(
+                        ", ".join(f"Note '{name}' already exists" for name in existing)
+                    )
+                for note_title, content in notes.items():
+                    self._write_note(note_title, content)
+                    created.append(note_title)
+        except BaseException:
+            # The notes written before the error exist, grep and name
+            # lookups find them, embedding them waits for a rebuild
+            self._update_indexes(
+                {f"{self.path}/{name}.md": notes[name] for name in created}
+            )
+            raise
+        self._update_indexes(
+            {f"{self.path}/{name}.md": notes[name] for name in created}
+        )
+        # Indexing does not hold the lock while computing embeddings
+        if index and created:
+            self.index_notes({name: notes[name] for name in created})
+        return created
+
+    def _write_note(self, note_title: str, content: str):
+        """
+        Write a note through a temporary file, never replacing an existing one.
+
+        Called with the write lock held.
+        """
         path = f"{self.path}/{note_title}.md"
-        if f"{note_title}.md" in self.file_names:
-            raise FileExistsError(f"Note '{note_title}' already exists")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
-            self.file_paths.append(path)
-            self.file_names.append(f"{note_title}.md")
-
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            try:
+                # Unlike a rename, a link fails if the note was created meanwhile
+                os.link(tmp_path, path)
+            except FileExistsError:
+                raise FileExistsError(f"Note '{note_title}' already exists")
+            except OSError:
+                # File systems without hard links
+                if os.path.exists(path):
+                    raise FileExistsError(f"Note '{note_title}' already exists")
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        self.file_paths.append(path)
+        self.file_names.append(f"{note_title}.md")
+        self._file_name_index.add(f"{note_title}.md")
+        self._grow(len(path) * 2)
+
+    @profile_calls("library")
+    def index_notes(self, notes: dict[str, str]):
+        """
+        Embed notes and add them to the vector store in a single batch.
+
+        Args:
+            notes (dict[str, str]): Note contents by note name.
+        """
+        from obsidian_agent.utils.rag import split_documents
+
+        docs = [
+            Document(
+                page_content=text,
+                metadata={"path": pathlib.Path(self.path, f"{name}.md")},
+            )
+            for name, text in notes.items()
+        ]
+        profile = current_profile()
+        with profile.phase("split"):
+            chunks = split_documents(docs)
+        if not chunks:
+            return
+        texts = [chunk.page_content for chunk in chunks]
+        with profile.phase("embed"):
+            # Embedding calls the provider, searches go on meanwhile
+            embeddings = self.vector_store.embeddings.embed_documents(texts)  # type: ignore[union-attr]
+        with profile.phase("add"), self._lock.write():
+            ids = self.vector_store.add_embeddings(
+                list(zip(texts, embeddings)),
+                metadatas=[chunk.metadata for chunk in chunks],
+            )
+            for chunk, doc_id in zip(chunks, ids):
+                key = str(chunk.metadata["path"])
+                self._chunk_ids.setdefault(key, []).append(doc_id)
+            self._grow(self._chunk_bytes(texts))
+        self._schedule_save()
+
+    def _load_chunk_ids(self) -> dict[str, list[str]]:
+        """
+        The vector store ids of the chunks of every note, by note path.
+
+        Read from CHUNK_IDS_FILE next to the vector store, or built from the
+        docstore when the file is missing or does not match the store.
+        """
+        docs = getattr(self.vector_store.docstore, "_dict", {})
+        if self.vector_store_path is not None:
+            try:
+                path = os.path.join(self.vector_store_path, CHUNK_IDS_FILE)
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                if {i for ids in saved.values() for i in ids} == docs.keys():
+                    return saved
+            except (OSError, ValueError, AttributeError, TypeError):
+                pass
+        chunk_ids: dict[str, list[str]] = {}
+        for doc_id, doc in docs.items():
+            chunk_ids.setdefault(str(doc.metadata.get("path")), []).append(doc_id)
+        return chunk_ids
+
+    def _save_chunk_ids(self):
+        """Write the chunk ids next to the vector store, called with a lock held."""
+        path = os.path.join(self.vector_store_path, CHUNK_IDS_FILE)  # type: ignore[arg-type]
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.vector_store_path, prefix=".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._chunk_ids, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _schedule_save(self):
+        """Save the vector store after `save_delay`, with the changes made meanwhile."""
+        if self.vector_store_path is None:
+            return
+        with self._timer_lock:
+            self._unsaved = True
+            _UNSAVED.add(self)
+            if self.save_delay > 0 and self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_delay, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+        if self.save_delay <= 0:
+            self.flush()
+
+    def flush(self):
+        """Save the changes to the vector store now, if any."""
+        with self._timer_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._unsaved:
+                return
+            self._unsaved = False
+            _UNSAVED.discard(self)
+        try:
+            with current_profile().phase("save"), self._save_lock, self._lock.read():
+                self.vector_store.save_local(self.vector_store_path)
+                self._save_chunk_ids()
+        except BaseException:
+            with self._timer_lock:
+                self._unsaved = True
+                _UNSAVED.add(self)
+            raise
+
+    @profile_calls("library")
+    def edit_note(
+        self,
+        note_name: str,
+        operation: str,
+        text: str,
+        section: Optional[str] = None,
+        find: Optional[str] = None,
+    ) -> str:
+        """
+        Edit a note and update its chunks in the vector store.
+
+        The note is rewritten atomically. Only the chunks whose text changed
+        are embedded again, the others stay in the vector store as they are.
+
+        Args:
+            note_name (str): The name of the note.
+            operation (str): One of EDIT_OPERATIONS, see `apply_note_edit`.
+            text (str): The text to add or the replacement text.
+            section (Optional[str]): The heading of the edited section.
+            find (Optional[str]): The text replaced by a `patch`.
+
+        Returns:
+            str: The new content of the note.
+        """
+        note_name = note_name.removesuffix(".md")
+        with self._edit_lock:
+            note_path = self._find_note_path(note_name)
+            if note_path is None:
+                raise FileNotFoundError(f"Note '{note_name}' not found")
+            with open(note_path, "r", encoding="utf-8") as f:
+                content = f.read()
+            new_content = apply_note_edit(content, operation, text, section, find)
+            if new_content != content:
+                self._replace_file(note_path, new_content)
+                self._update_indexes({note_path: new_content})
+                self._reindex_note(note_path, new_content)
+        return new_content
+
+    def _replace_file(self, path: str, content: str):
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _reindex_note(self, path: str, content: str):
+        """Replace the changed chunks of a note in the vector store."""
+        from obsidian_agent.utils.rag import split_documents
+
+        key = str(pathlib.Path(path))
+        with self._lock.read():
+            old_chunks: dict[str, list[str]] = {}
+            for doc_id in self._chunk_ids.get(key, ()):
+                doc = self.vector_store.docstore.search(doc_id)
+                if isinstance(doc, Document):
+                    old_chunks.setdefault(doc.page_content, []).append(doc_id)
+
+        new_chunks = split_documents(
+            [Document(page_content=content, metadata={"path": pathlib.Path(path)})]
+        )
+        added = []
+        for chunk in new_chunks:
+            if old_chunks.get(chunk.page_content):
+                # Unchanged chunk, keep its vector
+                old_chunks[chunk.page_content].pop()
+            else:
+                added.append(chunk)
+        removed = [doc_id for ids in old_chunks.values() for doc_id in ids]
+        removed_texts = [text for text, ids in old_chunks.items() for _ in ids]
+
+        profile = current_profile()
+        texts = [chunk.page_content for chunk in added]
+        with profile.phase("embed"):
+            embeddings = (
+                self.vector_store.embeddings.embed_documents(texts)  # type: ignore[union-attr]
+                if texts
+                else []
+            )
+        with profile.phase("add"), self._lock.write():
+            ids = []
+            if removed:
+                self.vector_store.delete(removed)
+            if added:
+                ids = self.vector_store.add_embeddings(
+                    list(zip(texts, embeddings)),
+                    metadatas=[chunk.metadata for chunk in added],
+                )
+            gone = set(removed)
+            kept = [i for i in self._chunk_ids.get(key, ()) if i not in gone]
+            self._chunk_ids[key] = kept + ids
+            self._grow(self._chunk_bytes(texts) - self._chunk_bytes(removed_texts))
+        if added or removed:
+            self._schedule_save()
+
+    def memory_usage(self) -> int:
+        """
+        Estimated bytes held by the library: index vectors, chunk texts, paths
+        and the trigram index.
+
+        The vector store is measured on the first call only, writes keep the
+        estimate up to date, so later calls are cheap and take no lock.
+        """
+        # Reads a counter without the index lock, which an index build holds
+        trigrams = self._trigrams
+        trigram_bytes = trigrams.memory_usage() if trigrams is not None else 0
+        store_bytes = self._store_bytes
+        if store_bytes is None:
+            with self._lock.read():
+                index = self.vector_store.index
+                docs = getattr(self.vector_store.docstore, "_dict", {})
+                store_bytes = (
+                    index.ntotal * index.d * 4
+                    + sum(len(doc.page_content) for doc in docs.values())
+                    + sum(len(path) for path in self.file_paths) * 2
+                )
+                self._store_bytes = store_bytes
+        return store_bytes + trigram_bytes
+
+    def _chunk_bytes(self, texts: List[str]) -> int:
+        """Estimated bytes of chunks in the vector store, vectors and texts."""
+        return len(texts) * self.vector_store.index.d * 4 + sum(map(len, texts))
+
+    def _grow(self, delta: int):
+        """Update the memory estimate, called with the write lock held."""
+        if self._store_bytes is not None:
+            self._store_bytes += delta
+
+    def _update_indexes(self, notes: dict[str, str]):
+        """
+        Index new note contents by path, in the indexes already built.
+
+        Called without the library lock, which the index builds take.
+        """
+        with self._index_lock:
+            for path, content in notes.items():
+                if self._trigrams is not None:
+                    self._trigrams.add(path, content)
+                if self._note_names is not None:
+                    self._note_names.add(
+                        pathlib.Path(path).stem, frontmatter_aliases(content)
+                    )
+
+    def _trigram_index(self) -> TrigramIndex:
+        """The trigram index, built from the vault files on first use."""
+        with self._index_lock:
+            if self._trigrams is None:
+                with self._lock.read():
+                    file_paths = list(self.file_paths)
+                index = TrigramIndex()
+                for path in file_paths:
+                    with open(path, "r", encoding="utf-8") as f:
+                        index.add(path, f.read())
+                self._trigrams = index
+            return self._trigrams
+
+    def _note_name_index(self) -> NoteNameIndex:
+        """The note name index, built from the vault files on first use."""
+        with self._index_lock:
+            if self._note_names is None:
+                with self._lock.read():
+                    file_paths = list(self.file_paths)
+                index = NoteNameIndex()
+                for path in file_paths:
+                    with open(path, "r", encoding="utf-8") as f:
+                        index.add(
+                            pathlib.Path(path).stem, frontmatter_aliases(f.read())
+                        )
+                self._note_names = index
+            return self._note_names
+
+    @profile_calls("library")
+    def resolve_note_name(
+        self, note_name: str
+    ) -> tuple[Optional[str], List[NameMatch]]:
+        """
+        Find the note meant by a name that matches no note exactly.
+
+        Names and frontmatter aliases are matched ignoring case, separators
+        and filler words like "notes", and tolerating typos.
+
+        Args:
+            note_name (str): The requested note name.
+
+        Returns:
+            tuple[Optional[str], List[NameMatch]]: The name of the note when
+                one matches confidently, else None, and the closest notes.
+        """
+        index = self._note_name_index()
+        with self._index_lock:
+            return index.resolve(note_name)
+
+    @profile_calls("library")
+    def grep_notes(
+        self,
+        pattern: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> tuple[List[GrepMatch], bool]:
+        """
+        Find the note lines matching a substring or a regex.
+
+        The trigram index narrows the notes down to those that can match,
+        only these are read and searched.
+
+        Args:
+            pattern (str): The substring or regex to search for.
+            regex (bool): Whether the pattern is a regex.
+            ignore_case (bool): Whether to ignore case.
+            offset (int): The number of matching lines to skip.
+            limit (int): The maximum number of matching lines to return.
+
+        Returns:
+            tuple[List[GrepMatch], bool]: The matching lines, ordered by note
+                path and line, and whether more lines match.
+        """
+        matcher = compile_pattern(pattern, regex, ignore_case)
+        index = self._trigram_index()
+        with self._index_lock:
+            candidates = sorted(index.candidates(required_literals(pattern, regex)))
+
+        matches: List[GrepMatch] = []
+        for path in candidates:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                continue
+            note_name = pathlib.Path(path).stem
+            for number, line in enumerate(text.splitlines(), start=1):
+                if matcher.search(line):
+                    matches.append(GrepMatch(note_name, number, line))
+                    if len(matches) > offset + limit:
+                        return matches[offset : offset + limit], True
+        return matches[offset:], False
+
+    @profile_calls("library")
     def search_notes(self, keywords: str, k: int = 5) -> List[Document]:
         """Search notes in the vector store based on keywords"""
-        return self.vector_store.similarity_search(keywords, k)
+        # Embedding calls the provider, it is timed apart from the search
+        with METRICS.time(EMBED_QUERY_SECONDS):
+            embedding = self.vector_store.embeddings.embed_query(keywords)  # type: ignore[union-attr]
+        with self._lock.read(), METRICS.time(VECTOR_SEARCH_SECONDS):
+            return self.vector_store.similarity_search_by_vector(embedding, k)
 
 
 def find_and_extract_section(text: str, search_string: str) -> Optional[str]:
@@ -200,3 +748,111 @@ def find_and_extract_section(text: str, search_string: str) -> Optional[str]:
 
     except ValueError:
         return None
+
+
+EDIT_OPERATIONS = ("append", "replace_section", "insert_under_heading", "patch")
+
+# Markdown heading lines, the level and the title
+HEADING = re.compile(r"^(#{1,6})[ \t]+(.*?)[ \t#]*$", re.MULTILINE)
+
+
+def find_section_span(text: str, heading: str) -> Optional[tuple[int, int, int]]:
+    """
+    Locate a section by its heading, like `find_and_extract_section`.
+
+    The section is the first heading line containing `heading` and runs up to
+    the next heading of the same or a higher level.
+
+    Args:
+        text (str): The note content.
+        heading (str): Text of the heading, without the leading `#`.
+
+    Returns:
+        Optional[tuple[int, int, int]]: Offsets of the heading line, of the
+            section body and of the end of the section, or None.
+    """
+    heading = heading.strip().lstrip("#").strip()
+    headings = list(HEADING.finditer(text))
+    for i, match in enumerate(headings):
+        if heading not in match.group(2):
+            continue
+        level = len(match.group(1))
+        end = len(text)
+        for following in headings[i + 1 :]:
+            if len(following.group(1)) <= level:
+                end = following.start()
+                break
+        body_start = min(match.end() + 1, len(text))
+        return match.start(), body_start, end
+    return None
+
+
+def _section_or_error(text: str, section: Optional[str]) -> tuple[int, int, int]:
+    if not section:
+        raise ValueError("A section heading is required for this edit")
+    span = find_section_span(text, section)
+    if span is None:
+        headings = ", ".join(m.group(2) for m in HEADING.finditer(text)) or "none"
+        raise ValueError(f"Section '{section}' not found, the headings are: {headings}")
+    return span
+
+
+def apply_note_edit(
+    content: str,
+    operation: str,
+    text: str,
+    section: Optional[str] = None,
+    find: Optional[str] = None,
+) -> str:
+    """
+    Apply an edit to the content of a note.
+
+    Operations:
+        append: Add `text` at the end of the note.
+        replace_section: Replace the body of `section`, keeping its heading.
+        insert_under_heading: Add `text` at the end of the body of `section`.
+        patch: Replace `find`, which must occur exactly once, with `text`.
+
+    Args:
+        content (str): The note content.
+        operation (str): One of EDIT_OPERATIONS.
+        text (str): The text to add or the replacement text.
+        section (Optional[str]): The heading of the edited section.
+        find (Optional[str]): The text replaced by a patch.
+
+    Returns:
+        str: The edited content.
+    """
+    block = text.strip("\n")
+    if operation == "append":
+        return content.rstrip("\n") + "\n\n" + block + "\n"
+    if operation == "replace_section":
+        _, body_start, end = _section_or_error(content, section)
+        tail = "\n" if end < len(content) else ""
+        return content[:body_start] + "\n" + block + "\n" + tail + content[end:]
+    if operation == "insert_under_heading":
+        _, body_start, end = _section_or_error(content, section)
+        body = content[body_start:end].rstrip("\n")
+        tail = "\n" if end < len(content) else ""
+        separator = "\n\n" if body.strip() else "\n"
+        return (
+            content[:body_start]
+            + body
+            + separator
+            + block
+            + "\n"
+            + tail
+            + content[end:]
+        )
+    if operation == "patch":
+        if not find:
+            raise ValueError("The text to replace is required for a patch")
+        count = content.count(find)
+        if count != 1:
+            raise ValueError(
+                f"The text to replace must occur once in the note, found {count} times"
+            )
+        return content.replace(find, text)
+    raise ValueError(
+        f"Unknown edit operation '{operation}', use one of {', '.join(EDIT_OPERATIONS)}"
+    )
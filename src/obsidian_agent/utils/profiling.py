@@ -0,0 +1,278 @@
+# obsidian_agent/utils/profiling.py
+import contextvars
+import cProfile
+import functools
+import io
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+# Profiling is off unless PROFILE_DIR is set. PROFILE_TARGETS limits it to
+# some targets ("tools,library,rag"), PROFILE_MEMORY=1 adds tracemalloc and
+# PROFILE_MIN_SECONDS skips the reports of fast calls.
+PROFILE_DIR = "PROFILE_DIR"
+PROFILE_TARGETS = "PROFILE_TARGETS"
+PROFILE_MEMORY = "PROFILE_MEMORY"
+PROFILE_MIN_SECONDS = "PROFILE_MIN_SECONDS"
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+# The profile of the running call, per thread and per asyncio task
+_active: contextvars.ContextVar[Optional["Profile"]] = contextvars.ContextVar(
+    "obsidian_agent_profile", default=None
+)
+_report_ids = itertools.count(1)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+# Profiled calls in flight in the process
+_running_lock = threading.Lock()
+_running: set["Profile"] = set()
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    seconds: float
+    allocated_blocks: int
+    traced_bytes: Optional[int] = None
+
+
+class Profile:
+    """The phases of a profiled call, e.g. the steps of an index build."""
+
+    def __init__(self, memory: bool):
+        self.memory = memory
+        self.phases: list[PhaseStats] = []
+        # Set when other profiled calls ran at the same time
+        self.overlapped = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        blocks = sys.getallocatedblocks()
+        traced = tracemalloc.get_traced_memory()[0] if self.memory else None
+        try:
+            yield
+        finally:
+            self.phases.append(
+                PhaseStats(
+                    name,
+                    time.perf_counter() - start,
+                    sys.getallocatedblocks() - blocks,
+                    tracemalloc.get_traced_memory()[0] - traced
+                    if traced is not None
+                    else None,
+                )
+            )
+
+
+class _NullProfile:
+    def phase(self, name: str):
+        return nullcontext()
+
+
+NULL_PROFILE = _NullProfile()
+
+
+def _profile_dir(target: str) -> Optional[str]:
+    directory = os.environ.get(PROFILE_DIR)
+    if not directory:
+        return None
+    targets = os.environ.get(PROFILE_TARGETS)
+    if targets and target not in {t.strip() for t in targets.split(",")}:
+        return None
+    return directory
+
+
+def current_profile() -> "Profile | _NullProfile":
+    """The profile of the running call, to record phases."""
+    return _active.get() or NULL_PROFILE
+
+
+def _start_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+@contextmanager
+def profiled(target: str, name: str) -> Iterator["Profile | _NullProfile"]:
+    """
+    Profile a block when profiling is enabled for `target`.
+
+    A cProfile dump (`.prof`, readable with pstats or snakeviz) and a text
+    report with the wall time, allocation counts, phases, top functions
+    and, with PROFILE_MEMORY, top allocation sites are written to
+    PROFILE_DIR. Blocks nested in a profiled block of the same thread or
+    asyncio task are part of the outer report.
+
+    Allocation counts, traced bytes and cProfile hooks are process-wide, so
+    they describe one call only when no other profiled call runs alongside
+    it. A call started while others run gets no cProfile or tracemalloc
+    data, and the reports of calls that overlapped say so.
+
+    Args:
+        target (str): The profiling target, e.g. `tools`, `library` or `rag`.
+        name (str): The profiled call, used in the report file names.
+
+    Yields:
+        Profile: Records the phases of the call, a no-op when disabled.
+    """
+    directory = _profile_dir(target)
+    if directory is None or _active.get() is not None:
+        yield NULL_PROFILE
+        return
+
+    memory = os.environ.get(PROFILE_MEMORY, "").lower() in ("1", "true", "yes")
+    with _running_lock:
+        alone = not _running
+        for other in _running:
+            other.overlapped = True
+        profile = Profile(memory and alone)
+        profile.overlapped = not alone
+        _running.add(profile)
+    # Only one profiler can hook the interpreter, the first call takes it
+    profiler: Optional[cProfile.Profile] = cProfile.Profile() if alone else None
+    memory = profile.memory
+    if memory:
+        _start_tracing()
+        tracemalloc.reset_peak()
+    traced_before = tracemalloc.get_traced_memory()[0] if memory else 0
+    blocks_before = sys.getallocatedblocks()
+    token = _active.set(profile)
+    start = time.perf_counter()
+    try:
+        try:
+            if profiler is not None:
+                profiler.enable()
+        except ValueError:
+            # Another profiler is active, e.g. one outside this module
+            profiler = None
+        yield profile
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+        allocated_blocks = sys.getallocatedblocks() - blocks_before
+        _active.reset(token)
+        with _running_lock:
+            _running.discard(profile)
+        snapshot, traced = None, None
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            traced = (current - traced_before, peak - traced_before)
+            snapshot = tracemalloc.take_snapshot()
+            _stop_tracing()
+
+        min_seconds = float(os.environ.get(PROFILE_MIN_SECONDS) or 0)
+        if seconds >= min_seconds:
+            _write_report(
+                directory,
+                target,
+                name,
+                seconds,
+                allocated_blocks,
+                profiler,
+                profile,
+                traced,
+                snapshot,
+            )
+
+
+def profile_calls(target: str) -> Callable[[Callable], Callable]:
+    """Decorator profiling every call of a function, see `profiled`."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _profile_dir(target) is None:
+                return fn(*args, **kwargs)
+            with profiled(target, fn.__qualname__):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _write_report(
+    directory: str,
+    target: str,
+    name: str,
+    seconds: float,
+    allocated_blocks: int,
+    profiler: Optional[cProfile.Profile],
+    profile: Profile,
+    traced: Optional[tuple[int, int]],
+    snapshot: Optional[tracemalloc.Snapshot],
+):
+    directory = os.path.expanduser(directory)
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+    stem = os.path.join(
+        directory,
+        f"{time.strftime('%Y%m%dT%H%M%S')}-{target}-{slug}-{os.getpid()}-{next(_report_ids)}",
+    )
+
+    lines = [
+        f"call: {target}/{name}",
+        f"wall_seconds: {seconds:.6f}",
+        f"allocated_blocks: {allocated_blocks}",
+    ]
+    if profile.overlapped:
+        lines.append("overlapped: true (allocation counts include other calls)")
+    if traced is not None:
+        lines += [f"traced_bytes: {traced[0]}", f"traced_peak_bytes: {traced[1]}"]
+    if profile.phases:
+        lines += ["", "phases:"]
+        for phase in profile.phases:
+            line = (
+                f"  {phase.name:<24} {phase.seconds:.6f}s "
+                f"blocks={phase.allocated_blocks}"
+            )
+            if phase.traced_bytes is not None:
+                line += f" traced_bytes={phase.traced_bytes}"
+            lines.append(line)
+
+    if profiler is not None:
+        profiler.dump_stats(stem + ".prof")
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        lines += ["", stream.getvalue()]
+
+    if snapshot is not None:
+        snapshot = snapshot.filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ]
+        )
+        lines += ["", "top allocations:"]
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            lines.append(f"  {stat}")
+
+    with open(stem + ".txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
@@ -1,27 +1,52 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
-from src.obsidian_agent.utils.obsidian import ObsidianLibrary
+from obsidian_agent.utils.obsidian import ObsidianLibrary
+from obsidian_agent.utils.profiling import current_profile, profile_calls
 
 
-def create_vector_store(obsidian_path: str, store_path: Optional[str] = None) -> FAISS:
+def split_documents(docs: List[Document]) -> List[Document]:
+    """
+    Splits note documents into the chunks stored in the vector store.
+
+    Args:
+        docs (List[Document]): The note documents.
+
+    Returns:
+        List[Document]: The chunks, keeping the metadata of their note.
+    """
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=7500,
+        chunk_overlap=200,
+    )
+    return text_splitter.split_documents(docs)
+
+
+@profile_calls("rag")
+def create_vector_store(
+    obsidian_path: str,
+    store_path: Optional[str] = None,
+    embeddings: Optional[Embeddings] = None,
+) -> FAISS:
     """
     Creates a FAISS vector store from a list of documents.
 
     Args:
         docs (List[Document]): A list of Document objects containing the content to be stored.
         store_path (Optional[str]): The path to store the vector store locally. If None, the vector store will not be stored.
+        embeddings (Optional[Embeddings]): The embedding model, OpenAI embeddings by default.
 
     Returns:
         FAISS: The FAISS vector store containing the documents.
     """
-    embedding_model = OpenAIEmbeddings()
+    embedding_model = embeddings or OpenAIEmbeddings()
 
     if store_path is not None:
         if Path(store_path).exists():
@@ -30,27 +55,26 @@ def create_vector_store(obsidian_path: str, store_path: Optional[str] = None) ->
             )
             return FAISS.load_local(store_path, embedding_model)
 
-    file_paths = [*Path(obsidian_path).rglob("*.md")]
-    docs = []
-    for path in file_paths:
-        with open(path, "r", encoding="utf-8") as f:
-            text = f.read()
-            docs.append(Document(page_content=text, metadata={"path": path}))
-
-    # Creating text splitter
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=7500,
-        chunk_overlap=200,
-    )
+    profile = current_profile()
+    with profile.phase("load"):
+        file_paths = [*Path(obsidian_path).rglob("*.md")]
+        docs = []
+        for path in file_paths:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+                docs.append(Document(page_content=text, metadata={"path": path}))
 
-    texts = text_splitter.split_documents(docs)
+    with profile.phase("split"):
+        texts = split_documents(docs)
 
     # Create the FAISS vector store
-    store = FAISS.from_documents(texts, embedding_model)
+    with profile.phase("embed"):
+        store = FAISS.from_documents(texts, embedding_model)
 
     # Save the vector store locally if a path is provided
     if store_path:
-        store.save_local(store_path)
+        with profile.phase("save"):
+            store.save_local(store_path)
         print(f"Store saved to {store_path}")
     return store
 
@@ -0,0 +1,137 @@
+# obsidian_agent/utils/trigram.py
+import re
+from re import _constants as sre_constants  # type: ignore[attr-defined]
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import Iterable, Optional
+
+_REPEATS = {
+    sre_constants.MAX_REPEAT,
+    sre_constants.MIN_REPEAT,
+    sre_constants.POSSESSIVE_REPEAT,
+}
+
+
+def trigrams(text: str) -> set[str]:
+    """Case folded trigrams of a text."""
+    text = text.casefold()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: str, regex: bool = False) -> list[str]:
+    """
+    Strings every match of a pattern contains.
+
+    For a regex only the literal runs that all matches must contain are
+    kept, alternatives and optional parts are skipped. The result may miss
+    literals but never holds one a match can lack.
+
+    Args:
+        pattern (str): A substring, or a regex when `regex` is set.
+        regex (bool): Whether the pattern is a regex.
+
+    Returns:
+        list[str]: The required strings.
+    """
+    if not regex:
+        return [pattern]
+    return _literal_runs(sre_parse.parse(pattern))
+
+
+def _literal_runs(items: Iterable) -> list[str]:
+    runs: list[str] = []
+    run: list[str] = []
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        if op is sre_constants.AT:
+            # Anchors match no characters, the run goes on
+            continue
+        if run:
+            runs.append("".join(run))
+            run = []
+        if op is sre_constants.SUBPATTERN:
+            runs.extend(_literal_runs(av[-1]))
+        elif op is sre_constants.ATOMIC_GROUP:
+            runs.extend(_literal_runs(av))
+        elif op in _REPEATS and av[0] >= 1:
+            runs.extend(_literal_runs(av[2]))
+    if run:
+        runs.append("".join(run))
+    return runs
+
+
+class TrigramIndex:
+    """
+    Inverted index from the trigrams of documents to the documents.
+
+    Trigrams are case folded, so the candidates of a query are a superset of
+    its matches both with and without case sensitivity. The index is not
+    thread safe, its owner serializes access.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, set[str]] = {}
+        self._documents: dict[str, set[str]] = {}
+        # Number of (trigram, document) pairs, for the memory estimate
+        self._pairs = 0
+
+    def add(self, key: str, text: str):
+        """Index a document, replacing its previous text."""
+        self.remove(key)
+        grams = trigrams(text)
+        self._documents[key] = grams
+        self._pairs += len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: str):
+        grams = self._documents.pop(key, set())
+        self._pairs -= len(grams)
+        for gram in grams:
+            postings = self._postings[gram]
+            postings.discard(key)
+            if not postings:
+                del self._postings[gram]
+
+    def candidates(self, literals: Iterable[str]) -> set[str]:
+        """
+        Documents containing all trigrams of the given strings.
+
+        Args:
+            literals (Iterable[str]): Strings a matching document contains.
+
+        Returns:
+            set[str]: The candidate documents, all of them when the strings
+                are too short to narrow them down.
+        """
+        grams = set().union(*(trigrams(literal) for literal in literals))
+        result: Optional[set[str]] = None
+        # Intersect the rarest trigrams first
+        for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+            postings = self._postings.get(gram)
+            if not postings:
+                return set()
+            result = postings.copy() if result is None else result & postings
+            if not result:
+                break
+        return set(self._documents) if result is None else result
+
+    def memory_usage(self) -> int:
+        """Rough estimate of the bytes held by the index."""
+        return self._pairs * 2 * 64
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._documents
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+
+def compile_pattern(pattern: str, regex: bool = False, ignore_case: bool = False):
+    """Compile a substring or regex query, raising ValueError when invalid."""
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        return re.compile(pattern if regex else re.escape(pattern), flags)
+    except re.error as e:
+        raise ValueError(f"Invalid regex '{pattern}': {e}")
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.apps.sessions import SessionThreads
+
+
+class FakeThreads:
+    def __init__(self):
+        self.created = 0
+
+    async def create(self, **kwargs):
+        self.created += 1
+        return {"thread_id": f"thread-{self.created}"}
+
+
+def test_one_thread_per_session():
+    """
+    A session reuses its thread until it is reset, sessions do not share one.
+    """
+    client = SimpleNamespace(threads=FakeThreads())
+    threads = SessionThreads(client)
+
+    async def run():
+        first = [await threads.get("a") for _ in range(3)]
+        other = await threads.get("b")
+        threads.reset("a")
+        return first, other, await threads.get("a")
+
+    first, other, after_reset = asyncio.run(run())
+
+    assert first == ["thread-1"] * 3
+    assert other == "thread-2"
+    assert after_reset == "thread-3"
+    assert client.threads.created == 3
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.apps.streaming import StreamTimings, stream_assistant
+
+
+class FakeRuns:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = []
+
+    async def stream(self, thread_id, **kwargs):
+        self.calls.append((thread_id, kwargs))
+        for event, data in self.chunks:
+            yield SimpleNamespace(event=event, data=data)
+
+
+def collect(client, timings=None):
+    async def run():
+        return [
+            event
+            async for event in stream_assistant(
+                client, "t1", "obsidian_assistant", {"messages": []}, timings
+            )
+        ]
+
+    return asyncio.run(run())
+
+
+def test_stream_tokens_and_tool_progress():
+    """
+    Tokens come only from the assistant node, tool calls and their results
+    are reported from node updates.
+    """
+    assistant = {"langgraph_node": "obsidian_assistant"}
+    tool_call = {"id": "c1", "name": "ReadNote", "args": {"note_name": "NoteA"}}
+    client = SimpleNamespace(
+        runs=FakeRuns(
+            [
+                ("metadata", {"run_id": "r1"}),
+                ("messages", ({"content": ""}, assistant)),
+                (
+                    "updates",
+                    {"obsidian_assistant": {"messages": [{"tool_calls": [tool_call]}]}},
+                ),
+                ("messages", ({"content": "note body"}, {"langgraph_node": "tools"})),
+                (
+                    "updates",
+                    {"tools": {"messages": [{"tool_call_id": "c1", "content": "ok"}]}},
+                ),
+                ("messages", ({"id": "m2", "content": "Hel"}, assistant)),
+                (
+                    "messages",
+                    (
+                        {"id": "m2", "content": [{"type": "text", "text": "lo"}]},
+                        assistant,
+                    ),
+                ),
+            ]
+        )
+    )
+    timings = StreamTimings()
+
+    events = collect(client, timings)
+
+    assert [(e.kind, e.text) for e in events] == [
+        ("tool_call", "ReadNote(note_name='NoteA')"),
+        ("tool_result", "ok"),
+        ("token", "Hel"),
+        ("token", "lo"),
+    ]
+    assert events[1].tool_name == "ReadNote"
+    assert [e.message_id for e in events[2:]] == ["m2", "m2"]
+    assert client.runs.calls[0][1]["stream_mode"] == ["messages-tuple", "updates"]
+    assert timings.first_token is not None
+    assert timings.total >= timings.first_token
+
+
+def test_stream_raises_on_error_event():
+    client = SimpleNamespace(runs=FakeRuns([("error", {"message": "boom"})]))
+    try:
+        collect(client)
+    except RuntimeError as e:
+        assert "boom" in str(e)
+    else:
+        raise AssertionError("error event was not raised")
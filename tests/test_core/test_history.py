@@ -0,0 +1,90 @@
+import os
+import sys
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.history import (
+    EVICTED_MARKER,
+    apply_replacements,
+    dedupe_notes,
+    estimate_tokens,
+    evict_tool_outputs,
+    find_summary_cut,
+)
+
+
+def make_turn(i, note_text):
+    """One user turn with a ReadNote tool call and its (large) result."""
+    return [
+        HumanMessage(content=f"Read note {i}", id=f"h{i}"),
+        AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "ReadNote", "args": {"note_name": f"N{i}"}, "id": f"c{i}"}
+            ],
+            id=f"a{i}",
+        ),
+        ToolMessage(content=note_text, tool_call_id=f"c{i}", id=f"t{i}"),
+        AIMessage(content=f"Here is note {i}", id=f"r{i}"),
+    ]
+
+
+def test_evict_tool_outputs_keeps_recent_and_small_outputs():
+    """
+    Large tool outputs before the cut are replaced, everything else is kept.
+    """
+    messages = make_turn(1, "x" * 2000) + make_turn(2, "short") + make_turn(3, "y" * 2000)
+    replacements = evict_tool_outputs(messages, end=8)
+
+    assert [m.id for m in replacements] == ["t1"]
+    assert replacements[0].content.startswith(EVICTED_MARKER)
+    assert "ReadNote(note_name='N1')" in replacements[0].content
+    assert replacements[0].tool_call_id == "c1"
+
+    compacted = apply_replacements(messages, replacements)
+    assert estimate_tokens(compacted) < estimate_tokens(messages)
+    assert compacted[10].content == "y" * 2000
+
+    # Already evicted outputs are not replaced again
+    assert evict_tool_outputs(compacted, end=8) == []
+
+
+def test_find_summary_cut_respects_turn_boundaries():
+    """
+    The summary cut lands on a user message and keeps the most recent exchange.
+    """
+    messages = make_turn(1, "a" * 400) + make_turn(2, "b" * 400) + make_turn(3, "c")
+    messages.append(HumanMessage(content="And now?", id="h4"))
+
+    cut = find_summary_cut(messages, token_budget=10, keep_turns=1)
+    assert cut == 8
+    assert isinstance(messages[cut], HumanMessage)
+
+    assert find_summary_cut(messages, token_budget=10**6) == 4
+    assert find_summary_cut(messages[:5], token_budget=10) is None
+
+
+def test_dedupe_notes_references_unchanged_notes():
+    """
+    Notes sent before are referenced while their output is in the history.
+    """
+    note = "# N1\n" + "x" * 500
+    messages = make_turn(1, note)
+    texts, sent = dedupe_notes(messages, {}, [("N1", note)], "c1")
+    assert texts == [note]
+
+    messages += make_turn(2, "")
+    texts, sent = dedupe_notes(
+        messages, sent, [("N1", note), ("N1", note + "edited"), ("N2", "short")], "c2"
+    )
+    assert texts[0].startswith("[N1 is unchanged")
+    assert "ReadNote(note_name='N1')" in texts[0]
+    assert texts[1:] == [note + "edited", "short"]
+    assert sorted(sent.values()) == ["c1", "c2"]
+
+    # Once the output holding the note is evicted, the note is sent again
+    evicted = apply_replacements(messages, evict_tool_outputs(messages, end=4))
+    texts, sent = dedupe_notes(evicted, sent, [("N1", note)], "c3")
+    assert texts == [note]
+    assert sorted(sent.values()) == ["c2", "c3"]
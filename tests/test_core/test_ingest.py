@@ -0,0 +1,192 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import START, MessagesState, StateGraph
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.ingest import ingest_urls, note_name_for
+from src.obsidian_agent.core.nodes import tools
+from src.obsidian_agent.utils.fetch import Fetcher
+
+
+class Handler(BaseHTTPRequestHandler):
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with Handler.lock:
+            Handler.active += 1
+            Handler.max_active = max(Handler.max_active, Handler.active)
+        time.sleep(0.05)
+        with Handler.lock:
+            Handler.active -= 1
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = f"<html><head><title>Page {self.path[1:]}</title></head><body><p>Text</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.max_active = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class FakeModel:
+    """Writes a note from the page title and records concurrent calls."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def ainvoke(self, messages):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        title = messages[-1].content.split("Title: ")[1].split("\n")[0]
+        return SimpleNamespace(content=f"# {title}\n\nSummary of {title}.")
+
+
+class FakeLibrary:
+    def __init__(self, file_names):
+        self.file_names = list(file_names)
+        self.notes = {}
+        self.indexed = []
+
+    def has_note(self, note_title):
+        return f"{note_title}.md" in self.file_names
+
+    def put_notes(self, notes):
+        for note_title, content in notes.items():
+            self.notes[note_title] = content
+            self.file_names.append(f"{note_title}.md")
+        self.indexed.append(dict(notes))
+        return list(notes)
+
+
+def test_ingest_urls(server):
+    """
+    Pages are fetched and summarized within the concurrency limits, written
+    as notes and indexed in one batch, failures are reported per URL.
+    """
+    urls = [f"{server}/{i}" for i in range(6)] + [f"{server}/missing", f"{server}/0"]
+    library = FakeLibrary(["Page 1.md"])
+    model = FakeModel()
+
+    results = asyncio.run(
+        ingest_urls(
+            urls,
+            library,
+            model,
+            Fetcher(),
+            max_fetches=8,
+            max_per_host=2,
+            max_llm_calls=3,
+        )
+    )
+
+    assert len(results) == 7
+    assert results[-1].note_name is None and "404" in results[-1].error
+    assert [r.note_name for r in results[:3]] == ["Page 0", "Page 1 (2)", "Page 2"]
+    assert library.notes["Page 0"].endswith(f"Source: {server}/0\n")
+    assert len(library.indexed) == 1 and len(library.indexed[0]) == 6
+    assert Handler.max_active == 2
+    assert model.max_active <= 3
+
+
+class TimedFetcher:
+    """Records the order in which fetches start."""
+
+    def __init__(self):
+        self.started = []
+
+    def fetch(self, url):
+        self.started.append(url)
+        time.sleep(0.05)
+        return f"Title: {url.rsplit('/', 1)[1]}\n"
+
+
+def test_busy_hosts_do_not_block_other_hosts():
+    urls = [f"http://a.test/{i}" for i in range(3)] + ["http://b.test/b"]
+    fetcher = TimedFetcher()
+
+    asyncio.run(
+        ingest_urls(
+            urls,
+            FakeLibrary([]),
+            FakeModel(),
+            fetcher,
+            max_fetches=2,
+            max_per_host=1,
+            max_llm_calls=3,
+        )
+    )
+
+    assert fetcher.started[:2] == ["http://a.test/0", "http://b.test/b"]
+
+
+def test_note_name_for():
+    assert note_name_for("# A: B/C\n\ntext", "", "http://x") == "A B C"
+    assert note_name_for("text", "Title: Page\n", "http://x") == "Page"
+    assert note_name_for("text", "", "https://example.com/a") == "example.com a"
+
+
+def test_tools_node_awaits_async_tools_on_the_running_loop(monkeypatch):
+    """
+    Async runs await IngestURLs on their own loop and run sync tools in the
+    executor, sync runs still run both.
+    """
+    loops = {}
+
+    async def ingest(state, config, store):
+        loops["ingest"] = asyncio.get_running_loop()
+        return {"messages": [AIMessage(content="ingested")]}
+
+    def search(state, config, store):
+        loops["search"] = threading.current_thread()
+        return {"messages": [AIMessage(content="found")]}
+
+    monkeypatch.setitem(tools.TOOL_NODES, "IngestURLs", ingest)
+    monkeypatch.setitem(tools.TOOL_NODES, "SearchNotes", search)
+    builder = StateGraph(MessagesState)
+    builder.add_node("tools", RunnableLambda(tools.tools_node, afunc=tools.atools_node))
+    builder.add_edge(START, "tools")
+    graph = builder.compile()
+
+    def call(name):
+        tool_call = {"name": name, "args": {}, "id": "call-1"}
+        return {"messages": [AIMessage(content="", tool_calls=[tool_call])]}
+
+    async def run():
+        state = await graph.ainvoke(call("IngestURLs"))
+        assert loops.pop("ingest") is asyncio.get_running_loop()
+        assert state["messages"][-1].content == "ingested"
+        state = await graph.ainvoke(call("SearchNotes"))
+        assert loops.pop("search") is not threading.current_thread()
+        assert state["messages"][-1].content == "found"
+
+    asyncio.run(run())
+    assert graph.invoke(call("IngestURLs"))["messages"][-1].content == "ingested"
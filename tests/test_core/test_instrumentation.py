@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import START, MessagesState, StateGraph
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core import instrumentation
+from src.obsidian_agent.core.instrumentation import instrument_node, with_metrics
+from src.obsidian_agent.utils.metrics import (
+    LLM_SECONDS,
+    LLM_TOKENS,
+    NODE_ERRORS,
+    NODE_SECONDS,
+)
+
+
+@pytest.fixture
+def metrics():
+    metrics = instrumentation.METRICS
+    metrics.enabled = True
+    metrics.reset()
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
+
+
+def test_instrumented_node_receives_config(metrics):
+    """
+    LangGraph still passes the config to a wrapped node, and the node runs
+    and errors are recorded.
+    """
+    seen = {}
+
+    def node(state: MessagesState, config: RunnableConfig):
+        seen["user_id"] = config["configurable"]["user_id"]
+        if state["messages"][-1].content == "fail":
+            raise RuntimeError("failed")
+        return {"messages": [AIMessage(content="ok")]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("node", instrument_node("node", node))
+    builder.add_edge(START, "node")
+    graph = builder.compile()
+
+    graph.invoke({"messages": [("user", "hi")]}, {"configurable": {"user_id": "u1"}})
+    assert seen["user_id"] == "u1"
+    assert metrics.value(NODE_SECONDS, node="node") == 1
+
+    with pytest.raises(RuntimeError):
+        graph.invoke(
+            {"messages": [("user", "fail")]}, {"configurable": {"user_id": "u1"}}
+        )
+    assert metrics.value(NODE_SECONDS, node="node") == 2
+    assert metrics.value(NODE_ERRORS, node="node") == 1
+
+
+def test_model_calls_record_latency_and_tokens(metrics):
+    usage = {
+        "input_tokens": 120,
+        "output_tokens": 30,
+        "total_tokens": 150,
+        "input_token_details": {"cache_read": 100},
+    }
+    model = GenericFakeChatModel(
+        messages=iter([AIMessage(content="a", usage_metadata=usage)] * 2)
+    )
+
+    instrumented = with_metrics(model, "summary")
+    assert with_metrics(model, "summary") is instrumented
+    instrumented.invoke("hello")
+    instrumented.invoke("hello")
+
+    assert metrics.value(LLM_SECONDS, role="summary") == 2
+    assert metrics.value(LLM_TOKENS, role="summary", type="prompt") == 240
+    assert metrics.value(LLM_TOKENS, role="summary", type="completion") == 60
+    assert metrics.value(LLM_TOKENS, role="summary", type="cached_prompt") == 200
+
+
+def test_disabled_metrics_leave_models_unchanged():
+    model = GenericFakeChatModel(messages=iter([]))
+    assert with_metrics(model, "assistant") is model
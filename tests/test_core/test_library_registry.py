@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.library_registry import (
+    LibraryRegistry,
+    load_vault,
+    vault_path,
+)
+
+
+class FakeLibrary:
+    def __init__(self, vault_id, size):
+        self.vault_id = vault_id
+        self.size = size
+        self.flushes = 0
+
+    def memory_usage(self):
+        return self.size
+
+    def flush(self):
+        self.flushes += 1
+
+
+def make_registry(max_bytes, sizes=None, delay=0.0):
+    loads = []
+
+    def load(vault_id):
+        loads.append(vault_id)
+        time.sleep(delay)
+        return FakeLibrary(vault_id, (sizes or {}).get(vault_id, 100))
+
+    return LibraryRegistry(load, max_bytes=max_bytes), loads
+
+
+def test_libraries_are_loaded_once_and_kept():
+    registry, loads = make_registry(max_bytes=1000)
+
+    assert registry.get("alice").vault_id == "alice"
+    assert registry.get("bob").vault_id == "bob"
+    assert registry.get("alice") is registry.get("alice")
+    assert loads == ["alice", "bob"]
+    assert registry.memory_usage() == 200
+
+
+def test_least_recently_used_libraries_are_evicted():
+    """
+    Loading a vault over the memory budget drops the least recently used
+    vaults, which are loaded again on their next use.
+    """
+    registry, loads = make_registry(max_bytes=250)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+
+    assert "b" not in registry
+    assert "a" in registry and "c" in registry
+    registry.get("b")
+    assert loads == ["a", "b", "c", "b"]
+
+
+def test_evicted_libraries_are_flushed_and_reused_while_in_use():
+    """
+    A library dropped while a request still holds it saves its changes and
+    is handed out again, rather than loaded a second time.
+    """
+    registry, loads = make_registry(max_bytes=150)
+    held = registry.get("a")
+    registry.get("b")
+
+    assert "a" not in registry and held.flushes == 1
+    assert registry.get("a") is held
+    assert loads == ["a", "b"]
+
+    registry.evict("a")
+    assert held.flushes == 2
+    del held
+    registry.get("a")
+    assert loads == ["a", "b", "a"]
+
+
+def test_a_vault_over_the_budget_is_still_served():
+    registry, _ = make_registry(max_bytes=50, sizes={"big": 500})
+    registry.get("small")
+    assert registry.get("big").size == 500
+    assert len(registry) == 1
+
+
+def test_concurrent_requests_load_a_vault_once():
+    registry, loads = make_registry(max_bytes=1000, delay=0.05)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("shared")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loads == ["shared"]
+    assert all(r is results[0] for r in results)
+
+
+def test_vault_ids_of_the_same_vault_share_a_library(tmp_path):
+    (tmp_path / "alice").mkdir()
+    (tmp_path / "alias").symlink_to(tmp_path / "alice")
+    loads = []
+
+    def load(vault_id):
+        loads.append(vault_id)
+        return FakeLibrary(vault_id, 100)
+
+    registry = LibraryRegistry(
+        load, max_bytes=1000, key=lambda vault_id: vault_path(str(tmp_path), vault_id)
+    )
+    assert registry.get("alias") is registry.get("alice")
+    assert loads == ["alias"]
+    assert "alice" in registry and len(registry) == 1
+
+
+@pytest.mark.parametrize("vault_id", ["", "..", "../other", "a/b", ".hidden"])
+def test_invalid_vault_ids_are_rejected(vault_id):
+    registry, loads = make_registry(max_bytes=1000)
+    with pytest.raises(ValueError):
+        registry.get(vault_id)
+    assert loads == []
+
+
+def test_load_vault_builds_and_reuses_the_vector_store(tmp_path):
+    vault = tmp_path / "vaults" / "alice"
+    vault.mkdir(parents=True)
+    (vault / "Garden.md").write_text(
+        "# Garden\n\nTomatoes and basil.", encoding="utf-8"
+    )
+    stores = tmp_path / "stores"
+    embeddings = DeterministicFakeEmbedding(size=8)
+
+    library = load_vault(str(tmp_path / "vaults"), str(stores), "alice", embeddings)
+    assert (stores / "alice").exists()
+    assert library.search_notes("Tomatoes", k=1)[0].metadata["path"].name == "Garden.md"
+    assert library.memory_usage() > 0
+
+    reloaded = load_vault(str(tmp_path / "vaults"), str(stores), "alice", embeddings)
+    assert reloaded.vector_store.index.ntotal == library.vector_store.index.ntotal
+
+    with pytest.raises(FileNotFoundError):
+        load_vault(str(tmp_path / "vaults"), str(stores), "bob", embeddings)
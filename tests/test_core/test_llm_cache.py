@@ -0,0 +1,88 @@
+import os
+import sys
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.outputs import Generation
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.llm_cache import SqliteLLMCache, with_llm_cache
+
+
+class FakeModel(FakeListChatModel):
+    temperature: float = 0
+
+
+def test_cached_responses_survive_restarts(tmp_path):
+    """
+    An identical call is answered from the cache, also by a new cache
+    instance on the same database, while different messages or bound tools
+    are new calls.
+    """
+    path = str(tmp_path / "llm.sqlite")
+    model = FakeModel(
+        responses=["first", "second", "third"], cache=SqliteLLMCache(path)
+    )
+
+    assert model.invoke("hello").content == "first"
+    assert model.invoke("hello").content == "first"
+    assert model.invoke("other").content == "second"
+    assert model.bind(tools=["x"]).invoke("hello").content == "third"
+
+    replay = SqliteLLMCache(path)
+    model.cache = replay
+    assert model.invoke("other").content == "second"
+    assert replay.hits == 1 and replay.misses == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SqliteLLMCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    model = FakeModel(responses=["a", "b", "c", "d"], cache=cache)
+
+    model.invoke("1")
+    model.invoke("2")
+    model.invoke("1")  # 2 is now the least recently used
+    model.invoke("3")
+
+    assert len(cache) == 2
+    assert model.invoke("1").content == "a"
+    assert model.invoke("2").content == "d"
+
+
+def test_inserts_keep_running_totals(tmp_path):
+    """
+    Inserts under the limits do not count the table, the totals follow
+    replaced entries and the table is only counted to evict.
+    """
+    cache = SqliteLLMCache(str(tmp_path / "llm.sqlite"), max_entries=3)
+    counts = []
+    cache._conn.set_trace_callback(
+        lambda statement: counts.append(statement) if "COUNT(*)" in statement else None
+    )
+    generation = [Generation(text="x" * 100)]
+
+    cache.update("1", "model", generation)
+    cache.update("2", "model", generation)
+    cache.update("1", "model", [Generation(text="y")])
+    assert counts == []
+    assert (cache._entries, cache._bytes) == SqliteLLMCache._count(cache._conn)
+    counts.clear()
+
+    cache.update("3", "model", generation)
+    cache.update("4", "model", generation)
+    assert len(counts) == 1
+    assert cache._entries == len(cache) == 3
+
+
+def test_cache_is_enabled_per_call_site(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm.sqlite"))
+    monkeypatch.setenv("LLM_CACHE_SITES", "summary")
+    model = FakeModel(responses=["a"])
+
+    assert with_llm_cache(model, "assistant") is model
+    cached = with_llm_cache(model, "summary")
+    assert isinstance(cached.cache, SqliteLLMCache)
+    assert with_llm_cache(model, "summary") is cached
+
+    # Sampling models are never cached
+    warm = FakeModel(responses=["a"], temperature=0.7)
+    assert with_llm_cache(warm, "summary") is warm
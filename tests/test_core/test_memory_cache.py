@@ -0,0 +1,94 @@
+import gc
+import os
+import sys
+
+from langgraph.store.memory import InMemoryStore
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.memory_cache import MemoryCache
+
+
+class CountingStore(InMemoryStore):
+    """InMemoryStore that counts search round trips."""
+
+    def __init__(self):
+        super().__init__()
+        self.searches = 0
+
+    def search(self, *args, **kwargs):
+        self.searches += 1
+        return super().search(*args, **kwargs)
+
+
+def test_cache_serves_repeated_reads():
+    """
+    Repeated reads of the same namespace hit the store only once.
+    """
+    store = CountingStore()
+    store.put(("profile", "u1"), "p", {"name": "Ann"})
+    cache = MemoryCache()
+
+    for _ in range(3):
+        items = cache.search(store, ("profile", "u1"))
+        assert items[0].value == {"name": "Ann"}
+    assert store.searches == 1
+    assert cache.hits == 2
+
+    cache.search(store, ("profile", "u2"))
+    assert store.searches == 2
+
+
+def test_cache_invalidation_after_put():
+    """
+    Invalidating a namespace makes the next read see the new value.
+    """
+    store = CountingStore()
+    cache = MemoryCache()
+    namespace = ("instructions", "u1")
+    assert cache.search(store, namespace) == []
+
+    store.put(namespace, "user_instructions", {"memory": "short"})
+    cache.invalidate(store, namespace)
+    assert cache.search(store, namespace)[0].value == {"memory": "short"}
+    assert store.searches == 2
+
+
+def test_cache_ttl_expiry():
+    """
+    Entries older than the ttl are fetched again.
+    """
+    store = CountingStore()
+    cache = MemoryCache(ttl_seconds=0)
+    cache.search(store, ("profile", "u1"))
+    cache.search(store, ("profile", "u1"))
+    assert store.searches == 2
+
+
+def test_cache_is_bounded_and_per_store():
+    """
+    Least recently used entries are dropped, collected stores take their
+    entries with them.
+    """
+    store = CountingStore()
+    cache = MemoryCache(max_entries=2)
+    for user in ("u1", "u2", "u1", "u3"):
+        cache.search(store, ("profile", user))
+    assert len(cache) == 2
+    # u1 was used again, so u2 was dropped
+    cache.search(store, ("profile", "u1"))
+    assert store.searches == 3
+    cache.search(store, ("profile", "u2"))
+    assert store.searches == 4
+
+    # Invalidations are bounded too, and still hide older entries
+    for user in ("u1", "u2", "u3"):
+        cache.invalidate(store, ("profile", user))
+    cache.search(store, ("profile", "u1"))
+    assert store.searches == 5
+
+    other = CountingStore()
+    cache.search(other, ("profile", "u1"))
+    assert len(cache) == 2
+    del other
+    gc.collect()
+    assert len(cache) == 1
@@ -0,0 +1,94 @@
+import os
+import sys
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.store.memory import InMemoryStore
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.memory_worker import (
+    MemoryUpdateWorker,
+    merge_message_lists,
+    messages_since,
+)
+from src.obsidian_agent.core.nodes import profile
+
+
+def make_messages(*ids):
+    return [HumanMessage(content=f"message {i}", id=i) for i in ids]
+
+
+def test_merge_message_lists():
+    """
+    Merging keeps the order of the older list and appends unseen messages.
+    """
+    older = make_messages("a", "b")
+    newer = [AIMessage(content="edited", id="b")] + make_messages("c")
+    merged = merge_message_lists(older, newer)
+    assert [m.id for m in merged] == ["a", "b", "c"]
+    assert merged[1].content == "edited"
+
+
+def test_messages_since():
+    """
+    Only messages after the cursor are returned, unknown cursors return all.
+    """
+    messages = make_messages("a", "b", "c")
+    assert [m.id for m in messages_since(messages, "b")] == ["c"]
+    assert [m.id for m in messages_since(messages, "c")] == []
+    assert [m.id for m in messages_since(messages, "x")] == ["a", "b", "c"]
+    assert [m.id for m in messages_since(messages, None)] == ["a", "b", "c"]
+
+
+def test_worker_merges_requests_within_window():
+    """
+    Requests for the same key within the debounce window run once.
+    """
+    worker = MemoryUpdateWorker(debounce_seconds=60)
+    calls = []
+
+    assert not worker.submit("profile", make_messages("a"), calls.append)
+    assert worker.submit("profile", make_messages("a", "b"), calls.append)
+    assert not worker.submit("instructions", make_messages("a"), calls.append)
+    assert worker.pending_count == 2
+
+    assert worker.flush(timeout=5)
+    assert worker.pending_count == 0
+    assert sorted(len(c) for c in calls) == [1, 2]
+
+
+def test_worker_runs_update_after_delay_and_survives_errors():
+    """
+    Updates run on their own once due, and a failing update does not stop the worker.
+    """
+    worker = MemoryUpdateWorker(debounce_seconds=0)
+    done = threading.Event()
+
+    def fail(messages):
+        raise RuntimeError("extraction failed")
+
+    worker.submit("profile", make_messages("a"), fail)
+    worker.submit("instructions", make_messages("a"), lambda m: done.set())
+    assert done.wait(timeout=5)
+
+
+def test_memory_cursors_are_kept_per_thread():
+    """
+    A user's threads are processed independently, the cursor of one thread
+    does not skip or replay the messages of another.
+    """
+    store = InMemoryStore()
+    profile._save_cursor(store, "u1", "t1", "profile", make_messages("a", "b"))
+
+    def unprocessed(thread_id, *ids):
+        messages = make_messages(*ids)
+        return [
+            m.id
+            for m in profile._unprocessed_messages(
+                store, "u1", thread_id, "profile", messages
+            )
+        ]
+
+    assert unprocessed("t1", "a", "b", "c") == ["c"]
+    assert unprocessed("t2", "x", "y") == ["x", "y"]
+    assert unprocessed(None, "a", "b") == ["a", "b"]
@@ -0,0 +1,129 @@
+import os
+import sys
+
+from langchain_core.messages import AIMessage
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.nodes import notes as notes_nodes
+from src.obsidian_agent.core.pagination import (
+    ReadCursors,
+    outline,
+    split_note,
+    take_page,
+)
+
+LONG_NOTE = "# Long\n\nIntro\n" + "".join(
+    f"## Part {i}\n\n" + "word " * 40 + "\n\n" for i in range(6)
+)
+
+
+def test_split_note_at_sections():
+    pieces = split_note("Long", LONG_NOTE, 500)
+
+    assert "".join(piece.text for piece in pieces) == LONG_NOTE
+    assert all(len(piece.text) <= 500 for piece in pieces)
+    assert all(piece.text.startswith("#") for piece in pieces)
+    assert [h for piece in pieces for h in piece.headings] == ["Long"] + [
+        f"Part {i}" for i in range(6)
+    ]
+    assert split_note("Short", "# Short", 500)[0].headings == ("Short",)
+
+    # Sections longer than a piece are split at line ends
+    pieces = split_note("Lines", "line\n" * 100, 42)
+    assert [len(piece.text) for piece in pieces] == [40] * 12 + [20]
+
+
+def test_take_page_and_outline():
+    pieces = split_note("Long", LONG_NOTE, 500) + split_note("Other", "# Other", 500)
+    page, end = take_page(pieces, 0, 700)
+    assert sum(len(piece.text) for piece in page) <= 700
+    assert outline(pieces[end:]).splitlines()[-1] == "- Other (7 characters): Other"
+
+    # A page holds at least one piece
+    assert take_page(pieces, 0, 1)[1] == 1
+
+
+def test_read_cursors():
+    cursors = ReadCursors(max_entries=2)
+    pieces = split_note("Short", "# Short", 500)
+    cursor = cursors.create("t1", pieces, 0)
+
+    assert cursors.get("t1", cursor) == (tuple(pieces), 0)
+    assert cursors.get("t2", cursor) is None
+    cursors.create("t1", pieces, 0)
+    cursors.create("t1", pieces, 0)
+    assert cursors.get("t1", cursor) is None
+    assert len(cursors) == 2
+
+    cursors = ReadCursors(ttl_seconds=0)
+    assert cursors.get("t1", cursors.create("t1", pieces, 0)) is None
+
+
+class FakeLibrary:
+    def __init__(self):
+        self.reads = 0
+
+    def get_notes_with_context(self, note_name, depth):
+        self.reads += 1
+        return [(note_name, LONG_NOTE), ("Linked", "# Linked\n\nShort note")]
+
+
+def read_note(config, **args):
+    state = {
+        "messages": [
+            AIMessage(
+                content="",
+                tool_calls=[{"name": "ReadNote", "args": args, "id": "c1"}],
+            )
+        ]
+    }
+    result = notes_nodes.read_notes_node(state, config, None)
+    return result["messages"][0]["content"]
+
+
+def test_read_notes_node_pages_through_a_cursor(monkeypatch):
+    library = FakeLibrary()
+    monkeypatch.setattr(notes_nodes, "get_library", lambda config: library)
+    config = {
+        "configurable": {
+            "thread_id": "t1",
+            "read_note_page_chars": 600,
+            "history_dedup_notes": False,
+        }
+    }
+
+    content = read_note(config, note_name="Long", depth=1)
+    pages = [content]
+    while "cursor '" in pages[-1]:
+        cursor = pages[-1].split("cursor '")[1].split("'")[0]
+        pages.append(read_note(config, note_name="Long", cursor=cursor))
+
+    assert len(pages) > 2
+    assert "- Linked (20 characters): Linked" in pages[0]
+    assert pages[-1].endswith("# Linked\n\nShort note")
+    # The notes are read once, the pages come from the cursor
+    assert library.reads == 1
+    # Without the outlines, the pages hold the whole output
+    text = "".join(page.split("\n\n[The output continues")[0] for page in pages)
+    assert (
+        text.replace("\n\n# Linked", "# Linked") == LONG_NOTE + "# Linked\n\nShort note"
+    )
+
+    # Cursors are not shared between threads
+    config = {"configurable": {"thread_id": "t2"}}
+    content = read_note(config, note_name="Long", cursor=cursor)
+    assert "unknown or expired" in content
+
+
+def test_runs_without_a_thread_get_no_cursor(monkeypatch):
+    library = FakeLibrary()
+    monkeypatch.setattr(notes_nodes, "get_library", lambda config: library)
+    notes_nodes.READ_CURSORS.clear()
+    config = {
+        "configurable": {"read_note_page_chars": 600, "history_dedup_notes": False}
+    }
+
+    content = read_note(config, note_name="Long", depth=1)
+    assert "cursor" not in content and "'note name#section'" in content
+    assert "- Linked (20 characters): Linked" in content
+    assert len(notes_nodes.READ_CURSORS) == 0
@@ -0,0 +1,76 @@
+import os
+import sys
+
+from langchain_core.messages import AIMessage
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.models import ReadNote, SearchNotes
+from src.obsidian_agent.core.prompts import (
+    bind_tools_cached,
+    build_system_message,
+    prompt_cache_usage,
+)
+
+
+class FakeToolModel:
+    """Minimal stand-in for a chat model that records bind_tools calls."""
+
+    def __init__(self):
+        self.bind_calls = 0
+
+    def bind_tools(self, tools, **kwargs):
+        self.bind_calls += 1
+        return ("bound", tuple(tools), kwargs.get("tool_choice"))
+
+
+def test_system_message_prefix_is_stable():
+    """
+    The static prefix must not change when the profile or instructions change.
+    """
+    first = build_system_message("Role", {"name": "Ann"}, "short notes")
+    second = build_system_message("Role", {"name": "Bob"}, "long notes")
+
+    prefix_end = first.content.index("<user_profile>")
+    assert first.content[:prefix_end] == second.content[:prefix_end]
+    assert first.content.startswith("Role")
+    assert "'name': 'Bob'" in second.content
+    assert second.content.rstrip().endswith("</instructions>")
+
+
+def test_bind_tools_cached_memoizes_per_model_and_tools():
+    """
+    Binding the same tool set twice should only call bind_tools once per model.
+    """
+    model = FakeToolModel()
+    first = bind_tools_cached(model, [ReadNote, SearchNotes])
+    second = bind_tools_cached(model, [ReadNote, SearchNotes])
+    assert first is second
+    assert model.bind_calls == 1
+
+    bind_tools_cached(model, [ReadNote])
+    assert model.bind_calls == 2
+
+    other_model = FakeToolModel()
+    bind_tools_cached(other_model, [ReadNote, SearchNotes])
+    assert other_model.bind_calls == 1
+
+
+def test_prompt_cache_usage():
+    """
+    Test extraction of cached and uncached prompt tokens from usage metadata.
+    """
+    response = AIMessage(
+        content="hi",
+        usage_metadata={
+            "input_tokens": 1200,
+            "output_tokens": 10,
+            "total_tokens": 1210,
+            "input_token_details": {"cache_read": 1024},
+        },
+    )
+    assert prompt_cache_usage(response) == {
+        "prompt": 1200,
+        "cached": 1024,
+        "uncached": 176,
+    }
+    assert prompt_cache_usage(AIMessage(content="hi"))["prompt"] == 0
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import secrets
+import sys
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import START, StateGraph
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.models import GraphState
+from src.obsidian_agent.core.retention import RetentionMemorySaver, RetentionPolicy
+from src.obsidian_agent.core.serde import DedupSerializer, MemoryBlobStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def build_graph(saver, reply_size=10):
+    def reply(state: GraphState):
+        turn = len(state["messages"])
+        text = secrets.token_hex(reply_size // 2)
+        return {"messages": [AIMessage(content=f"{turn}:{text}")]}
+
+    builder = StateGraph(GraphState)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    return builder.compile(checkpointer=saver)
+
+
+def run_turns(graph, thread_id, turns):
+    config = {"configurable": {"thread_id": thread_id}}
+    for i in range(turns):
+        state = graph.invoke({"messages": [("user", f"message {i}")]}, config)
+    return state
+
+
+def test_keep_last_checkpoints():
+    """
+    Only the last N checkpoints of a thread are kept, the state is intact.
+    """
+    saver = RetentionMemorySaver(
+        RetentionPolicy(keep_last=3, ttl_seconds=0, max_bytes=0)
+    )
+    graph = build_graph(saver)
+    state = run_turns(graph, "t1", 5)
+
+    assert len(saver.storage["t1"][""]) == 3
+    assert saver.stats()["pruned_checkpoints"] > 0
+    assert len(state["messages"]) == 10
+    latest = graph.get_state({"configurable": {"thread_id": "t1"}})
+    assert len(latest.values["messages"]) == 10
+
+
+def test_idle_threads_expire():
+    """
+    Threads idle for longer than the ttl are dropped on the next write.
+    """
+    clock = FakeClock()
+    saver = RetentionMemorySaver(
+        RetentionPolicy(keep_last=0, ttl_seconds=60, max_bytes=0), clock=clock
+    )
+    graph = build_graph(saver)
+    run_turns(graph, "old", 1)
+    clock.now = 30
+    run_turns(graph, "recent", 1)
+    clock.now = 80
+    run_turns(graph, "new", 1)
+
+    assert set(saver.storage) == {"recent", "new"}
+    assert not any(key[0] == "old" for key in saver.blobs)
+    assert saver.stats()["expired_threads"] == 1
+    assert saver.stats()["live_threads"] == 2
+
+
+def test_lru_eviction_under_byte_cap():
+    """
+    Least recently used threads are evicted to stay under the byte cap,
+    including their deduplicated message bodies.
+    """
+    blobs = MemoryBlobStore()
+    saver = RetentionMemorySaver(
+        RetentionPolicy(keep_last=2, ttl_seconds=0, max_bytes=25_000),
+        serde=DedupSerializer(blobs),
+    )
+    graph = build_graph(saver, reply_size=5000)
+    for thread in ["a", "b", "c"]:
+        run_turns(graph, thread, 2)
+    # Reading "a" makes "b" the least recently used thread
+    graph.get_state({"configurable": {"thread_id": "a"}})
+    run_turns(graph, "d", 2)
+
+    stats = saver.stats()
+    assert stats["bytes_held"] <= 25_000
+    assert stats["evicted_threads"] >= 1
+    assert "b" not in saver.storage
+    assert "d" in saver.storage
+    state = graph.get_state({"configurable": {"thread_id": "d"}})
+    assert len(state.values["messages"]) == 4
+    assert len(blobs.blobs) <= 2 * stats["live_threads"]
+
+
+class CountingSerializer(DedupSerializer):
+    """DedupSerializer counting loads and blob collections."""
+
+    def __init__(self, blob_store):
+        super().__init__(blob_store, min_blob_size=100)
+        self.loads = 0
+        self.collections = 0
+
+    def loads_typed(self, data):
+        self.loads += 1
+        return super().loads_typed(data)
+
+    def retain(self, digests):
+        self.collections += 1
+        return super().retain(digests)
+
+
+def test_accounting_is_incremental():
+    """
+    Writes neither deserialize nor rescan the history, the tracked sizes and
+    message bodies match what is stored.
+    """
+    blobs = MemoryBlobStore()
+    serde = CountingSerializer(blobs)
+    saver = RetentionMemorySaver(
+        RetentionPolicy(keep_last=2, ttl_seconds=0, max_bytes=20_000), serde=serde
+    )
+    graph = build_graph(saver, reply_size=2000)
+    for thread in ["a", "b", "c", "d"]:
+        run_turns(graph, thread, 3)
+
+    # Pruning the checkpoints of a thread loads none of them
+    loads = serde.loads
+    config = {"configurable": {"thread_id": "d", "checkpoint_ns": ""}}
+    saver.put(config, empty_checkpoint(), {}, {})
+    assert serde.loads == loads
+
+    payloads = [
+        payload
+        for namespaces in saver.storage.values()
+        for checkpoints in namespaces.values()
+        for checkpoint in checkpoints.values()
+        for payload in checkpoint[:2]
+    ]
+    payloads += [w[2] for writes in saver.writes.values() for w in writes.values()]
+    payloads += list(saver.blobs.values())
+    live = set().union(*(serde.referenced_digests(p) for p in payloads))
+    assert set(blobs.blobs) == live
+    assert saver.bytes_held == sum(len(p[1]) for p in payloads) + sum(
+        len(blobs.blobs[d]) for d in live
+    )
+    assert saver.stats()["evicted_threads"] >= 1
+    # Message bodies are collected at most once per write
+    assert serde.collections <= saver.stats()["pruned_checkpoints"]
+
+
+def test_deleting_a_thread_drops_its_tracking_state():
+    blobs = MemoryBlobStore()
+    saver = RetentionMemorySaver(
+        RetentionPolicy(keep_last=0, ttl_seconds=0, max_bytes=0),
+        serde=DedupSerializer(blobs),
+    )
+    graph = build_graph(saver, reply_size=2000)
+    run_turns(graph, "a", 2)
+    held = saver.bytes_held
+    run_turns(graph, "b", 2)
+
+    saver.delete_thread("b")
+    assert saver.bytes_held == held
+    assert "b" not in saver._thread_owners and "b" not in saver._last_used
+    assert all(owned.thread_id == "a" for owned in saver._owned.values())
+
+    asyncio.run(saver.adelete_thread("a"))
+    assert saver.bytes_held == 0 and not blobs.blobs
+    assert not saver._owned and not saver._version_refs
+    assert saver.stats()["live_threads"] == 0
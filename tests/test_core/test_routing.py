@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.routing import ModelSpec, get_model
+
+
+@pytest.fixture(autouse=True)
+def model_env(monkeypatch):
+    monkeypatch.setenv("MODEL_NAME", "gpt-4o")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    for role in ("assistant", "profile", "instructions", "summary", "ingest"):
+        monkeypatch.delenv(f"{role.upper()}_MODEL", raising=False)
+
+
+def test_parse_model_spec():
+    spec = ModelSpec.parse("gpt-4o-mini?timeout=10&max_tokens=256&max_retries=0")
+    assert spec == ModelSpec("gpt-4o-mini", timeout=10, max_retries=0, max_tokens=256)
+    assert ModelSpec.parse("gemini-2.0-flash") == ModelSpec("gemini-2.0-flash")
+    with pytest.raises(ValueError):
+        ModelSpec.parse("gpt-4o-mini?top_k=3")
+
+
+def test_roles_are_routed_per_request():
+    """
+    Roles without a routed model use MODEL_NAME, a request can route a role
+    to another model with its own settings.
+    """
+    config = {
+        "configurable": {"summary_model": "gpt-4o-mini?max_tokens=256&timeout=10"}
+    }
+
+    assert get_model("assistant", config).model_name == "gpt-4o"
+    summary = get_model("summary", config)
+    assert summary.model_name == "gpt-4o-mini"
+    assert summary.max_tokens == 256 and summary.request_timeout == 10
+    assert get_model("summary", config) is summary
+    assert get_model("summary").model_name == "gpt-4o"
+
+    with pytest.raises(ValueError):
+        get_model("translation")
+
+
+def test_request_model_wins_over_the_environment(monkeypatch):
+    """
+    A role model in the environment is the default, a model chosen for the
+    run replaces it and an empty one (e.g. an exported `SUMMARY_MODEL=""`)
+    falls back to MODEL_NAME.
+    """
+    monkeypatch.setenv("SUMMARY_MODEL", "gpt-4o-mini")
+    monkeypatch.setenv("PROFILE_MODEL", "")
+
+    assert get_model("summary").model_name == "gpt-4o-mini"
+    config = {"configurable": {"summary_model": "gpt-4.1-mini", "profile_model": ""}}
+    assert get_model("summary", config).model_name == "gpt-4.1-mini"
+    assert get_model("profile", config).model_name == "gpt-4o"
@@ -0,0 +1,88 @@
+import os
+import sys
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import START, StateGraph
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.models import GraphState
+from src.obsidian_agent.core.serde import (
+    BLOB_REF_PREFIX,
+    DedupSerializer,
+    MemoryBlobStore,
+    SqliteBlobStore,
+)
+
+
+def make_messages(note_text):
+    return [
+        HumanMessage(content="Read my note", id="h1"),
+        ToolMessage(content=note_text, tool_call_id="c1", id="t1"),
+        AIMessage(content="Here it is", id="a1"),
+    ]
+
+
+def test_round_trip_and_deduplication():
+    """
+    Large message bodies are stored once and restored on load.
+    """
+    blobs = MemoryBlobStore()
+    serde = DedupSerializer(blobs)
+    note = "A long note. " * 500
+    messages = make_messages(note)
+
+    first = serde.dumps_typed({"messages": messages})
+    second = serde.dumps_typed({"messages": messages + [HumanMessage(content="ok")]})
+    assert len(blobs.blobs) == 1
+    assert len(first[1]) < len(note)
+
+    restored = serde.loads_typed(second)
+    assert restored["messages"][1].content == note
+    assert restored["messages"][0].content == "Read my note"
+    # The original messages are not modified
+    assert not messages[1].content.startswith(BLOB_REF_PREFIX)
+
+
+def test_loads_plain_payloads():
+    """
+    Payloads written by the plain serializer are still readable.
+    """
+    serde = DedupSerializer(MemoryBlobStore())
+    plain = JsonPlusSerializer().dumps_typed({"value": [1, 2, 3]})
+    assert serde.loads_typed(plain) == {"value": [1, 2, 3]}
+
+
+def test_sqlite_blob_store(tmp_path):
+    """
+    Blobs stored in SQLite can be read by a new serializer instance.
+    """
+    path = str(tmp_path / "checkpoints.sqlite")
+    note = "x" * 5000
+    data = DedupSerializer(SqliteBlobStore(path)).dumps_typed(make_messages(note))
+    restored = DedupSerializer(SqliteBlobStore(path)).loads_typed(data)
+    assert restored[1].content == note
+
+
+def test_with_memory_saver():
+    """
+    A graph checkpointed with the serializer keeps its full history.
+    """
+    note = "Long tool output. " * 400
+
+    def reply(state: GraphState):
+        return {"messages": [AIMessage(content=note)]}
+
+    builder = StateGraph(GraphState)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    blobs = MemoryBlobStore()
+    graph = builder.compile(checkpointer=MemorySaver(serde=DedupSerializer(blobs)))
+
+    config = {"configurable": {"thread_id": "t1"}}
+    for i in range(3):
+        state = graph.invoke({"messages": [("user", f"message {i}")]}, config)
+    assert len(state["messages"]) == 6
+    assert all(m.content == note for m in state["messages"][1::2])
+    assert len(blobs.blobs) == 1
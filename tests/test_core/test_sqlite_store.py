@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from langgraph.store.base import GetOp, PutOp
+
+from src.obsidian_agent.core.sqlite_store import SqliteStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteStore(str(tmp_path / "store.sqlite"))
+    yield store
+    store.close()
+
+
+def test_put_get_and_delete(store):
+    """
+    Values round trip through the database and a None put deletes them.
+    """
+    store.put(("profile", "u1"), "p1", {"name": "Ann", "interests": ["zen"]})
+    item = store.get(("profile", "u1"), "p1")
+    assert item.value == {"name": "Ann", "interests": ["zen"]}
+    assert item.namespace == ("profile", "u1")
+
+    store.put(("profile", "u1"), "p1", {"name": "Bob"})
+    updated = store.get(("profile", "u1"), "p1")
+    assert updated.value == {"name": "Bob"}
+    assert updated.created_at == item.created_at
+
+    store.delete(("profile", "u1"), "p1")
+    assert store.get(("profile", "u1"), "p1") is None
+
+
+def test_batch_runs_ops_in_order(store):
+    """
+    A get sees the puts before it only, and the last put of a key wins.
+    """
+    ns = ("profile", "u1")
+    results = store.batch(
+        [
+            GetOp(ns, "p1"),
+            PutOp(ns, "p1", {"v": 1}),
+            PutOp(ns, "p1", None),
+            PutOp(ns, "p1", {"v": 2}),
+            GetOp(ns, "p1"),
+            PutOp(ns, "p1", None),
+            GetOp(ns, "p1"),
+        ]
+    )
+    assert results[0] is None
+    assert results[4].value == {"v": 2}
+    assert results[6] is None
+    assert store.get(ns, "p1") is None
+
+
+def test_search_by_prefix_and_filter(store):
+    """
+    Search matches whole namespace labels only and applies value filters.
+    """
+    store.put(("profile", "u1"), "a", {"kind": "x"})
+    store.put(("profile", "u1", "sub"), "b", {"kind": "y"})
+    store.put(("profile", "u10"), "c", {"kind": "x"})
+    store.put(("instructions", "u1"), "d", {"kind": "x"})
+
+    keys = {item.key for item in store.search(("profile", "u1"))}
+    assert keys == {"a", "b"}
+
+    keys = {item.key for item in store.search(("profile",), filter={"kind": "x"})}
+    assert keys == {"a", "c"}
+
+    assert len(store.search(("profile",), limit=2)) == 2
+    assert store.list_namespaces(prefix=("profile",), max_depth=2) == [
+        ("profile", "u1"),
+        ("profile", "u10"),
+    ]
+
+
+def test_persistence_and_threads(tmp_path):
+    """
+    Data survives reopening, and concurrent writers from threads are not lost.
+    """
+    path = str(tmp_path / "store.sqlite")
+    store = SqliteStore(path)
+
+    def writer(i):
+        for j in range(20):
+            store.put(("profile", f"u{i}"), f"k{j}", {"j": j})
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store.close()
+
+    reopened = SqliteStore(path)
+    assert len(reopened.search(("profile",), limit=1000)) == 80
+    reopened.close()
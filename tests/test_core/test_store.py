@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.core.graph import aclose_graphs, acreate_graph
+from src.obsidian_agent.core.store import acheckpoint_factory, checkpoint_factory
+
+
+def test_async_sqlite_checkpointer_needs_the_async_factory(tmp_path):
+    """
+    The sync factory refuses async_sqlite, the async one sets it up on the loop.
+    """
+    path = str(tmp_path / "checkpoints.sqlite")
+    with pytest.raises(ValueError, match="acheckpoint_factory"):
+        checkpoint_factory("async_sqlite", path)
+
+    async def create():
+        saver = await acheckpoint_factory("async_sqlite", path)
+        try:
+            assert saver.is_setup
+            config = {"configurable": {"thread_id": "t1"}}
+            assert await saver.aget_tuple(config) is None
+        finally:
+            await saver.conn.close()
+
+    asyncio.run(create())
+
+
+def test_acreate_graph_shares_its_checkpointer_and_store(tmp_path):
+    """
+    Runs of the async graph factory reuse one checkpointer connection and one
+    store, closed by `aclose_graphs`.
+    """
+    config = {
+        "configurable": {
+            "checkpoint_type": "async_sqlite",
+            "checkpoint_path": str(tmp_path / "checkpoints.sqlite"),
+            "store_type": "sqlite",
+            "store_path": str(tmp_path / "store.sqlite"),
+        }
+    }
+
+    async def run():
+        first, second = await asyncio.gather(
+            acreate_graph(config), acreate_graph(config)
+        )
+        assert first.checkpointer is second.checkpointer
+        assert first.store is second.store
+        third = await acreate_graph(config)
+        assert third.checkpointer is first.checkpointer
+        await aclose_graphs()
+        assert (await acreate_graph(config)).checkpointer is not first.checkpointer
+        await aclose_graphs()
+
+    asyncio.run(run())
@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.utils.fetch import Fetcher, create_session, html_to_markdown
+
+PAGE = """<html><head><title>Test page</title><style>p {color: red}</style></head>
+<body><nav><a href="/home">Home</a></nav>
+<h1>Heading</h1>
+<p>Some <b>bold</b> text with a <a href="/other">link</a>.</p>
+<ul><li>First</li><li>Second</li></ul>
+<script>alert("x")</script>
+</body></html>"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        Handler.requests.append((self.path, dict(self.headers)))
+        if self.path.startswith("/jina/"):
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = PAGE.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_html_to_markdown():
+    markdown = html_to_markdown(PAGE, "http://example.com/page")
+
+    assert markdown.startswith(
+        "Title: Test page\n\nURL Source: http://example.com/page"
+    )
+    assert "# Heading" in markdown
+    assert "Some **bold** text with a [link](http://example.com/other)." in markdown
+    assert "- First\n- Second" in markdown
+    assert (
+        "alert" not in markdown and "color" not in markdown and "Home" not in markdown
+    )
+
+
+def test_cached_page_costs_no_request(server, tmp_path):
+    """
+    A fresh cache entry is served without a request, a stale one is
+    revalidated with its ETag.
+    """
+    clock = FakeClock()
+    fetcher = Fetcher(cache_dir=str(tmp_path), ttl_seconds=60, clock=clock)
+
+    first = fetcher.fetch(server + "/page")
+    assert "# Heading" in first
+    assert fetcher.fetch(server + "/page") == first
+    assert len(Handler.requests) == 1
+
+    # A new fetcher on the same cache directory still uses the cache
+    assert (
+        Fetcher(cache_dir=str(tmp_path), clock=clock).fetch(server + "/page") == first
+    )
+    assert len(Handler.requests) == 1
+
+    clock.now += 120
+    assert fetcher.fetch(server + "/page") == first
+    assert len(Handler.requests) == 2
+    assert Handler.requests[-1][1]["If-None-Match"] == '"v1"'
+
+    # The revalidation refreshed the entry
+    assert fetcher.fetch(server + "/page") == first
+    assert len(Handler.requests) == 2
+
+
+def test_falls_back_to_local_extraction_when_jina_fails(server, tmp_path):
+    fetcher = Fetcher(
+        cache_dir=str(tmp_path),
+        jina_api_key="key",
+        jina_endpoint=server + "/jina/",
+        session=create_session(retries=0),
+    )
+
+    content = fetcher.fetch(server + "/page")
+
+    assert "# Heading" in content
+    assert [path for path, _ in Handler.requests] == [
+        "/jina/" + server + "/page",
+        "/page",
+    ]
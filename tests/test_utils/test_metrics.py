@@ -0,0 +1,76 @@
+import os
+import sys
+import urllib.request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.utils.metrics import Metrics, serve_metrics, write_metrics
+
+
+def test_disabled_metrics_record_nothing():
+    """
+    A disabled registry ignores all recordings.
+    """
+    metrics = Metrics()
+    metrics.inc("requests_total")
+    metrics.observe("latency_seconds", 0.1)
+    with metrics.time("latency_seconds"):
+        pass
+
+    assert metrics.render() == "\n"
+
+
+def test_render_prometheus_text_format():
+    """
+    Counters and histograms are rendered in the Prometheus text format.
+    """
+    metrics = Metrics(enabled=True)
+    metrics.describe("requests_total", "counter", "Requests.")
+    metrics.describe("latency_seconds", "histogram", "Latency.", buckets=(0.1, 1.0))
+    metrics.inc("requests_total", cache="memory", result="hit")
+    metrics.inc("requests_total", 2, cache="memory", result="hit")
+    metrics.observe("latency_seconds", 0.05, node="tools")
+    metrics.observe("latency_seconds", 0.5, node="tools")
+    metrics.observe("latency_seconds", 5.0, node="tools")
+
+    lines = metrics.render().splitlines()
+    assert lines[:3] == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{cache="memory",result="hit"} 3',
+    ]
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{node="tools",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{node="tools",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{node="tools",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{node="tools"} 5.55' in lines
+    assert 'latency_seconds_count{node="tools"} 3' in lines
+    assert metrics.value("latency_seconds", node="tools") == 3
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics(enabled=True)
+    metrics.inc("errors_total", tool='Read"Note\\\n')
+
+    assert 'errors_total{tool="Read\\"Note\\\\\\n"} 1' in metrics.render()
+
+
+def test_export_to_file_and_endpoint(tmp_path):
+    """
+    The metrics are written to a file and served at /metrics.
+    """
+    metrics = Metrics(enabled=True)
+    metrics.inc("requests_total")
+
+    path = tmp_path / "metrics" / "agent.prom"
+    write_metrics(str(path), metrics)
+    assert path.read_text() == "# TYPE requests_total counter\nrequests_total 1\n"
+
+    server = serve_metrics(0, metrics=metrics)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read().decode() == metrics.render()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.utils.note_names import (
+    NoteNameIndex,
+    frontmatter_aliases,
+    normalize_name,
+)
+
+
+def test_normalize_name():
+    assert normalize_name("My Buddhism notes.md") == "buddhism"
+    assert normalize_name("project_ideas-2025") == "project ideas 2025"
+    # A name made only of filler words is kept
+    assert normalize_name("Notes") == "notes"
+
+
+def test_frontmatter_aliases():
+    assert frontmatter_aliases("---\naliases: [PKM, Zettelkasten]\n---\nText") == [
+        "PKM",
+        "Zettelkasten",
+    ]
+    assert frontmatter_aliases("---\naliases:\n  - PKM\n---\n") == ["PKM"]
+    assert frontmatter_aliases("---\nalias: PKM\n---") == ["PKM"]
+    assert frontmatter_aliases("---\ntags: [a]\n---\n") == []
+    assert frontmatter_aliases("---\naliases: [unclosed\n---\n") == []
+    assert frontmatter_aliases("aliases: [PKM]") == []
+
+
+def test_resolve():
+    index = NoteNameIndex()
+    index.add("Buddhism")
+    index.add("Personal Knowledge Management", ["PKM"])
+    index.add("Project Ideas 2024")
+    index.add("Project Ideas 2025")
+
+    assert index.resolve("buddhism notes")[0] == "Buddhism"
+    assert index.resolve("Budhism")[0] == "Buddhism"
+    assert index.resolve("pkm")[0] == "Personal Knowledge Management"
+    assert index.resolve("personal knowledge managment")[0] == (
+        "Personal Knowledge Management"
+    )
+
+    # Close to two notes, the candidates are returned instead
+    resolved, matches = index.resolve("Project Ideas")
+    assert resolved is None
+    assert {m.note_name for m in matches[:2]} == {
+        "Project Ideas 2024",
+        "Project Ideas 2025",
+    }
+    assert index.resolve("Quantum physics") == (None, [])
+
+
+def test_add_replaces_aliases_and_remove():
+    index = NoteNameIndex()
+    index.add("Personal Knowledge Management", ["PKM"])
+    index.add("Personal Knowledge Management", ["Second Brain"])
+    assert index.resolve("PKM")[0] is None
+    assert index.resolve("second brain")[0] == "Personal Knowledge Management"
+
+    index.remove("Personal Knowledge Management")
+    assert len(index) == 0
+    assert index.match("second brain") == []
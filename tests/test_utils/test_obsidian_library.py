@@ -1,13 +1,20 @@
+import json
 import os
 import sys
+import threading
+import time
 from pathlib import Path
 
 import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
 
 # Add the parent directory of the current file to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.utils import obsidian as obsidian_module
 from src.obsidian_agent.utils.obsidian import (  # Replace 'your_module' with the actual module name
     ObsidianLibrary,
+    apply_note_edit,
     find_and_extract_section,
 )
 
@@ -246,6 +253,219 @@ def test_put_note_already_exists(setup_obsidian_vault):
         obsidian.put_note("NoteA", "# NoteA\n\nDuplicate content.")
 
 
+def test_index_notes(setup_obsidian_vault):
+    """
+    Test adding new notes to the vector store in one batch.
+    """
+    obsidian = setup_obsidian_vault
+    text = "# NoteF\n\nThis is Note F about gardening."
+    obsidian.put_note("NoteF", text)
+    obsidian.index_notes({"NoteF": text})
+
+    results = obsidian.search_notes(text, k=1)
+    assert results[0].metadata["path"].name == "NoteF.md"
+
+
+def test_put_notes_writes_and_indexes_in_one_batch(setup_obsidian_vault, monkeypatch):
+    """
+    Test creating several notes that are searchable right away, with a single
+    vector store update.
+    """
+    obsidian = setup_obsidian_vault
+    batches = []
+    add_embeddings = obsidian.vector_store.add_embeddings
+    monkeypatch.setattr(
+        obsidian.vector_store,
+        "add_embeddings",
+        lambda embeddings, **kwargs: (
+            batches.append(embeddings) or add_embeddings(embeddings, **kwargs)
+        ),
+    )
+    notes = {
+        "NoteG": "# NoteG\n\nThis is Note G about beekeeping.",
+        "NoteH": "# NoteH\n\nThis is Note H about sailing.",
+    }
+
+    assert obsidian.put_notes(notes) == ["NoteG", "NoteH"]
+
+    assert len(batches) == 1 and len(batches[0]) == 2
+    for name, text in notes.items():
+        assert (Path(obsidian.path) / f"{name}.md").read_text(encoding="utf-8") == text
+        assert obsidian.has_note(name)
+        assert obsidian.search_notes(text, k=1)[0].metadata["path"].name == f"{name}.md"
+    assert not any(p.name.endswith(".tmp") for p in Path(obsidian.path).iterdir())
+
+
+def test_put_notes_rejects_duplicates_before_writing(setup_obsidian_vault):
+    """
+    Test that a batch with an existing note name writes nothing.
+    """
+    obsidian = setup_obsidian_vault
+    with pytest.raises(FileExistsError, match="Note 'NoteA' already exists"):
+        obsidian.put_notes({"NoteI": "# NoteI", "NoteA": "# NoteA"})
+    assert not (Path(obsidian.path) / "NoteI.md").exists()
+    assert not obsidian.has_note("NoteI")
+
+
+def test_put_note_does_not_replace_files_created_meanwhile(setup_obsidian_vault):
+    """
+    Test that a note created outside the library after it was loaded is
+    never overwritten.
+    """
+    obsidian = setup_obsidian_vault
+    path = Path(obsidian.path) / "NoteJ.md"
+    path.write_text("Written in Obsidian.", encoding="utf-8")
+
+    with pytest.raises(FileExistsError):
+        obsidian.put_note("NoteJ", "# NoteJ")
+    assert path.read_text(encoding="utf-8") == "Written in Obsidian."
+
+
+def test_put_notes_write_errors_are_not_masked(setup_obsidian_vault, monkeypatch):
+    """
+    Test that a failed batch raises its write error and embeds nothing, while
+    the notes written before the error can be found.
+    """
+    obsidian = setup_obsidian_vault
+    write_note = obsidian._write_note
+
+    def fail_second(note_title, content):
+        if note_title == "NoteL":
+            raise OSError("disk full")
+        write_note(note_title, content)
+
+    def index_notes(notes):
+        raise RuntimeError("embedding provider down")
+
+    monkeypatch.setattr(obsidian, "_write_note", fail_second)
+    monkeypatch.setattr(obsidian, "index_notes", index_notes)
+    with pytest.raises(OSError, match="disk full"):
+        obsidian.put_notes({"NoteK": "# NoteK\n\nkestrel", "NoteL": "# NoteL"})
+    assert obsidian.has_note("NoteK")
+    assert [m.note_name for m in obsidian.grep_notes("kestrel")[0]] == ["NoteK"]
+
+
+def test_vector_store_saves_are_deferred(tmp_path, monkeypatch):
+    """
+    Test that several batches of notes are saved to the vector store path in
+    one save, and that `flush` saves them right away.
+    """
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "Old.md").write_text("# Old\n\nOld note.")
+    store_path = str(tmp_path / "store")
+    embeddings = DeterministicFakeEmbedding(size=16)
+    store = FAISS.from_texts(["# Old\n\nOld note."], embeddings)
+    store.save_local(store_path)
+    obsidian = ObsidianLibrary(
+        str(vault), vector_store_path=store_path, vector_store=store, save_delay=60
+    )
+    saves = []
+    save_local = store.save_local
+    monkeypatch.setattr(
+        store, "save_local", lambda path: saves.append(path) or save_local(path)
+    )
+
+    for name in ("NoteM", "NoteN", "NoteO"):
+        obsidian.put_notes({name: f"# {name}\n\nAbout {name}."})
+    assert saves == []
+
+    obsidian.flush()
+    obsidian.flush()
+    assert saves == [store_path]
+    saved = FAISS.load_local(
+        store_path, embeddings, allow_dangerous_deserialization=True
+    )
+    assert saved.index.ntotal == 4
+
+
+def test_memory_usage_is_kept_up_to_date(tmp_path, monkeypatch):
+    """
+    Test that the memory estimate is measured once and follows the writes.
+    """
+    (tmp_path / "Big.md").write_text("# Big\n\n" + "Paragraph about soil. " * 300)
+    obsidian = ObsidianLibrary(
+        str(tmp_path), embeddings=DeterministicFakeEmbedding(size=16)
+    )
+    obsidian.memory_usage()
+
+    obsidian.put_notes({"Small": "# Small\n\nA short note."})
+    obsidian.edit_note("Big", "append", "Compost. " * 200)
+    obsidian.grep_notes("soil")
+    estimate = obsidian.memory_usage()
+
+    obsidian._store_bytes = None
+    assert obsidian.memory_usage() == estimate
+
+
+class SlowEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings taking as long as a call to an embedding provider."""
+
+    delay: float = 0.02
+
+    def embed_documents(self, texts):
+        time.sleep(self.delay)
+        return super().embed_documents(texts)
+
+
+def test_concurrent_reads_and_writes(tmp_path):
+    """
+    Test readers and writers sharing one library: no update is lost, every
+    note is indexed once and reads keep going while notes are embedded.
+    """
+    for i in range(20):
+        (tmp_path / f"Base{i}.md").write_text(
+            f"# Base{i}\n\nLinks to [[Base{(i + 1) % 20}]].", encoding="utf-8"
+        )
+    store = FAISS.from_texts(["."], SlowEmbedding(size=16))
+    obsidian = ObsidianLibrary(str(tmp_path), vector_store=store)
+    writers_done = threading.Event()
+    errors = []
+    reads = []
+
+    def write(w):
+        try:
+            for b in range(10):
+                obsidian.put_notes(
+                    {f"W{w}-{b}-{n}": f"# W{w}-{b}-{n}\n\nNew note." for n in range(2)}
+                )
+        except Exception as e:
+            errors.append(e)
+
+    def read(r):
+        count = 0
+        try:
+            while not writers_done.is_set():
+                obsidian.get_note_with_context(f"Base{(r + count) % 20}", 1)
+                obsidian.search_notes("note", k=2)
+                count += 1
+        except Exception as e:
+            errors.append(e)
+        reads.append(count)
+
+    writers = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    readers = [threading.Thread(target=read, args=(r,)) for r in range(8)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    writers_done.set()
+    for t in readers:
+        t.join()
+
+    assert errors == []
+    new_notes = {
+        f"W{w}-{b}-{n}.md" for w in range(4) for b in range(10) for n in range(2)
+    }
+    assert len(obsidian.file_names) == len(set(obsidian.file_names)) == 20 + 80
+    assert new_notes <= set(obsidian.file_names)
+    assert store.index.ntotal == 1 + 80
+    for name in new_notes:
+        assert "New note." in obsidian.get_note_content(name.removesuffix(".md"))
+    # 40 batches of 20ms embeddings, reads must not wait for them
+    assert sum(reads) > 200
+
+
 def test_find_and_extract_section():
     """
     Test the helper function to extract a section from text.
@@ -365,3 +585,208 @@ def test_get_note_content_with_section_link(setup_obsidian_vault):
     assert "NoteB SECTION:Section1" in context
     assert "Content of Section 1." in context
     assert "## Section2" not in context  # Section2 should not be included
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings recording the texts of every embedding call."""
+
+    calls: list = []
+
+    def embed_documents(self, texts):
+        self.calls.append(texts)
+        return super().embed_documents(texts)
+
+
+def test_apply_note_edit():
+    """
+    Test the edit operations on a note with nested sections.
+    """
+    text = "# T\n\nIntro.\n\n## A\n\nBody A.\n\n### A1\n\nSub.\n\n## B\n\nBody B.\n"
+
+    assert apply_note_edit(text, "append", "End.").endswith("Body B.\n\nEnd.\n")
+    assert (
+        apply_note_edit(text, "replace_section", "New A.", section="A")
+        == "# T\n\nIntro.\n\n## A\n\nNew A.\n\n## B\n\nBody B.\n"
+    )
+    assert (
+        apply_note_edit(text, "insert_under_heading", "More A.", section="## A")
+        == "# T\n\nIntro.\n\n## A\n\nBody A.\n\n### A1\n\nSub.\n\nMore A.\n\n## B\n\nBody B.\n"
+    )
+    assert apply_note_edit(text, "patch", "Body b!", find="Body B.").endswith(
+        "## B\n\nBody b!\n"
+    )
+
+    with pytest.raises(ValueError, match="headings are: T, A, A1, B"):
+        apply_note_edit(text, "replace_section", "x", section="C")
+    with pytest.raises(ValueError, match="found 2 times"):
+        apply_note_edit(text, "patch", "x", find="Body")
+    with pytest.raises(ValueError, match="Unknown edit operation"):
+        apply_note_edit(text, "delete", "x")
+
+
+def test_edit_note_reembeds_only_changed_chunks(tmp_path):
+    """
+    Test that editing the end of a large note embeds only its changed chunk
+    and keeps the vector store consistent with the note.
+    """
+    sections = [
+        f"## Part {i}\n\n" + f"Paragraph {i} about topic {i}. " * 200 for i in range(5)
+    ]
+    (tmp_path / "Big.md").write_text("# Big\n\n" + "\n\n".join(sections) + "\n")
+    (tmp_path / "Other.md").write_text("# Other\n\nUnrelated.")
+    embeddings = CountingEmbedding(size=16)
+    obsidian = ObsidianLibrary(str(tmp_path), embeddings=embeddings)
+    chunks_before = obsidian.vector_store.index.ntotal
+    assert chunks_before > 3
+
+    embeddings.calls.clear()
+    text = obsidian.edit_note("Big", "insert_under_heading", "Gardening.", "Part 4")
+
+    assert (tmp_path / "Big.md").read_text() == text
+    assert text.rstrip().endswith("Gardening.")
+    assert len(embeddings.calls) == 1 and len(embeddings.calls[0]) == 1
+    assert obsidian.vector_store.index.ntotal == chunks_before
+    stored = {
+        doc.page_content
+        for doc in obsidian.vector_store.docstore._dict.values()
+        if doc.metadata["path"].name == "Big.md"
+    }
+    assert any(chunk.endswith("Gardening.") for chunk in stored)
+    assert (
+        obsidian.search_notes(sorted(stored)[-1], k=1)[0].metadata["path"].name
+        == "Big.md"
+    )
+
+    with pytest.raises(FileNotFoundError):
+        obsidian.edit_note("Missing", "append", "x")
+
+
+class UnscannableDict(dict):
+    """A docstore dict failing when its documents are scanned."""
+
+    def items(self):
+        raise AssertionError("docstore scanned")
+
+    values = items
+
+
+def test_edit_note_uses_the_saved_chunk_ids(tmp_path):
+    """
+    Test that edits find the chunks of a note through the chunk ids saved
+    next to the vector store, without scanning the docstore, and that the
+    saves of several edits are batched.
+    """
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "Garden.md").write_text("# Garden\n\nTomatoes.")
+    (vault / "Other.md").write_text("# Other\n\nUnrelated.")
+    store_path = str(tmp_path / "store")
+    embeddings = DeterministicFakeEmbedding(size=16)
+    obsidian = ObsidianLibrary(str(vault), embeddings=embeddings)
+    obsidian.vector_store.save_local(store_path)
+    obsidian.vector_store_path = store_path
+    obsidian.save_delay = 60
+    obsidian.edit_note("Garden", "append", "Basil.")
+    obsidian.edit_note("Garden", "append", "Mint.")
+    assert not os.path.exists(os.path.join(store_path, "chunk_ids.json"))
+    obsidian.flush()
+    with open(os.path.join(store_path, "chunk_ids.json")) as f:
+        assert json.load(f) == obsidian._chunk_ids
+
+    reloaded = ObsidianLibrary(
+        str(vault), vector_store_path=store_path, embeddings=embeddings
+    )
+    docstore = reloaded.vector_store.docstore
+    docstore._dict = UnscannableDict(docstore._dict)
+    reloaded.edit_note("Garden", "append", "Thyme.")
+
+    assert reloaded.vector_store.index.ntotal == 2
+    garden = reloaded._chunk_ids[str(vault / "Garden.md")]
+    assert len(garden) == 1
+    assert docstore.search(garden[0]).page_content.endswith("Thyme.")
+
+
+class SlowQueryEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings with queries as slow as a call to a provider."""
+
+    def embed_query(self, text):
+        time.sleep(0.1)
+        return super().embed_query(text)
+
+
+def test_vector_search_metric_excludes_the_query_embedding(tmp_path):
+    """
+    Test that the vector search metric times the search only, the query
+    embedding, a call to the provider, has its own metric.
+    """
+    (tmp_path / "Garden.md").write_text("# Garden\n\nTomatoes.")
+    obsidian = ObsidianLibrary(str(tmp_path), embeddings=SlowQueryEmbedding(size=16))
+    metrics = obsidian_module.METRICS
+    metrics.enabled = True
+    metrics.reset()
+    try:
+        obsidian.search_notes("Tomatoes", k=1)
+        sums = {
+            line.split()[0]: float(line.split()[1])
+            for line in metrics.render().splitlines()
+            if line.endswith(tuple("0123456789")) and "_sum" in line
+        }
+    finally:
+        metrics.enabled = False
+        metrics.reset()
+
+    assert sums["obsidian_agent_embed_query_seconds_sum"] >= 0.1
+    assert sums["obsidian_agent_vector_search_seconds_sum"] < 0.1
+
+
+def test_grep_notes(setup_obsidian_vault, tmp_path, monkeypatch):
+    obsidian = setup_obsidian_vault
+
+    matches, more = obsidian.grep_notes("[[NoteB")
+    # Ordered by path, NoteD is at the root of the vault
+    assert [(m.note_name, m.line_number) for m in matches] == [
+        ("NoteD", 3),
+        ("NoteA", 3),
+    ]
+    assert not more
+
+    matches, _ = obsidian.grep_notes(r"^## Section\d$", regex=True)
+    assert [m.line for m in matches] == ["## Section1", "## Section2"]
+    assert obsidian.grep_notes("content of section", ignore_case=True)[0]
+    assert obsidian.grep_notes("content of section")[0] == []
+
+    # Pages of matching lines
+    first, more = obsidian.grep_notes("Note", limit=3)
+    second, _ = obsidian.grep_notes("Note", offset=3, limit=3)
+    assert len(first) == 3 and more
+    assert not set(map(str, first)) & set(map(str, second))
+
+    # The index follows new and edited notes
+    obsidian.put_note("NoteF", "Remember TODO(2024)")
+    obsidian.edit_note("NoteC", "append", "Another TODO(2024)")
+    matches, _ = obsidian.grep_notes("TODO(2024)")
+    assert sorted(m.note_name for m in matches) == ["NoteC", "NoteF"]
+
+    # Only notes containing the trigrams of the pattern are read
+    opened = []
+    real_open = open
+    monkeypatch.setattr(
+        "builtins.open",
+        lambda path, *a, **kw: opened.append(path) or real_open(path, *a, **kw),
+    )
+    obsidian.grep_notes("Remember")
+    assert opened == [f"{obsidian.path}/NoteF.md"]
+
+
+def test_resolve_note_name(setup_obsidian_vault, tmp_path):
+    obsidian = setup_obsidian_vault
+    assert obsidian.resolve_note_name("notea")[0] == "NoteA"
+    assert obsidian.resolve_note_name("note-a.md")[0] == "NoteA"
+
+    resolved, matches = obsidian.resolve_note_name("Note")
+    assert resolved is None
+    assert {m.note_name for m in matches} >= {"NoteA", "NoteB", "NoteC", "NoteD"}
+
+    # New notes are found by their frontmatter aliases
+    obsidian.put_note("Zettelkasten", "---\naliases: [Slip box]\n---\nCards.")
+    assert obsidian.resolve_note_name("slipbox")[0] == "Zettelkasten"
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.utils.obsidian import ObsidianLibrary
+from src.obsidian_agent.utils.profiling import (
+    current_profile,
+    profile_calls,
+    profiled,
+)
+from src.obsidian_agent.utils.rag import create_vector_store
+
+
+@pytest.fixture
+def vault(tmp_path):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "NoteA.md").write_text("# NoteA\n\nLinks to [[NoteB]].", encoding="utf-8")
+    (vault / "NoteB.md").write_text("# NoteB\n\nNo links.", encoding="utf-8")
+    return vault
+
+
+@pytest.fixture
+def library(vault):
+    store = FAISS.from_texts(["."], DeterministicFakeEmbedding(size=8))
+    return ObsidianLibrary(str(vault), vector_store=store)
+
+
+def reports(directory):
+    return sorted(p.name for p in directory.iterdir()) if directory.exists() else []
+
+
+def test_profiling_is_off_by_default(tmp_path, monkeypatch, library):
+    monkeypatch.delenv("PROFILE_DIR", raising=False)
+
+    @profile_calls("tools")
+    def add(a, b):
+        return a + b
+
+    assert add(1, 2) == 3
+    assert "NOTE NAME: NoteA" in library.get_note_with_context("NoteA", 1)
+    assert reports(tmp_path / "profiles") == []
+
+
+def test_one_report_per_call(tmp_path, monkeypatch, library):
+    """
+    A library call writes one cProfile dump and one text report, the calls
+    nested in it are part of the same report.
+    """
+    profiles = tmp_path / "profiles"
+    monkeypatch.setenv("PROFILE_DIR", str(profiles))
+    monkeypatch.setenv("PROFILE_MEMORY", "1")
+
+    text = library.get_note_with_context("NoteA", 1)
+    assert "NOTE NAME: NoteB" in text
+
+    names = reports(profiles)
+    assert len(names) == 2
+    assert "-library-ObsidianLibrary.get_note_with_context-" in names[0]
+    assert [name.rsplit(".", 1)[1] for name in names] == ["prof", "txt"]
+    report = (profiles / names[1]).read_text()
+    assert "call: library/ObsidianLibrary.get_note_with_context" in report
+    assert "allocated_blocks:" in report
+    assert "traced_peak_bytes:" in report
+    assert "get_note_content" in report
+    assert "top allocations:" in report
+
+
+def test_index_build_phases(tmp_path, monkeypatch, vault):
+    profiles = tmp_path / "profiles"
+    monkeypatch.setenv("PROFILE_DIR", str(profiles))
+    monkeypatch.setenv("PROFILE_TARGETS", "rag")
+
+    create_vector_store(str(vault), embeddings=DeterministicFakeEmbedding(size=8))
+
+    (report,) = [name for name in reports(profiles) if name.endswith(".txt")]
+    text = (profiles / report).read_text()
+    assert "call: rag/create_vector_store" in text
+    for phase in ("load", "split", "embed"):
+        assert f"  {phase} " in text
+
+
+def test_targets_and_min_seconds_filter_reports(tmp_path, monkeypatch, library):
+    profiles = tmp_path / "profiles"
+    monkeypatch.setenv("PROFILE_DIR", str(profiles))
+
+    monkeypatch.setenv("PROFILE_TARGETS", "tools,rag")
+    library.get_note_content("NoteA")
+    assert reports(profiles) == []
+
+    monkeypatch.setenv("PROFILE_TARGETS", "library")
+    monkeypatch.setenv("PROFILE_MIN_SECONDS", "60")
+    library.get_note_content("NoteA")
+    assert reports(profiles) == []
+
+
+def test_concurrent_tasks_get_their_own_reports(tmp_path, monkeypatch):
+    """
+    Tasks profiled at the same time on one event loop each write a report
+    with their own phases, marked as overlapping.
+    """
+    profiles = tmp_path / "profiles"
+    monkeypatch.setenv("PROFILE_DIR", str(profiles))
+    monkeypatch.setenv("PROFILE_MEMORY", "1")
+
+    async def call(name):
+        with profiled("tools", name):
+            with current_profile().phase(f"{name}-phase"):
+                await asyncio.sleep(0.02)
+
+    async def run():
+        await asyncio.gather(call("first"), call("second"))
+
+    asyncio.run(run())
+
+    texts = {
+        name.split("-tools-")[1].split("-")[0]: (profiles / name).read_text()
+        for name in reports(profiles)
+        if name.endswith(".txt")
+    }
+    assert set(texts) == {"first", "second"}
+    for name, text in texts.items():
+        other = "second" if name == "first" else "first"
+        assert f"  {name}-phase " in text and f"{other}-phase" not in text
+        assert "overlapped: true" in text
+    assert "traced_peak_bytes:" not in texts["second"]
@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.utils.rwlock import ReadWriteLock
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=5)
+
+    def read():
+        with lock.read():
+            inside.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not inside.broken
+
+
+def test_writer_excludes_readers_and_waits_for_them():
+    lock = ReadWriteLock()
+    events = []
+    reading = threading.Event()
+
+    def write():
+        reading.wait()
+        with lock.write():
+            events.append("write")
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    with lock.read():
+        reading.set()
+        time.sleep(0.05)
+        events.append("read")
+    writer.join()
+
+    assert events == ["read", "write"]
+
+
+def test_waiting_writer_goes_before_new_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def write():
+        with lock.write():
+            events.append("write")
+
+    def late_read():
+        with lock.read():
+            events.append("late read")
+
+    writer = threading.Thread(target=write)
+    reader = threading.Thread(target=late_read)
+    with lock.read():
+        writer.start()
+        while not lock._waiting_writers:
+            time.sleep(0.001)
+        reader.start()
+        time.sleep(0.05)
+    writer.join()
+    reader.join()
+
+    assert events == ["write", "late read"]
+
+
+def test_reentrant_reads_and_writes():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                with lock.write():
+                    pass
+    # The lock is free again
+    with lock.write():
+        pass
@@ -0,0 +1,76 @@
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.obsidian_agent.utils.trigram import (
+    TrigramIndex,
+    compile_pattern,
+    required_literals,
+)
+
+
+def test_required_literals():
+    assert required_literals("TODO(2024)") == ["TODO(2024)"]
+    assert required_literals(r"TODO\(2024\)", regex=True) == ["TODO(2024)"]
+    assert required_literals(r"^def (\w+)_node\(", regex=True) == [
+        "def ",
+        "_node(",
+    ]
+    assert required_literals(r"(abc)+x?yz", regex=True) == ["abc", "yz"]
+    # Optional parts and alternatives are not required
+    assert required_literals(r"(abc)?|xyz", regex=True) == []
+    assert required_literals(r"colou?r", regex=True) == ["colo", "r"]
+
+
+def test_candidates_are_a_superset_of_matches():
+    docs = {
+        "a": "A TODO(2024) is left here",
+        "b": "todo(2024) in lower case",
+        "c": "Nothing to do",
+        "d": "def read_notes_node(state):",
+    }
+    index = TrigramIndex()
+    for key, text in docs.items():
+        index.add(key, text)
+
+    for pattern, regex in [
+        ("TODO(2024)", False),
+        ("to do", False),
+        (r"def \w+_node\(", True),
+        (r"(?i)todo\(\d+\)", True),
+        ("xy", False),
+        ("missing", False),
+    ]:
+        matcher = compile_pattern(pattern, regex)
+        matching = {key for key, text in docs.items() if matcher.search(text)}
+        candidates = index.candidates(required_literals(pattern, regex))
+        assert matching <= candidates
+
+    assert index.candidates(["TODO(2024)"]) == {"a", "b"}
+    assert index.candidates(["missing"]) == set()
+    assert index.candidates(["xy"]) == set(docs)
+
+
+def test_add_replaces_and_remove_drops_documents():
+    index = TrigramIndex()
+    index.add("a", "alpha")
+    index.add("a", "beta")
+    assert index.candidates(["alpha"]) == set()
+    assert index.candidates(["beta"]) == {"a"}
+
+    index.remove("a")
+    assert len(index) == 0
+    assert index.candidates(["beta"]) == set()
+    assert index._postings == {}
+
+
+def test_compile_pattern():
+    assert compile_pattern("a.b").search("a.b")
+    assert not compile_pattern("a.b").search("axb")
+    assert compile_pattern("A", ignore_case=True).search("a")
+    with pytest.raises(ValueError, match="Invalid regex"):
+        compile_pattern("(", regex=True)
+    assert isinstance(compile_pattern("a", regex=True), re.Pattern)